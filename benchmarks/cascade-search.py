@@ -0,0 +1,60 @@
+"""
+Cascade Search: Latency vs Recall
+
+Compares exhaustive full-dimension search with the two-stage cascade
+(scan a truncated copy for candidates, rescore them with full vectors)
+for several coarse sizes and candidate counts.
+
+Runs offline on synthetic vectors whose signal is front-loaded into the
+leading dimensions like text-embedding-3-* output. Real embeddings
+should be checked too - recall depends on how the model orders its
+dimensions.
+"""
+
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from rag_utils.quantization import recall_at_k
+from rag_utils.vector_index import VectorIndex
+from synthetic import clustered_vectors
+
+N_VECTORS = 100_000
+N_QUERIES = 200
+DIM = 1536
+TOP_K = 10
+COARSE_DIMS = (128, 256, 512)
+CANDIDATES = (100, 300, 1000)
+
+
+def timed_search(index, queries, **kwargs):
+    """Mean milliseconds per query and the results"""
+    start = time.perf_counter()
+    indices, _ = index.search_many(queries, TOP_K, **kwargs)
+    return (time.perf_counter() - start) * 1000 / len(queries), indices
+
+
+if __name__ == "__main__":
+    vectors = clustered_vectors(N_VECTORS + N_QUERIES, DIM, decay=3.0)
+    index = VectorIndex(vectors[:N_VECTORS])
+    queries = vectors[N_VECTORS:]
+
+    print("=" * 60)
+    print(f"CASCADE SEARCH: {N_VECTORS:,} x {DIM} vectors, {N_QUERIES} queries")
+    print("=" * 60)
+
+    # Build the truncated copies up front so they are not timed
+    for coarse_dim in COARSE_DIMS:
+        index.coarse_vectors(coarse_dim)
+
+    baseline_ms, truth = timed_search(index, queries)
+    print(f"\n{'coarse dim':>10} {'candidates':>11} {f'recall@{TOP_K}':>10} {'ms/query':>9} {'speedup':>8}")
+    print("-" * 60)
+    print(f"{'full':>10} {'-':>11} {1.0:>10.3f} {baseline_ms:>9.2f} {1.0:>7.1f}x")
+
+    for coarse_dim in COARSE_DIMS:
+        for candidates in CANDIDATES:
+            ms, found = timed_search(index, queries, coarse_dim=coarse_dim, candidates=candidates)
+            print(f"{coarse_dim:>10} {candidates:>11} {recall_at_k(found, truth):>10.3f} "
+                  f"{ms:>9.2f} {baseline_ms / ms:>7.1f}x")
@@ -0,0 +1,90 @@
+"""
+HNSW Tuning Sweep for Chroma Collections
+
+Builds a Chroma collection per (M, ef_construction) pair, then queries it
+at several ef_search values and compares every result list against exact
+brute-force ground truth. Prints recall@k, queries per second, build time
+and estimated index memory, so each collection's settings are picked on
+purpose - then pass them to PersistentCollection(hnsw_m=..., ...).
+
+Runs offline on synthetic vectors by default. Set SNAPSHOT_PATH to a
+snapshot written by write_snapshot() to tune on real embeddings.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import chromadb
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from rag_utils.persistent_collection import hnsw_configuration
+from rag_utils.quantization import recall_at_k
+from rag_utils.snapshot import open_snapshot
+from rag_utils.vector_index import VectorIndex, normalize_rows
+from synthetic import clustered_vectors
+
+SNAPSHOT_PATH = None
+N_VECTORS = 50_000
+N_QUERIES = 200
+DIM = 384
+TOP_K = 10
+
+SPACE = "cosine"
+M_VALUES = (8, 16, 32)
+EF_CONSTRUCTION_VALUES = (64, 200)
+EF_SEARCH_VALUES = (16, 50, 100, 200)
+
+
+def estimated_megabytes(n, dim, m):
+    """hnswlib keeps float32 vectors plus ~2 * M int32 links per node on layer 0"""
+    return n * (dim * 4 + 2 * m * 4 + 16) / 2**20
+
+
+if __name__ == "__main__":
+    if SNAPSHOT_PATH:
+        snapshot = open_snapshot(SNAPSHOT_PATH)
+        corpus = normalize_rows(snapshot.vectors)
+        queries = corpus[:: max(1, len(corpus) // N_QUERIES)][:N_QUERIES]
+    else:
+        vectors = normalize_rows(clustered_vectors(N_VECTORS + N_QUERIES, DIM))
+        corpus, queries = vectors[:N_VECTORS], vectors[N_VECTORS:]
+    ids = [str(i) for i in range(len(corpus))]
+    truth, _ = VectorIndex.from_normalized(corpus).search_many(queries, TOP_K)
+
+    print("=" * 72)
+    print(f"HNSW TUNING: {len(corpus):,} x {corpus.shape[1]} vectors, space={SPACE}, {len(queries)} queries")
+    print("=" * 72)
+    print(f"\n{'M':>4} {'ef_con':>7} {'ef_search':>10} {f'recall@{TOP_K}':>10} {'QPS':>8} {'build s':>8} {'est. MB':>8}")
+    print("-" * 72)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        client = chromadb.PersistentClient(path=tmp)
+        batch_size = client.get_max_batch_size()
+        for m in M_VALUES:
+            for ef_construction in EF_CONSTRUCTION_VALUES:
+                name = f"tune_m{m}_ef{ef_construction}"
+                collection = client.create_collection(
+                    name, configuration=hnsw_configuration(SPACE, m, ef_construction)
+                )
+                start = time.perf_counter()
+                for offset in range(0, len(corpus), batch_size):
+                    collection.add(ids=ids[offset:offset + batch_size],
+                                   embeddings=corpus[offset:offset + batch_size])
+                build_s = time.perf_counter() - start
+
+                for ef_search in EF_SEARCH_VALUES:
+                    collection.modify(configuration={"hnsw": {"ef_search": ef_search}})
+                    # A loaded HNSW index keeps its ef_search; reopening applies the new one
+                    client.clear_system_cache()
+                    client = chromadb.PersistentClient(path=tmp)
+                    collection = client.get_collection(name)
+                    collection.query(query_embeddings=queries[:1], n_results=TOP_K, include=[])  # load
+                    start = time.perf_counter()
+                    results = collection.query(query_embeddings=queries, n_results=TOP_K, include=[])
+                    qps = len(queries) / (time.perf_counter() - start)
+                    found = [[int(i) for i in row] for row in results["ids"]]
+                    print(f"{m:>4} {ef_construction:>7} {ef_search:>10} {recall_at_k(found, truth):>10.3f} "
+                          f"{qps:>8,.0f} {build_s:>8.1f} {estimated_megabytes(len(corpus), corpus.shape[1], m):>8.1f}")
+                client.delete_collection(name)
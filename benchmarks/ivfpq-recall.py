@@ -0,0 +1,55 @@
+"""
+IVF-PQ Recall Report
+
+Compression vs recall for the IVF-PQ tier: PQ codes alone, and PQ
+candidates re-ranked against full-precision vectors read from a
+memory-mapped snapshot (only the candidate rows are paged in).
+
+Runs offline on synthetic clustered vectors shaped like
+text-embedding-3-small output (1536 dims), so no API key is needed.
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from rag_utils.ivfpq import ivfpq_recall_report
+from rag_utils.snapshot import open_snapshot, write_snapshot
+from synthetic import clustered_vectors
+
+N_VECTORS = 200_000
+N_QUERIES = 200
+DIM = 1536
+N_CLUSTERS = 200
+TOP_K = 10
+
+NLIST = 1024
+PQ_M = 96  # bytes per vector
+TRAIN_SAMPLE = 50_000
+
+
+if __name__ == "__main__":
+    vectors = clustered_vectors(N_VECTORS + N_QUERIES, DIM, N_CLUSTERS)
+    corpus, queries = vectors[:N_VECTORS], vectors[N_VECTORS:]
+
+    print("=" * 76)
+    print(f"IVF-PQ RECALL: {N_VECTORS:,} x {DIM} vectors, nlist={NLIST}, m={PQ_M}, {N_QUERIES} queries")
+    print("=" * 76)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot_path = os.path.join(tmp, "corpus.snap")
+        write_snapshot(snapshot_path, corpus, [str(i) for i in range(N_VECTORS)])
+        snapshot = open_snapshot(snapshot_path)
+
+        rows = ivfpq_recall_report(snapshot.vectors, queries, top_k=TOP_K,
+                                   rescore_depths=(0, 50, 200), nprobes=(8, 32),
+                                   nlist=NLIST, m=PQ_M, sample_size=TRAIN_SAMPLE)
+        del snapshot
+
+    print(f"\nIVF-PQ build (train on {TRAIN_SAMPLE:,} + encode): {rows[-1]['build_s']:.1f}s")
+    print(f"\n{'index':>8} {'nprobe':>7} {'rescore':>8} {'MB':>9} {'ratio':>7} {f'recall@{TOP_K}':>10} {'ms/query':>9}")
+    print("-" * 76)
+    for row in rows:
+        print(f"{row['index']:>8} {row['nprobe']:>7} {row['rescore']:>8} {row['bytes'] / 2**20:>9.1f} "
+              f"{row['compression']:>6.1f}x {row[f'recall@{TOP_K}']:>10.3f} {row['ms_per_query']:>9.2f}")
@@ -0,0 +1,55 @@
+"""
+Offline Indexing & Retrieval Benchmark
+
+Embeds a synthetic corpus with the local HashingEmbeddingProvider and
+times ingestion and search. Nothing touches the network, so the numbers
+measure our own code - use it to catch index regressions without
+provider latency in the way.
+"""
+
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from rag_utils.embeddings import embed_texts
+from rag_utils.providers import HashingEmbeddingProvider
+from rag_utils.vector_index import VectorIndex
+from synthetic import random_documents
+
+N_DOCUMENTS = 50_000
+N_QUERIES = 500
+DIM = 768
+TOP_K = 10
+
+
+if __name__ == "__main__":
+    provider = HashingEmbeddingProvider(dim=DIM)
+    documents = random_documents(N_DOCUMENTS)
+    queries = random_documents(N_QUERIES, words_per_doc=8, seed=7)
+
+    print("=" * 60)
+    print(f"LOCAL RETRIEVAL: {N_DOCUMENTS:,} documents, {DIM} dims")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    vectors = embed_texts(documents, provider)
+    embed_s = time.perf_counter() - start
+    print(f"\nEmbed corpus:     {embed_s:7.2f}s  ({N_DOCUMENTS / embed_s:,.0f} docs/s)")
+
+    start = time.perf_counter()
+    index = VectorIndex(vectors, documents)
+    print(f"Build index:      {time.perf_counter() - start:7.2f}s")
+
+    query_vectors = embed_texts(queries, provider)
+
+    start = time.perf_counter()
+    for query_vector in query_vectors:
+        index.search(query_vector, TOP_K)
+    single_ms = (time.perf_counter() - start) * 1000 / N_QUERIES
+    print(f"Search (1 query): {single_ms:7.2f}ms per query")
+
+    start = time.perf_counter()
+    index.search_many(query_vectors, TOP_K)
+    batch_ms = (time.perf_counter() - start) * 1000 / N_QUERIES
+    print(f"Search (batched): {batch_ms:7.2f}ms per query")
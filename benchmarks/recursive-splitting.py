@@ -0,0 +1,90 @@
+"""
+Recursive Splitting Benchmark
+
+Splits a synthetic corpus with LangChain's RecursiveCharacterTextSplitter
+and with recursive_spans (same separators and sizes), checks that both
+produce the same chunks, and compares time and memory held by the result:
+LangChain returns one str per chunk (the overlap stored twice), the span
+table 32 bytes per chunk next to the untouched source texts.
+split_documents() is timed too, LangChain's against
+rag_utils.chunking.split_documents on the same Documents - that is what
+the RAG chain calls, and both add a Document per chunk on top of the
+splitting.
+
+Requires: langchain (requirements.txt) for the reference splitter
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from rag_utils.chunking import ChunkSpans, recursive_spans, split_documents
+from synthetic import random_documents
+
+N_DOCUMENTS = 2_000
+WORDS_PER_DOCUMENT = 2_000
+CHUNK_SIZE = 200
+CHUNK_OVERLAP = 50
+SEPARATORS = ["\n\n", "\n", ". ", " "]
+
+
+def as_prose(words, seed=42):
+    """Cut a word string into sentences, lines and paragraphs of random length"""
+    rng = np.random.default_rng(seed)
+    out = []
+    for word in words.split(" "):
+        out.append(word)
+        roll = rng.random()
+        out.append("\n\n" if roll < 0.01 else "\n" if roll < 0.03 else ". " if roll < 0.1 else " ")
+    return "".join(out[:-1])
+
+
+if __name__ == "__main__":
+    texts = [as_prose(words, seed) for seed, words in
+             enumerate(random_documents(N_DOCUMENTS, WORDS_PER_DOCUMENT))]
+    total_mb = sum(len(text) for text in texts) / 2**20
+
+    print("=" * 60)
+    print(f"RECURSIVE SPLITTING: {N_DOCUMENTS:,} documents, {total_mb:.0f} MB of text")
+    print(f"chunk_size={CHUNK_SIZE}, chunk_overlap={CHUNK_OVERLAP}, separators={SEPARATORS!r}")
+    print("=" * 60)
+
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP, separators=SEPARATORS
+    )
+    start = time.perf_counter()
+    langchain_chunks = [chunk for text in texts for chunk in splitter.split_text(text)]
+    langchain_s = time.perf_counter() - start
+    langchain_mb = sum(sys.getsizeof(chunk) for chunk in langchain_chunks) / 2**20
+
+    documents = [Document(page_content=text) for text in texts]
+    start = time.perf_counter()
+    langchain_documents = splitter.split_documents(documents)
+    documents_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    span_documents = split_documents(documents, CHUNK_SIZE, CHUNK_OVERLAP, SEPARATORS)
+    span_documents_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    spans = ChunkSpans()
+    for text in texts:
+        recursive_spans(text, CHUNK_SIZE, CHUNK_OVERLAP, SEPARATORS, spans=spans)
+    spans_s = time.perf_counter() - start
+
+    print(f"\n{'':>16} {'seconds':>8} {'MB/s':>8} {'chunks':>9} {'result MB':>10}")
+    print(f"{'LangChain':>16} {langchain_s:>8.2f} {total_mb / langchain_s:>8.1f} "
+          f"{len(langchain_chunks):>9,} {langchain_mb:>10.1f}")
+    print(f"{'+ Documents':>16} {documents_s:>8.2f} {total_mb / documents_s:>8.1f}")
+    print(f"{'recursive_spans':>16} {spans_s:>8.2f} {total_mb / spans_s:>8.1f} "
+          f"{len(spans):>9,} {spans.nbytes / 2**20:>10.1f}")
+    print(f"{'+ Documents':>16} {span_documents_s:>8.2f} {total_mb / span_documents_s:>8.1f}")
+    print(f"\nSpeedup: {langchain_s / spans_s:.1f}x splitting, "
+          f"{documents_s / span_documents_s:.1f}x split_documents (Documents on both sides)")
+    print(f"Identical chunks: {list(spans.texts()) == langchain_chunks}, identical Documents: "
+          f"{[d.page_content for d in span_documents] == [d.page_content for d in langchain_documents]}")
@@ -0,0 +1,52 @@
+"""
+Sharded Search Scaling Benchmark
+
+Times batched search on one in-process VectorIndex against
+ShardedVectorIndex with 1, 2, 4, ... worker processes, up to the CPU
+count. Throughput should grow close to linearly with shards until the
+cores (or memory bandwidth) run out.
+"""
+
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from rag_utils.sharded_index import ShardedVectorIndex
+from rag_utils.vector_index import VectorIndex
+from synthetic import clustered_vectors
+
+N_VECTORS = 400_000
+DIM = 768
+N_QUERIES = 256
+TOP_K = 10
+ROUNDS = 5
+
+
+def queries_per_second(search, queries):
+    search(queries, TOP_K)  # warm-up: first request maps the shared memory
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        search(queries, TOP_K)
+    return ROUNDS * len(queries) / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    vectors = clustered_vectors(N_VECTORS, DIM)
+    queries = clustered_vectors(N_QUERIES, DIM, seed=7)
+    ids = [f"doc_{i}" for i in range(N_VECTORS)]
+
+    print("=" * 60)
+    print(f"SHARDED SEARCH: {N_VECTORS:,} vectors, {DIM} dims, {os.cpu_count()} CPUs")
+    print("=" * 60)
+
+    baseline = queries_per_second(VectorIndex(vectors).search_many, queries)
+    print(f"\n{'single process':>16}: {baseline:9,.0f} queries/s")
+
+    n_shards = 1
+    while n_shards <= (os.cpu_count() or 1):
+        with ShardedVectorIndex(DIM, n_shards=n_shards) as index:
+            index.add(ids, vectors)
+            qps = queries_per_second(index.search_many, queries)
+        print(f"{n_shards:>9} shards: {qps:9,.0f} queries/s  ({qps / baseline:.2f}x)")
+        n_shards *= 2
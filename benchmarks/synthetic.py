@@ -0,0 +1,43 @@
+"""
+Synthetic embedding-like data for offline benchmarks
+"""
+
+import numpy as np
+
+
+def clustered_vectors(n, dim, n_clusters=200, noise=0.6, decay=0.0, seed=42):
+    """
+    Points scattered around random centroids - closer to real embeddings
+    than pure noise
+
+    Args:
+        n: Number of vectors
+        dim: Dimensions per vector
+        n_clusters: Number of topics
+        noise: Spread around each centroid
+        decay: > 0 front-loads the signal into the leading dimensions,
+               like text-embedding-3-* (Matryoshka) vectors
+        seed: RNG seed, so runs are comparable
+    """
+    rng = np.random.default_rng(seed)
+    centroids = rng.standard_normal((n_clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, n_clusters, size=n)
+    vectors = centroids[labels] + noise * rng.standard_normal((n, dim)).astype(np.float32)
+    if decay:
+        vectors *= np.exp(-decay * np.arange(dim) / dim).astype(np.float32)
+    return vectors
+
+
+def random_documents(n, words_per_doc=40, vocabulary_size=5000, seed=42):
+    """
+    Pseudo-text documents drawn from a Zipf-like vocabulary
+
+    Enough lexical structure for HashingEmbeddingProvider to produce
+    realistic score distributions, without any dataset download.
+    """
+    rng = np.random.default_rng(seed)
+    vocabulary = np.array([f"w{i:x}" for i in range(vocabulary_size)])
+    ranks = np.arange(1, vocabulary_size + 1)
+    probabilities = (1.0 / ranks) / (1.0 / ranks).sum()
+    words = rng.choice(vocabulary, size=(n, words_per_doc), p=probabilities)
+    return [" ".join(row) for row in words]
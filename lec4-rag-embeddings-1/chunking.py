@@ -1,6 +1,24 @@
 """
 Text Chunking Strategies for RAG Systems
 """
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+# Streaming variants for files too large to load: read in windows, yield lazily
+# Span variants: chunks as (source, start, end) offsets, text sliced on demand
+from rag_utils.chunking import (
+    character_spans,
+    chunk_corpus,
+    paragraph_spans,
+    recursive_spans,
+    sentence_spans,
+    stream_characters,
+    stream_paragraphs,
+    stream_sentences,
+)
+from rag_utils.tokenizers import RegexTokenizer
 
 def chunk_by_characters(text, chunk_size=500, overlap=50):
     """
@@ -9,18 +27,11 @@ def chunk_by_characters(text, chunk_size=500, overlap=50):
     Args:
         text: Input text
         chunk_size: Maximum characters per chunk
-        overlap: Characters to overlap between chunks
+        overlap: Characters to overlap between chunks (must be < chunk_size,
+                 otherwise the next chunk would never move forward)
     """
-    chunks = []
-    start = 0
-    
-    while start < len(text):
-        end = start + chunk_size
-        chunk = text[start:end]
-        chunks.append(chunk)
-        start = end - overlap  # Move back for overlap
-    
-    return chunks
+    # Offsets are computed first, the text is only sliced here
+    return list(character_spans(text, chunk_size, overlap).texts())
 
 
 def chunk_by_sentences(text, sentences_per_chunk=3):
@@ -28,24 +39,16 @@ def chunk_by_sentences(text, sentences_per_chunk=3):
     Split text into chunks by sentence count
     More natural boundaries than character splitting
     """
-    # Simple sentence splitter (production would use NLTK or spaCy)
-    sentences = text.replace('!', '.').replace('?', '.').split('.')
-    sentences = [s.strip() for s in sentences if s.strip()]
-    
-    chunks = []
-    for i in range(0, len(sentences), sentences_per_chunk):
-        chunk = '. '.join(sentences[i:i + sentences_per_chunk]) + '.'
-        chunks.append(chunk)
-    
-    return chunks
+    # Regex scanner: skips "Dr." / "e.g." / initials and decimals like 3.14
+    # (production would use NLTK or spaCy)
+    return list(sentence_spans(text, sentences_per_chunk).texts())
 
 
 def chunk_by_paragraphs(text):
     """
     Split by paragraphs - preserves semantic boundaries
     """
-    paragraphs = text.split('\n\n')
-    return [p.strip() for p in paragraphs if p.strip()]
+    return list(paragraph_spans(text).texts())
 
 # Demo
 if __name__ == "__main__":
@@ -81,4 +84,64 @@ By combining retrieval with generation, we get the best of both worlds. The LLM
     chunks3 = chunk_by_paragraphs(sample_text)
     for i, chunk in enumerate(chunks3, 1):
         print(f"\nChunk {i}:\n{chunk[:150]}...")
-        
\ No newline at end of file
+    
+    print("\n" + "="*60)
+    print("METHOD 4: Streaming from a file (64-character read windows)")
+    print("="*60)
+    # Same chunks, but the file is never loaded whole - works on GB-sized dumps
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False, encoding="utf-8") as f:
+        f.write(sample_text)
+    try:
+        streamed = {
+            "characters": list(stream_characters(f.name, 500, 50, window_size=64)),
+            "sentences": list(stream_sentences(f.name, 2, window_size=64)),
+            "paragraphs": list(stream_paragraphs(f.name, window_size=64)),
+        }
+    finally:
+        os.remove(f.name)
+    for name, chunks, expected in zip(streamed, streamed.values(), (chunks1, chunks2, chunks3)):
+        print(f"{name:>10}: {len(chunks)} chunks, identical to in-memory: {chunks == expected}")
+    
+    print("\n" + "="*60)
+    print("METHOD 5: Span-based chunks (offsets now, text on demand)")
+    print("="*60)
+    # 100 chars with 50 overlap: every character is in two chunks,
+    # but the spans only store offsets into the one sample_text
+    spans = character_spans(sample_text, 100, 50, name="sample.txt")
+    print(f"{len(spans)} chunks in {spans.nbytes} bytes of spans "
+          f"(sliced copies would take {sum(len(t) for t in spans.texts())} characters)")
+    for span in list(spans)[:3]:
+        print(f"\n{span.metadata()}\n{span.text[:60]}...")
+    
+    try:
+        chunk_by_characters(sample_text, 100, 100)
+    except ValueError as error:
+        print(f"\noverlap >= chunk_size is rejected up front: {error}")
+            
+    print("\n" + "="*60)
+    print("METHOD 6: Chunking a corpus on a process pool")
+    print("="*60)
+    # One task per file; results come back in input order every run
+    paragraphs = sample_text.strip().split("\n\n")
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        paths = []
+        for i, paragraph in enumerate(paragraphs):
+            path = os.path.join(corpus_dir, f"doc_{i}.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(paragraph)
+            paths.append(path)
+        for path, spans in zip(paths, chunk_corpus(paths, "sentences", processes=2, sentences_per_chunk=2)):
+            print(f"{os.path.basename(path)}: {len(spans)} chunks, first: {spans.text(0)[:60]}...")
+    
+    print("\n" + "="*60)
+    print("METHOD 7: Token-budget chunking (60 tokens, 10 overlap)")
+    print("="*60)
+    # chunk_size counts model tokens, not characters; each chunk keeps its count
+    tokenizer = RegexTokenizer()
+    spans = recursive_spans(sample_text, 60, 10, tokenizer=tokenizer)
+    for i, chunk in enumerate(spans.texts()):
+        print(f"\nChunk {i + 1} ({spans.token_count(i)} tokens, {len(chunk)} chars, "
+              f"len // 4 guesses {len(chunk) // 4}):\n{chunk[:100]}...")
+    stored = list(spans.token_counts())
+    print(f"\nStored counts match tokenizer.count(chunk): "
+          f"{stored == [tokenizer.count(chunk) for chunk in spans.texts()]}")
@@ -5,18 +5,26 @@ How we measure similarity between embeddings
 
 import numpy as np
 import os
+import sys
 from dotenv import load_dotenv
 from openai import OpenAI
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from rag_utils.embeddings import embed_text, embed_texts
+from rag_utils.providers import DEFAULT_MODEL, provider_from_env
+from rag_utils.similarity import similarity_matrix
+
 load_dotenv()
 
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
-def get_embedding(text, model="text-embedding-3-small"):
-    """Generate embedding for text"""
-    text = text.replace("\n", " ").strip()
-    response = client.embeddings.create(input=[text], model=model)
-    return response.data[0].embedding
+# OpenAI by default, EMBEDDING_PROVIDER=local embeds offline
+embedder = provider_from_env(client)
+
+def get_embedding(text, model="text-embedding-3-small", dimensions=None):
+    """Generate embedding for text (optionally shortened to dimensions)"""
+    provider = embedder if model == DEFAULT_MODEL else provider_from_env(client, model)
+    return embed_text(text, provider, dimensions=dimensions)
 
 
 def cosine_similarity(vec1, vec2):
@@ -177,8 +185,12 @@ if __name__ == "__main__":
     
     print("\nComputing similarity matrix for words...\n")
     
-    # Generate all embeddings
-    embeddings = [get_embedding(s) for s in test_sentences]
+    # Generate all embeddings in one batched request
+    embeddings = embed_texts(test_sentences, embedder)
+    
+    # All pairs at once: norms computed once, then one (tiled) matrix product
+    # instead of len(test_sentences)**2 calls to cosine_similarity
+    similarities = similarity_matrix(embeddings)
     
     # Print header
     print(f"{'':10}", end="")
@@ -191,6 +203,5 @@ if __name__ == "__main__":
     for i, s1 in enumerate(test_sentences):
         print(f"{s1:10}", end="")
         for j, s2 in enumerate(test_sentences):
-            sim = cosine_similarity(embeddings[i], embeddings[j])
-            print(f"{sim:10.3f}", end="")
+            print(f"{similarities[i, j]:10.3f}", end="")
         print()
@@ -5,37 +5,36 @@ This demo shows how to generate and inspect embeddings
 
 import numpy as np
 import os
+import sys
 from dotenv import load_dotenv
 from openai import OpenAI
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from rag_utils.embeddings import embed_text
+from rag_utils.providers import DEFAULT_MODEL, provider_from_env
+
 load_dotenv()
 
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
-def get_embedding(text, model="text-embedding-3-small"):
+# OpenAI by default, EMBEDDING_PROVIDER=local embeds offline
+embedder = provider_from_env(client)
+
+def get_embedding(text, model="text-embedding-3-small", dimensions=None):
     """
-    Generate embedding for text using OpenAI API
+    Generate embedding for text (OpenAI API, or offline with EMBEDDING_PROVIDER=local)
     
     Args:
         text: Input text string
         model: Embedding model to use
+        dimensions: Optional shorter output size (text-embedding-3-* only)
     
     Returns:
-        List of floats (the embedding vector)
+        float32 NumPy vector (the embedding)
     """
-    # Clean the text
-    text = text.replace("\n", " ").strip()
-    
-    # Call API
-    response = client.embeddings.create(
-        input=[text],
-        model=model
-    )
-    
-    # Extract embedding from response
-    embedding = response.data[0].embedding
-    
-    return embedding
+    # Cleans the text and calls the API as a one-item batch
+    provider = embedder if model == DEFAULT_MODEL else provider_from_env(client, model)
+    return embed_text(text, provider, dimensions=dimensions)
 
 
 # Demo
@@ -5,32 +5,38 @@ This demonstrates the CONCEPT without vector databases.
 Next session: Full implementation with vector DBs.
 """
 
-import numpy as np
 import os
+import sys
 from dotenv import load_dotenv
 from openai import OpenAI
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from rag_utils.embeddings import embed_text
+from rag_utils.embedding_cache import EmbeddingCache
+from rag_utils.providers import provider_from_env
+from rag_utils.vector_index import VectorIndex
+
 load_dotenv()
 
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
-def get_embedding(text):
-    """Generate embedding"""
-    response = client.embeddings.create(
-        input=[text.replace("\n", " ")],
-        model="text-embedding-3-small"
-    )
-    return response.data[0].embedding
+# OpenAI by default, EMBEDDING_PROVIDER=local embeds offline
+embedder = provider_from_env(client)
+
+# Survives restarts - unchanged texts are never re-embedded
+embedding_cache = EmbeddingCache("embedding_cache.sqlite3")
 
-def cosine_similarity(vec1, vec2):
-    """Calculate similarity"""
-    vec1, vec2 = np.array(vec1), np.array(vec2)
-    return np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2))
+def get_embedding(text, dimensions=None):
+    """Generate embedding"""
+    return embed_text(text, embedder, dimensions=dimensions, cache=embedding_cache)
 
-def simple_rag_query(query, documents, top_k=2):
+def simple_rag_query(query, index, top_k=2):
     """
     Simple RAG: Query documents and generate answer
     
+    The index is built ONCE (see VectorIndex) - a query only embeds
+    the question and scores every document with one matrix product.
+    
     This is a CONCEPTUAL implementation.
     Next session: Production-ready with vector databases!
     """
@@ -45,17 +51,11 @@ def simple_rag_query(query, documents, top_k=2):
     print(f"✓ Query embedding generated ({len(query_embedding)} dimensions)")
     
     # STEP 2: FIND SIMILAR DOCUMENTS
-    print(f"\n[Step 2] Searching {len(documents)} documents...")
+    print(f"\n[Step 2] Searching {len(index)} documents...")
     
-    similarities = []
-    for doc in documents:
-        doc_embedding = get_embedding(doc)
-        similarity = cosine_similarity(query_embedding, doc_embedding)
-        similarities.append((doc, similarity))
-    
-    # Sort by similarity
-    similarities.sort(key=lambda x: x[1], reverse=True)
-    top_results = similarities[:top_k]
+    # Cosine similarity against every document at once, top-k via argpartition
+    positions, scores = index.search(query_embedding, top_k)
+    top_results = [(index.documents[i], score) for i, score in zip(positions, scores)]
     
     print(f"✓ Found {top_k} most relevant documents:")
     for i, (doc, score) in enumerate(top_results, 1):
@@ -107,8 +107,8 @@ if __name__ == "__main__":
 This demonstrates the RAG concept flow:
   Query → Embed → Search → Retrieve → Generate
 
-Note: This generates embeddings on-the-fly.
-Next session: Store embeddings in vector databases for efficiency!
+Note: Documents are embedded once into an in-memory index.
+Next session: Store embeddings in vector databases for persistence!
     """)
     
     # Sample knowledge base
@@ -131,7 +131,10 @@ Next session: Store embeddings in vector databases for efficiency!
         "Tell me about the equipment budget"
     ]
     
+    # Embed the knowledge base once - every query reuses it
+    index = VectorIndex.from_texts(knowledge_base, embedder, cache=embedding_cache)
+    
     for query in queries:
-        simple_rag_query(query, knowledge_base, top_k=2)
+        simple_rag_query(query, index, top_k=2)
         print("\n")
     
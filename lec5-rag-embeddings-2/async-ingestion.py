@@ -0,0 +1,83 @@
+import asyncio
+import os
+import sys
+from dotenv import load_dotenv
+from openai import AsyncOpenAI
+import chromadb
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from rag_utils.async_embeddings import AsyncEmbeddingPipeline
+from rag_utils.embedding_cache import EmbeddingCache
+
+load_dotenv()
+
+client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+chroma_client = chromadb.Client()
+
+# Survives restarts - unchanged texts are never re-embedded
+embedding_cache = EmbeddingCache("embedding_cache.sqlite3")
+
+# Create a collection (like a table in SQL)
+collection = chroma_client.create_collection(
+    name="documentation",
+    metadata={"description": "Product documentation embeddings"}
+)
+
+# Sample documentation
+documents = [
+    "To reset your password, go to Settings > Security > Change Password. Enter your current password and then your new password twice.",
+    "You can update your email address in the Account section. Click on Profile, then Edit Email, and verify the change via the confirmation link.",
+    "To delete your account, navigate to Settings > Privacy > Delete Account. This action is permanent and cannot be undone.",
+    "Enable two-factor authentication in Security settings. You'll need a mobile app like Google Authenticator or Authy.",
+    "Export your data by going to Settings > Data & Privacy > Download Data. Processing may take up to 48 hours.",
+    "Change your username in Profile settings. Note that usernames must be unique and can only be changed once every 30 days.",
+    "To recover a deleted item, check your Trash folder within 30 days. After 30 days, items are permanently removed.",
+    "Manage notification preferences in Settings > Notifications. You can customize alerts for email, push, and SMS."
+]
+
+# Metadata for each document
+metadata = [
+    {"category": "security", "topic": "password"},
+    {"category": "account", "topic": "email"},
+    {"category": "account", "topic": "deletion"},
+    {"category": "security", "topic": "2fa"},
+    {"category": "privacy", "topic": "data-export"},
+    {"category": "account", "topic": "username"},
+    {"category": "recovery", "topic": "trash"},
+    {"category": "settings", "topic": "notifications"}
+]
+
+async def ingest():
+    """
+    Embed the corpus with several batch requests in flight.
+    Set the limits to your account tier - the pipeline paces itself
+    and backs off on 429s instead of failing.
+    """
+    pipeline = AsyncEmbeddingPipeline(
+        client,
+        concurrency=4,
+        requests_per_minute=500,
+        tokens_per_minute=1_000_000,
+        max_items=2,  # Tiny batches so this small corpus shows concurrency
+        cache=embedding_cache,
+        on_progress=lambda stats: print(f"  {stats}")
+    )
+    
+    # Store each batch as soon as it arrives instead of waiting for all
+    async for positions, vectors in pipeline.iter_embeddings(documents):
+        collection.add(
+            embeddings=vectors,
+            documents=[documents[i] for i in positions],
+            metadatas=[metadata[i] for i in positions],
+            ids=[f"doc_{i}" for i in positions]
+        )
+    
+    return pipeline.stats
+
+print("Generating embeddings asynchronously and storing documents...")
+
+stats = asyncio.run(ingest())
+
+print(f"\n✓ Stored {collection.count()} documents in vector database!")
+print(f"⏱️  {stats.elapsed:.2f}s, {stats.requests} requests, "
+      f"{stats.cached_texts} served from cache, {stats.rate_limited} rate limited")
@@ -0,0 +1,99 @@
+import os
+import sys
+from dotenv import load_dotenv
+from openai import OpenAI
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from rag_utils.embedding_cache import EmbeddingCache
+from rag_utils.faiss_store import FaissVectorStore
+from rag_utils.providers import provider_from_env
+
+load_dotenv()
+
+client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+# OpenAI by default, EMBEDDING_PROVIDER=local embeds offline
+embedder = provider_from_env(client)
+
+# Survives restarts - unchanged texts are never re-embedded
+embedding_cache = EmbeddingCache("embedding_cache.sqlite3")
+
+# Same documents as the Chroma demos - only the vector store changes
+documents = [
+    "To reset your password, go to Settings > Security > Change Password. Enter your current password and then your new password twice.",
+    "You can update your email address in the Account section. Click on Profile, then Edit Email, and verify the change via the confirmation link.",
+    "To delete your account, navigate to Settings > Privacy > Delete Account. This action is permanent and cannot be undone.",
+    "Enable two-factor authentication in Security settings. You'll need a mobile app like Google Authenticator or Authy.",
+    "Export your data by going to Settings > Data & Privacy > Download Data. Processing may take up to 48 hours.",
+    "Change your username in Profile settings. Note that usernames must be unique and can only be changed once every 30 days.",
+    "To recover a deleted item, check your Trash folder within 30 days. After 30 days, items are permanently removed.",
+    "Manage notification preferences in Settings > Notifications. You can customize alerts for email, push, and SMS."
+]
+
+# Metadata for each document
+metadata = [
+    {"category": "security", "topic": "password"},
+    {"category": "account", "topic": "email"},
+    {"category": "account", "topic": "deletion"},
+    {"category": "security", "topic": "2fa"},
+    {"category": "privacy", "topic": "data-export"},
+    {"category": "account", "topic": "username"},
+    {"category": "recovery", "topic": "trash"},
+    {"category": "settings", "topic": "notifications"}
+]
+
+# "flat" = exact search. Try "hnsw" for millions of vectors,
+# or "ivf" when build time and memory matter more than recall.
+store = FaissVectorStore(
+    dim=1536,
+    embedder=embedder,
+    index_type="hnsw",
+    n_threads=4,
+    cache=embedding_cache
+)
+
+print("Generating embeddings and storing documents...")
+store.add(
+    documents=documents,
+    metadatas=metadata,
+    ids=[f"doc_{i}" for i in range(len(documents))]
+)
+print(f"✓ Stored {store.count()} documents in FAISS ({store.index_type})!")
+
+# Save to disk and load it back - no re-embedding on the next start
+store.save("faiss_store")
+store = FaissVectorStore.load("faiss_store", embedder=embedder, cache=embedding_cache)
+print("✓ Saved and reloaded from ./faiss_store")
+
+print("\n" + "="*60)
+print("FAISS SEARCH DEMO")
+print("="*60)
+
+query = "How do I change my settings?"
+print(f"\n🔍 Query: '{query}'")
+
+print("\n📋 Without filtering (searches everything):")
+results = store.semantic_search(query, n_results=3)
+for doc, meta, distance in zip(results['documents'][0], results['metadatas'][0], results['distances'][0]):
+    print(f"  - ({1 - distance:.3f}) [{meta['category']}] {doc[:60]}...")
+
+print("\n🔒 With filtering (only 'security' category):")
+results = store.filtered_search(query, category="security", n_results=3)
+for doc, meta, distance in zip(results['documents'][0], results['metadatas'][0], results['distances'][0]):
+    print(f"  - ({1 - distance:.3f}) [{meta['category']}] {doc[:60]}...")
+
+print("\n✏️  Updating and deleting documents:")
+# Same id = replace; the old version is tombstoned, not rebuilt
+store.upsert(
+    documents=["To reset your password, open Settings > Security > Reset Password and follow the emailed link."],
+    metadatas=[{"category": "security", "topic": "password"}],
+    ids=["doc_0"]
+)
+store.delete(ids=["doc_6"])
+print(f"  {store.count()} live documents, {store.tombstone_ratio():.0%} of FAISS rows are tombstones")
+store.wait_for_compaction()
+print(f"  after compaction: {store.tombstone_ratio():.0%} tombstones")
+
+results = store.semantic_search("I forgot my password", n_results=2)
+for doc, meta in zip(results['documents'][0], results['metadatas'][0]):
+    print(f"  - [{meta['category']}] {doc[:60]}...")
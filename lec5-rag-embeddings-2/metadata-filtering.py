@@ -1,32 +1,55 @@
 import os
+import sys
 from dotenv import load_dotenv
 from openai import OpenAI
-import chromadb
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from rag_utils.embeddings import embed_text
+from rag_utils.embedding_cache import EmbeddingCache
+from rag_utils.metadata_index import DEFAULT_BRUTE_FORCE_SELECTIVITY, MetadataIndex
+from rag_utils.persistent_collection import PersistentCollection
+from rag_utils.providers import provider_from_env
+from rag_utils.query_cache import QueryEmbeddingCache
 
 load_dotenv()
 
+# Data files live next to the script, whatever the working directory
+HERE = os.path.dirname(os.path.abspath(__file__))
+
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-chroma_client = chromadb.Client()
 
-# Create a collection (like a table in SQL)
-collection = chroma_client.create_collection(
-    name="documentation",
-    metadata={"description": "Product documentation embeddings"}
+# OpenAI by default, EMBEDDING_PROVIDER=local embeds offline
+embedder = provider_from_env(client)
+
+# Survives restarts - unchanged texts are never re-embedded
+embedding_cache = EmbeddingCache(os.path.join(HERE, "embedding_cache.sqlite3"))
+
+# Repeated questions skip the embedding call entirely
+query_cache = QueryEmbeddingCache(maxsize=1024, ttl=3600)
+
+# Get or create a collection on disk (like a table in SQL). Each demo
+# has its own, so their documents and metadata never overwrite each other.
+# Restarts only embed documents that are new or changed.
+store = PersistentCollection(
+    path=os.path.join(HERE, "chroma_db"),
+    name="documentation-filtering",
+    embedder=embedder,
+    metadata={"description": "Product documentation embeddings"},
+    cache=embedding_cache
 )
+collection = store.collection
 
-def get_embedding(text, model="text-embedding-3-small"):
-    """Generate embedding for a piece of text."""
-    text = text.replace("\n", " ")
-    response = client.embeddings.create(
-        input=[text],
-        model=model
-    )
-    return response.data[0].embedding
+def get_embedding(text, dimensions=None):
+    """
+    Generate embedding for a piece of text.
+    dimensions shortens text-embedding-3-* vectors (e.g. 512 instead of 1536).
+    """
+    return embed_text(text, embedder, dimensions=dimensions, cache=embedding_cache)
 
 def semantic_search(query, n_results=3):
     """Search for documents similar to the query."""
     # Generate embedding for the query
-    query_embedding = get_embedding(query)
+    query_embedding = query_cache.get_or_embed(query, get_embedding)
     
     # Search in vector database
     results = collection.query(
@@ -36,15 +59,36 @@ def semantic_search(query, n_results=3):
     
     return results
 
-def filtered_search(query: str, category: str = None, n_results: int = 3):
+def filtered_search(query: str, category: str = None, n_results: int = 3, where: dict = None):
     """
     Search with metadata filtering.
     Only retrieve from specific categories.
+
+    where takes compound filters too, e.g.
+    {"$or": [{"category": "security"}, {"topic": {"$in": ["email", "username"]}}]}
     """
-    query_embedding = get_embedding(query)
+    query_embedding = query_cache.get_or_embed(query, get_embedding)
     
     # Build where filter
     where_filter = {"category": category} if category else None
+    if where:
+        where_filter = {"$and": [where_filter, where]} if where_filter else where
+    if where_filter is None:
+        return semantic_search(query, n_results=n_results)
+
+    # Pre-filter: resolve the filter against the in-memory bitmaps first.
+    # A narrow filter becomes an explicit id list (exact scan of a few
+    # vectors), a broad one is left to Chroma's filtered HNSW search.
+    mask = metadata_index.compile(where_filter)
+    if mask.sum() <= DEFAULT_BRUTE_FORCE_SELECTIVITY * len(mask):
+        matching_ids = [doc_ids[i] for i in mask.nonzero()[0]]
+        if not matching_ids:
+            return {"ids": [[]], "documents": [[]], "metadatas": [[]], "distances": [[]]}
+        return collection.query(
+            query_embeddings=[query_embedding],
+            n_results=min(n_results, len(matching_ids)),
+            ids=matching_ids
+        )
     
     results = collection.query(
         query_embeddings=[query_embedding],
@@ -80,18 +124,21 @@ metadata = [
 
 print("Generating embeddings and storing documents...")
 
-# Generate embeddings for all documents
-embeddings = [get_embedding(doc) for doc in documents]
-
-# Store in vector database
-collection.add(
-    embeddings=embeddings,
+# Embed and upsert only new/changed documents (in bounded batches),
+# delete documents that are no longer in the list
+doc_ids = [f"doc_{i}" for i in range(len(documents))]
+changes = store.sync(
     documents=documents,
-    metadatas=metadata,
-    ids=[f"doc_{i}" for i in range(len(documents))]
+    ids=doc_ids,
+    metadatas=metadata
 )
 
-print(f"✓ Stored {len(documents)} documents in vector database!")
+# Bitmap per (key, value) so filters are resolved before the vector search
+metadata_index = MetadataIndex(metadata)
+
+print(f"✓ Stored {len(documents)} documents in vector database! "
+      f"({changes['added']} added, {changes['updated']} updated, "
+      f"{changes['deleted']} deleted, {changes['unchanged']} unchanged)")
 
 # Demo
 print("\n" + "="*60)
@@ -112,4 +159,11 @@ security_results = filtered_search(query, category="security", n_results=3)
 for doc, meta in zip(security_results['documents'][0], security_results['metadatas'][0]):
     print(f"  - [{meta['category']}] {doc[:60]}...")
 
+print("\n🔀 Compound filter (security OR email/username topics):")
+compound_results = filtered_search(query, n_results=3, where={
+    "$or": [{"category": "security"}, {"topic": {"$in": ["email", "username"]}}]
+})
+for doc, meta in zip(compound_results['documents'][0], compound_results['metadatas'][0]):
+    print(f"  - [{meta['category']}/{meta['topic']}] {doc[:60]}...")
+
 print("\n💡 Filtering helps when user context narrows the domain!")
\ No newline at end of file
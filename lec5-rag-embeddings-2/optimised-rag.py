@@ -1,32 +1,59 @@
 import os
+import sys
 from dotenv import load_dotenv
 from openai import OpenAI
-import chromadb
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from rag_utils.embeddings import embed_text
+from rag_utils.embedding_cache import EmbeddingCache
+from rag_utils.persistent_collection import PersistentCollection
+from rag_utils.providers import provider_from_env
+from rag_utils.query_cache import QueryEmbeddingCache
+from rag_utils.tokenizers import tokenizer_from_env
 
 load_dotenv()
 
+# Data files live next to the script, whatever the working directory
+HERE = os.path.dirname(os.path.abspath(__file__))
+
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-chroma_client = chromadb.Client()
 
-# Create a collection (like a table in SQL)
-collection = chroma_client.create_collection(
-    name="documentation",
-    metadata={"description": "Product documentation embeddings"}
+# OpenAI by default, EMBEDDING_PROVIDER=local embeds offline
+embedder = provider_from_env(client)
+
+# Survives restarts - unchanged texts are never re-embedded
+embedding_cache = EmbeddingCache(os.path.join(HERE, "embedding_cache.sqlite3"))
+
+# Repeated questions skip the embedding call entirely
+query_cache = QueryEmbeddingCache(maxsize=1024, ttl=3600)
+
+# Token counts for the context budget: exact with tiktoken when it is
+# installed, the offline approximation otherwise (TOKENIZER=local|tiktoken)
+tokenizer = tokenizer_from_env()
+
+# Get or create a collection on disk (like a table in SQL). Each demo
+# has its own, so their documents and metadata never overwrite each other.
+# Restarts only embed documents that are new or changed.
+store = PersistentCollection(
+    path=os.path.join(HERE, "chroma_db"),
+    name="documentation-optimised",
+    embedder=embedder,
+    metadata={"description": "Product documentation embeddings"},
+    cache=embedding_cache
 )
+collection = store.collection
 
-def get_embedding(text, model="text-embedding-3-small"):
-    """Generate embedding for a piece of text."""
-    text = text.replace("\n", " ")
-    response = client.embeddings.create(
-        input=[text],
-        model=model
-    )
-    return response.data[0].embedding
+def get_embedding(text, dimensions=None):
+    """
+    Generate embedding for a piece of text.
+    dimensions shortens text-embedding-3-* vectors (e.g. 512 instead of 1536).
+    """
+    return embed_text(text, embedder, dimensions=dimensions, cache=embedding_cache)
 
 def semantic_search(query, n_results=3):
     """Search for documents similar to the query."""
     # Generate embedding for the query
-    query_embedding = get_embedding(query)
+    query_embedding = query_cache.get_or_embed(query, get_embedding)
     
     # Search in vector database
     results = collection.query(
@@ -60,20 +87,23 @@ metadata = [
     {"category": "settings", "topic": "notifications"}
 ]
 
-print("Generating embeddings and storing documents...")
+# Token count stored with each document, so budgeting never re-tokenizes
+for doc, meta in zip(documents, metadata):
+    meta["tokens"] = tokenizer.count(doc)
 
-# Generate embeddings for all documents
-embeddings = [get_embedding(doc) for doc in documents]
+print("Generating embeddings and storing documents...")
 
-# Store in vector database
-collection.add(
-    embeddings=embeddings,
+# Embed and upsert only new/changed documents (in bounded batches),
+# delete documents that are no longer in the list
+changes = store.sync(
     documents=documents,
-    metadatas=metadata,
-    ids=[f"doc_{i}" for i in range(len(documents))]
+    ids=[f"doc_{i}" for i in range(len(documents))],
+    metadatas=metadata
 )
 
-print(f"✓ Stored {len(documents)} documents in vector database!")
+print(f"✓ Stored {len(documents)} documents in vector database! "
+      f"({changes['added']} added, {changes['updated']} updated, "
+      f"{changes['deleted']} deleted, {changes['unchanged']} unchanged)")
 
 def optimized_rag(user_question: str, max_context_tokens: int = 2000):
     """
@@ -85,7 +115,7 @@ def optimized_rag(user_question: str, max_context_tokens: int = 2000):
     
     # Rank by similarity (distance)
     ranked_docs = sorted(
-        zip(results['documents'][0], results['distances'][0]),
+        zip(results['documents'][0], results['distances'][0], results['metadatas'][0]),
         key=lambda x: x[1]  # Lower distance = higher similarity
     )
     
@@ -93,18 +123,23 @@ def optimized_rag(user_question: str, max_context_tokens: int = 2000):
     selected_docs = []
     total_tokens = 0
     
-    for doc, distance in ranked_docs:
-        # Rough token estimate (1 token ≈ 4 characters)
-        doc_tokens = len(doc) // 4
+    for doc, distance, meta in ranked_docs:
+        similarity = store.similarity(distance)
+        # Stored count + the "[Relevance: ...] " label and "\n\n" separator
+        # it is wrapped in below (both memoized by the tokenizer)
+        doc_tokens = (meta or {}).get("tokens") or tokenizer.count(doc)
+        doc_tokens += tokenizer.count(f"[Relevance: {similarity:.2f}] ")
+        if selected_docs:
+            doc_tokens += tokenizer.count("\n\n")
         
+        # Counts are accurate, so keep going: a shorter, lower-ranked doc
+        # may still fill the rest of the budget
         if total_tokens + doc_tokens <= max_context_tokens:
             selected_docs.append({
                 'text': doc,
-                'similarity': 1 - distance
+                'similarity': similarity
             })
             total_tokens += doc_tokens
-        else:
-            break
     
     print(f"📊 Retrieved {len(ranked_docs)} candidates")
     print(f"✂️  Selected {len(selected_docs)} docs ({total_tokens} tokens)")
@@ -1,32 +1,60 @@
 import os
+import sys
 from dotenv import load_dotenv
 from openai import OpenAI
-import chromadb
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from rag_utils.embeddings import embed_text
+from rag_utils.embedding_cache import EmbeddingCache
+from rag_utils.hybrid import BM25Index, reciprocal_rank_fusion
+from rag_utils.persistent_collection import PersistentCollection
+from rag_utils.providers import provider_from_env
+from rag_utils.query_cache import QueryEmbeddingCache
 
 load_dotenv()
 
+# Data files live next to the script, whatever the working directory
+HERE = os.path.dirname(os.path.abspath(__file__))
+
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-chroma_client = chromadb.Client()
 
-# Create a collection (like a table in SQL)
-collection = chroma_client.create_collection(
-    name="documentation",
-    metadata={"description": "Product documentation embeddings"}
+# OpenAI by default, EMBEDDING_PROVIDER=local embeds offline
+embedder = provider_from_env(client)
+
+# Survives restarts - unchanged texts are never re-embedded
+embedding_cache = EmbeddingCache(os.path.join(HERE, "embedding_cache.sqlite3"))
+
+# Repeated questions skip the embedding call entirely
+query_cache = QueryEmbeddingCache(maxsize=1024, ttl=3600)
+
+# Keyword (BM25) index over the same documents and ids - catches exact
+# terms like error codes and product names that embeddings blur
+keyword_index = BM25Index()
+
+# Get or create a collection on disk (like a table in SQL). Each demo
+# has its own, so their documents and metadata never overwrite each other.
+# Restarts only embed documents that are new or changed.
+store = PersistentCollection(
+    path=os.path.join(HERE, "chroma_db"),
+    name="documentation-pipeline",
+    embedder=embedder,
+    metadata={"description": "Product documentation embeddings"},
+    cache=embedding_cache,
+    keyword_index=keyword_index
 )
+collection = store.collection
 
-def get_embedding(text, model="text-embedding-3-small"):
-    """Generate embedding for a piece of text."""
-    text = text.replace("\n", " ")
-    response = client.embeddings.create(
-        input=[text],
-        model=model
-    )
-    return response.data[0].embedding
+def get_embedding(text, dimensions=None):
+    """
+    Generate embedding for a piece of text.
+    dimensions shortens text-embedding-3-* vectors (e.g. 512 instead of 1536).
+    """
+    return embed_text(text, embedder, dimensions=dimensions, cache=embedding_cache)
 
 def semantic_search(query, n_results=3):
     """Search for documents similar to the query."""
     # Generate embedding for the query
-    query_embedding = get_embedding(query)
+    query_embedding = query_cache.get_or_embed(query, get_embedding)
     
     # Search in vector database
     results = collection.query(
@@ -36,6 +64,28 @@ def semantic_search(query, n_results=3):
     
     return results
 
+def hybrid_search(query, n_results=3, candidates=10):
+    """
+    Keyword + semantic search, fused by reciprocal rank.
+    Each retriever returns its top candidates; documents ranked well by
+    either (or both) come out on top.
+    """
+    vector_ids = semantic_search(query, n_results=candidates)['ids'][0]
+    keyword_ids, _ = keyword_index.search(query, top_k=candidates)
+    fused = reciprocal_rank_fusion([vector_ids, keyword_ids], top_k=n_results)
+    
+    # Keyword-only hits were not in the vector results, fetch them by id
+    ids = [doc_id for doc_id, _ in fused]
+    records = collection.get(ids=ids, include=["documents", "metadatas"])
+    by_id = dict(zip(records['ids'], zip(records['documents'], records['metadatas'])))
+    
+    return {
+        "ids": [ids],
+        "documents": [[by_id[doc_id][0] for doc_id in ids]],
+        "metadatas": [[by_id[doc_id][1] for doc_id in ids]],
+        "scores": [[score for _, score in fused]]
+    }
+
 # Sample documentation
 documents = [
     "To reset your password, go to Settings > Security > Change Password. Enter your current password and then your new password twice.",
@@ -62,18 +112,17 @@ metadata = [
 
 print("Generating embeddings and storing documents...")
 
-# Generate embeddings for all documents
-embeddings = [get_embedding(doc) for doc in documents]
-
-# Store in vector database
-collection.add(
-    embeddings=embeddings,
+# Embed and upsert only new/changed documents (in bounded batches),
+# delete documents that are no longer in the list
+changes = store.sync(
     documents=documents,
-    metadatas=metadata,
-    ids=[f"doc_{i}" for i in range(len(documents))]
+    ids=[f"doc_{i}" for i in range(len(documents))],
+    metadatas=metadata
 )
 
-print(f"✓ Stored {len(documents)} documents in vector database!")
+print(f"✓ Stored {len(documents)} documents in vector database! "
+      f"({changes['added']} added, {changes['updated']} updated, "
+      f"{changes['deleted']} deleted, {changes['unchanged']} unchanged)")
 
 def rag_query(user_question, n_results=3):
     """
@@ -87,7 +136,7 @@ def rag_query(user_question, n_results=3):
     
     # Step 1 & 2: Embed and retrieve
     print(f"🔍 Searching knowledge base for: '{user_question}'")
-    results = semantic_search(user_question, n_results=n_results)
+    results = hybrid_search(user_question, n_results=n_results)
     
     # Step 3: Build context from retrieved documents
     context_docs = results['documents'][0]
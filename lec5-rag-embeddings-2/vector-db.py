@@ -1,29 +1,62 @@
 import os
+import sys
 from dotenv import load_dotenv
 from openai import OpenAI
-import chromadb
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from rag_utils.embeddings import embed_text, embed_texts
+from rag_utils.embedding_cache import EmbeddingCache
+from rag_utils.persistent_collection import PersistentCollection
+from rag_utils.providers import provider_from_env
+from rag_utils.query_cache import QueryEmbeddingCache
 
 load_dotenv()
 
+# Data files live next to the script, whatever the working directory
+HERE = os.path.dirname(os.path.abspath(__file__))
+
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-chroma_client = chromadb.Client()
 
-# Create a collection (like a table in SQL)
-collection = chroma_client.create_collection(
-    name="documentation",
-    metadata={"description": "Product documentation embeddings"}
+# OpenAI by default, EMBEDDING_PROVIDER=local embeds offline
+embedder = provider_from_env(client)
+
+# Survives restarts - unchanged texts are never re-embedded
+embedding_cache = EmbeddingCache(os.path.join(HERE, "embedding_cache.sqlite3"))
+
+# Repeated questions skip the embedding call entirely
+query_cache = QueryEmbeddingCache(maxsize=1024, ttl=3600)
+
+# Get or create a collection on disk (like a table in SQL). Each demo
+# has its own, so their documents and metadata never overwrite each other.
+# Restarts only embed documents that are new or changed.
+# HNSW settings: cosine space so "1 - distance" really is similarity;
+# hnsw_m / ef_construction / ef_search trade recall for memory and latency
+# (benchmarks/hnsw-tuning.py sweeps them).
+store = PersistentCollection(
+    path=os.path.join(HERE, "chroma_db"),
+    name="documentation-vector-db",
+    embedder=embedder,
+    metadata={"description": "Product documentation embeddings"},
+    cache=embedding_cache,
+    space="cosine",
+    hnsw_m=16,
+    ef_construction=100,
+    ef_search=50
 )
+collection = store.collection
 
 print("✓ Vector database initialized!")
 
-def get_embedding(text, model="text-embedding-3-small"):
-    """Generate embedding for a piece of text."""
-    text = text.replace("\n", " ")
-    response = client.embeddings.create(
-        input=[text],
-        model=model
-    )
-    return response.data[0].embedding
+def get_embedding(text, dimensions=None):
+    """
+    Generate embedding for a piece of text.
+    dimensions shortens text-embedding-3-* vectors (e.g. 512 instead of 1536).
+    """
+    return embed_text(text, embedder, dimensions=dimensions, cache=embedding_cache)
+
+def get_embeddings(texts, dimensions=None):
+    """Embed many texts in as few API requests as possible."""
+    return embed_texts(texts, embedder, dimensions=dimensions, cache=embedding_cache)
 
 # Test it
 sample_text = "How do I reset my password?"
@@ -57,23 +90,22 @@ metadata = [
 
 print("Generating embeddings and storing documents...")
 
-# Generate embeddings for all documents
-embeddings = [get_embedding(doc) for doc in documents]
-
-# Store in vector database
-collection.add(
-    embeddings=embeddings,
+# Embed and upsert only new/changed documents (in bounded batches),
+# delete documents that are no longer in the list
+changes = store.sync(
     documents=documents,
-    metadatas=metadata,
-    ids=[f"doc_{i}" for i in range(len(documents))]
+    ids=[f"doc_{i}" for i in range(len(documents))],
+    metadatas=metadata
 )
 
-print(f"✓ Stored {len(documents)} documents in vector database!")
+print(f"✓ Stored {len(documents)} documents in vector database! "
+      f"({changes['added']} added, {changes['updated']} updated, "
+      f"{changes['deleted']} deleted, {changes['unchanged']} unchanged)")
 
 def semantic_search(query, n_results=3):
     """Search for documents similar to the query."""
     # Generate embedding for the query
-    query_embedding = get_embedding(query)
+    query_embedding = query_cache.get_or_embed(query, get_embedding)
     
     # Search in vector database
     results = collection.query(
@@ -83,6 +115,16 @@ def semantic_search(query, n_results=3):
     
     return results
 
+def semantic_search_many(queries, n_results=3, where=None):
+    """
+    Search for many queries at once.
+    One embedding request for all (uncached) queries and one vectorized
+    collection.query - instead of one of each per query.
+    Returns Chroma-shaped results with one entry per query, in order.
+    """
+    query_embeddings = query_cache.get_or_embed_many(queries, get_embeddings)
+    return store.query_many(query_embeddings, n_results=n_results, where=where)
+
 # Test queries
 test_queries = [
     "How can I change my login credentials?",  # Should find password doc
@@ -94,17 +136,18 @@ print("\n" + "="*60)
 print("SEMANTIC SEARCH DEMO")
 print("="*60)
 
-for query in test_queries:
+# All test queries in one embedding request and one search call
+all_results = semantic_search_many(test_queries, n_results=2)
+
+for q, query in enumerate(test_queries):
     print(f"\n🔍 Query: '{query}'")
     print("-" * 60)
     
-    results = semantic_search(query, n_results=2)
-    
     for i, (doc, metadata, distance) in enumerate(zip(
-        results['documents'][0],
-        results['metadatas'][0],
-        results['distances'][0]
+        all_results['documents'][q],
+        all_results['metadatas'][q],
+        all_results['distances'][q]
     ), 1):
-        print(f"\nResult {i} (similarity: {1 - distance:.3f}):")
+        print(f"\nResult {i} (similarity: {store.similarity(distance):.3f}):")
         print(f"Category: {metadata['category']} | Topic: {metadata['topic']}")
         print(f"Content: {doc[:100]}...")
@@ -3,10 +3,13 @@ from langchain.prompts import ChatPromptTemplate
 from langchain.schema.output_parser import StrOutputParser
 from langchain.schema.runnable import RunnablePassthrough
 from langchain_community.vectorstores import Chroma
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 import os
+import sys
 from dotenv import load_dotenv
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from rag_utils.chunking import split_documents
+
 load_dotenv()
 
 # ========== STEP 1: Load Documents ==========
@@ -35,15 +38,26 @@ documents = loader.load()
 print(f"Loaded {len(documents)} document(s)")
 
 # ========== STEP 2: Split into Chunks ==========
-# Option 1: Recursive Character Text Splitter (Current - Recommended)
+# Option 1: Recursive separator splitting (Current - Recommended)
 # Recursively tries to split by different separators to keep related text together.
 # 1. "\n\n" (Paragraphs) -> 2. "\n" (Sentences) -> 3. " " (Words) -> 4. "" (Chars)
-splitter = RecursiveCharacterTextSplitter(
+# Same chunks as LangChain's RecursiveCharacterTextSplitter, computed on
+# offsets (see benchmarks/recursive-splitting.py)
+chunks = split_documents(
+    documents,
     chunk_size=200,
-    chunk_overlap=50,
+    overlap=50,
     separators=["\n\n", "\n", ". ", " "]
 )
-chunks = splitter.split_documents(documents)
+
+# LangChain's own splitter, same result:
+# from langchain.text_splitter import RecursiveCharacterTextSplitter
+# splitter = RecursiveCharacterTextSplitter(
+#     chunk_size=200,
+#     chunk_overlap=50,
+#     separators=["\n\n", "\n", ". ", " "]
+# )
+# chunks = splitter.split_documents(documents)
 
 # Option 2: Character Text Splitter
 # Simpler. Splits based on a single separator (default "\n\n").
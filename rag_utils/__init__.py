@@ -0,0 +1,7 @@
+"""
+Shared RAG helpers used by the lecture scripts
+
+The scripts live in hyphenated folders and cannot import each other, so
+anything more than one lecture needs goes here. Scripts add the repo root
+to sys.path and import from the submodules directly.
+"""
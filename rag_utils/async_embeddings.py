@@ -0,0 +1,320 @@
+"""
+Async Embedding Pipeline
+
+Embeds large corpora on the AsyncOpenAI client with several batch requests
+in flight at once, while staying under the provider's rate limits:
+
+- Two token buckets pace requests-per-minute and tokens-per-minute
+- On a 429 the allowed concurrency is halved and slowly grown back (AIMD),
+  and the request is retried with exponential backoff + jitter
+- PipelineStats exposes progress and throughput while it runs
+"""
+
+import asyncio
+import random
+import time
+
+import numpy as np
+from openai import APIConnectionError, InternalServerError, RateLimitError
+
+from .embeddings import (
+    DEFAULT_MODEL,
+    MAX_BATCH_ITEMS,
+    MAX_BATCH_TOKENS,
+    estimate_tokens,
+    iter_batches,
+    normalize_text,
+)
+from .providers import dimensions_kwargs
+
+
+class TokenBucket:
+    """
+    Async token bucket refilled continuously at per_minute / 60 per second
+
+    Args:
+        per_minute: Sustained rate (requests or tokens per minute)
+        burst_seconds: How many seconds' worth of budget may be spent at once
+    """
+
+    def __init__(self, per_minute, burst_seconds=10):
+        if per_minute <= 0:
+            raise ValueError("per_minute must be positive")
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount=1):
+        """Wait until amount can be spent. Waiters are served in FIFO order."""
+        # A single request bigger than the bucket can never fit - cap it
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+    def drain(self):
+        """Empty the bucket (used after a 429 so every worker pauses)"""
+        self._refill()
+        self.tokens = 0.0
+
+
+class _AdaptiveLimit:
+    """Concurrency limit that halves on rate limiting and grows back by one"""
+
+    def __init__(self, limit):
+        self.max_limit = limit
+        self.limit = limit
+        self.in_flight = 0
+        self._successes = 0
+        self._cond = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+
+    async def __aexit__(self, *exc_info):
+        async with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    async def on_success(self):
+        async with self._cond:
+            self._successes += 1
+            if self.limit < self.max_limit and self._successes >= self.limit:
+                self.limit += 1
+                self._successes = 0
+                self._cond.notify_all()
+
+    async def on_rate_limited(self):
+        async with self._cond:
+            self.limit = max(1, self.limit // 2)
+            self._successes = 0
+
+
+class PipelineStats:
+    """Progress and throughput counters for one pipeline run"""
+
+    def __init__(self, total_texts):
+        self.total_texts = total_texts
+        self.done_texts = 0
+        self.cached_texts = 0
+        self.requests = 0
+        self.tokens = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.concurrency = 0
+        self.started = time.monotonic()
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    @property
+    def progress(self):
+        return self.done_texts / self.total_texts if self.total_texts else 1.0
+
+    @property
+    def texts_per_second(self):
+        return self.done_texts / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def tokens_per_second(self):
+        return self.tokens / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        return (
+            f"{self.done_texts}/{self.total_texts} texts ({self.progress:.0%}) | "
+            f"{self.texts_per_second:.1f} texts/s | {self.tokens_per_second:.0f} tokens/s | "
+            f"{self.requests} requests, {self.rate_limited} rate limited, "
+            f"concurrency {self.concurrency}"
+        )
+
+
+def _retry_after(error):
+    """Seconds the server asked us to wait, if it said so"""
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class AsyncEmbeddingPipeline:
+    """
+    Rate-limited, bounded-concurrency embedding pipeline
+
+    Args:
+        client: AsyncOpenAI client
+        model: Embedding model to use
+        dimensions: Optional output size (text-embedding-3-* models only)
+        concurrency: Maximum batch requests in flight
+        requests_per_minute: Request budget (RPM limit of your tier)
+        tokens_per_minute: Token budget (TPM limit of your tier)
+        max_items: Maximum texts per request
+        max_tokens: Maximum estimated tokens per request
+        max_retries: Retries per batch before giving up
+        cache: Optional EmbeddingCache - cached texts skip the API
+        on_progress: Optional callback(stats) after every finished batch
+    """
+
+    def __init__(self, client, model=DEFAULT_MODEL, dimensions=None, concurrency=8,
+                 requests_per_minute=3_000, tokens_per_minute=1_000_000,
+                 max_items=MAX_BATCH_ITEMS, max_tokens=MAX_BATCH_TOKENS,
+                 max_retries=8, initial_backoff=1.0, max_backoff=60.0,
+                 cache=None, on_progress=None):
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.client = client
+        self.model = model
+        self.dimensions = dimensions
+        self.concurrency = concurrency
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_items = max_items
+        self.max_tokens = max_tokens
+        self.max_retries = max_retries
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.cache = cache
+        self.on_progress = on_progress
+        self.stats = PipelineStats(0)
+
+    async def iter_embeddings(self, texts):
+        """
+        Embed texts, yielding batches as they complete
+
+        Yields:
+            (positions, vectors) - positions index into texts, vectors is a
+            float32 matrix with one row per position. Batches arrive in
+            completion order, not input order.
+        """
+        texts = [normalize_text(text) for text in texts]
+        self.stats = PipelineStats(len(texts))
+        self.stats.concurrency = self.concurrency
+        requests = TokenBucket(self.requests_per_minute)
+        tokens = TokenBucket(self.tokens_per_minute)
+        limit = _AdaptiveLimit(self.concurrency)
+        batches = iter_batches(texts, self.max_items, self.max_tokens)
+        # Bounded so a slow consumer applies backpressure to the workers
+        results = asyncio.Queue(maxsize=2 * self.concurrency)
+
+        async def worker():
+            try:
+                # Workers share one batch generator; next() never awaits
+                for batch in batches:
+                    vectors = await self._embed_batch(
+                        [texts[position] for position in batch], requests, tokens, limit
+                    )
+                    await results.put((batch, vectors))
+            except Exception as exc:
+                await results.put(exc)
+            else:
+                await results.put(None)
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        finished = 0
+        try:
+            while finished < len(workers):
+                item = await results.get()
+                if item is None:
+                    finished += 1
+                    continue
+                if isinstance(item, Exception):
+                    raise item
+                batch, vectors = item
+                self.stats.done_texts += len(batch)
+                self.stats.concurrency = limit.limit
+                if self.on_progress is not None:
+                    self.on_progress(self.stats)
+                yield batch, vectors
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def embed(self, texts):
+        """
+        Embed texts into one float32 matrix in input order
+
+        Use iter_embeddings instead when the corpus does not fit in memory.
+        """
+        texts = list(texts)
+        matrix = None
+        async for batch, vectors in self.iter_embeddings(texts):
+            if matrix is None:
+                matrix = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+            matrix[batch] = vectors
+        if matrix is None:
+            return np.empty((0, 0), dtype=np.float32)
+        return matrix
+
+    async def _embed_batch(self, batch_texts, requests, tokens, limit):
+        """Serve a batch from the cache where possible, request the rest"""
+        cached = self.cache.get_many(self.model, self.dimensions, batch_texts) if self.cache is not None else {}
+        missing = [i for i in range(len(batch_texts)) if i not in cached]
+        self.stats.cached_texts += len(cached)
+
+        fresh = None
+        if missing:
+            missing_texts = [batch_texts[i] for i in missing]
+            fresh = await self._request(missing_texts, requests, tokens, limit)
+            if self.cache is not None:
+                self.cache.put_many(self.model, self.dimensions, missing_texts, fresh)
+
+        dim = fresh.shape[1] if fresh is not None else len(next(iter(cached.values())))
+        vectors = np.empty((len(batch_texts), dim), dtype=np.float32)
+        if fresh is not None:
+            vectors[missing] = fresh
+        for i, vector in cached.items():
+            vectors[i] = vector
+        return vectors
+
+    async def _request(self, inputs, requests, tokens, limit):
+        """One embeddings.create call with pacing, retries and backoff"""
+        estimated = sum(estimate_tokens(text) for text in inputs)
+        delay = self.initial_backoff
+
+        for attempt in range(self.max_retries + 1):
+            await requests.acquire(1)
+            await tokens.acquire(estimated)
+            async with limit:
+                try:
+                    response = await self.client.embeddings.create(
+                        input=inputs, model=self.model, **dimensions_kwargs(self.dimensions)
+                    )
+                except RateLimitError as exc:
+                    error = exc
+                    self.stats.rate_limited += 1
+                    tokens.drain()
+                    await limit.on_rate_limited()
+                except (APIConnectionError, InternalServerError) as exc:
+                    error = exc
+                else:
+                    await limit.on_success()
+                    self.stats.requests += 1
+                    usage = getattr(response, "usage", None)
+                    self.stats.tokens += usage.total_tokens if usage is not None else estimated
+                    vectors = np.empty((len(inputs), len(response.data[0].embedding)), dtype=np.float32)
+                    for item in response.data:
+                        vectors[item.index] = item.embedding
+                    return vectors
+
+            if attempt == self.max_retries:
+                raise error
+            self.stats.retries += 1
+            # Sleep outside the limit so the slot is free while we wait
+            await asyncio.sleep(_retry_after(error) or delay * (1 + random.random()))
+            delay = min(delay * 2, self.max_backoff)
@@ -0,0 +1,675 @@
+"""
+Chunkers: Streaming and Span-Based
+
+Streaming
+---------
+The chunkers in lec4-rag-embeddings-1/chunking.py take the whole document
+as one str and return a list - a multi-GB log or transcript dump has to fit
+in memory twice before the first chunk exists. The stream_* variants here
+read their source in fixed-size windows, carry the unfinished piece at a
+window boundary over to the next window, and yield chunks lazily:
+
+    for chunk in stream_paragraphs("transcripts.txt"):
+        ...
+
+Peak memory is one window plus the carried-over piece (at most one chunk,
+unless the text has no boundary for that long). Output is identical to
+running the in-memory chunker on the concatenated text.
+
+A source is a file path, an open text file, or any iterable of text
+pieces (a plain str is treated as a path - wrap text in a list).
+
+Spans
+-----
+Slicing every chunk out of its document copies the text, and with 10-20%
+overlap the overlapping part is stored twice. The *_spans chunkers record
+(source, start, end, page, row, tokens) in a ChunkSpans table instead -
+six typed arrays, 32 bytes per chunk whatever its length - next to one
+reference to each source text. Text is sliced out only when it is needed:
+
+    spans = character_spans(document, chunk_size=500, overlap=50, name="faq.txt")
+    embed_texts(list(spans.texts()), client)     # materialized for embedding
+    spans.metadata(3)                            # {"source": "faq.txt", "start": ..., ...}
+
+Recursive splitting
+-------------------
+recursive_spans() gives the same chunks as LangChain's
+RecursiveCharacterTextSplitter (separator kept at the start of the next
+piece, whitespace stripped) without building any intermediate strings:
+each separator's regex scans a range of the source in place, and pieces
+and merged chunks are (start, end) pairs. Every separator scans every
+character at most once. to_documents() / split_documents() wrap the
+result in LangChain Documents for chains that need them.
+
+Token budgets
+-------------
+Chunk sizes and context budgets are really token limits. token_spans()
+cuts fixed token windows, and recursive_spans(..., tokenizer=...)
+measures chunk_size / overlap in tokens. Both place boundaries using the
+tokens of the whole source (Tokenizer.token_starts) and store
+tokenizer.count() of each chunk's text in the tokens column; for other
+chunkers the count is computed on first use and kept, so budget math
+afterwards is a column lookup:
+
+    spans = recursive_spans(document, chunk_size=256, overlap=32, tokenizer=RegexTokenizer())
+    spans.token_count(3)                         # stored, no re-tokenizing
+"""
+
+import copy
+import os
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .tokenizers import RegexTokenizer
+
+# Characters read from a file per window
+DEFAULT_WINDOW_SIZE = 1 << 20
+
+
+def check_chunk_size(chunk_size, overlap=0):
+    """
+    Validate chunk_size / overlap before any work is done
+
+    Returns:
+        The step between chunk starts (chunk_size - overlap)
+    """
+    if not isinstance(chunk_size, int) or chunk_size <= 0:
+        raise ValueError(f"chunk_size must be a positive int, got {chunk_size!r}")
+    if not isinstance(overlap, int) or not 0 <= overlap < chunk_size:
+        # overlap >= chunk_size would never advance the start
+        raise ValueError(f"overlap must be an int in [0, chunk_size), got {overlap!r}")
+    return chunk_size - overlap
+
+
+def iter_windows(source, window_size=DEFAULT_WINDOW_SIZE):
+    """
+    Yield a source's text in pieces of at most window_size characters
+    (pieces of an iterable source are passed through as they are)
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, encoding="utf-8") as f:
+            yield from iter_windows(f, window_size)
+    elif hasattr(source, "read"):
+        while True:
+            window = source.read(window_size)
+            if not window:
+                return
+            yield window
+    else:
+        for window in source:
+            if window:
+                yield window
+
+
+# A sentence ends at . ! ? (plus closing quotes/brackets) followed by
+# whitespace, or at a blank line. "3.14" and "v2.0" never match.
+_BOUNDARY_RE = re.compile(r"[.!?]+[\"'\u201d\u2019)\]]*(?=\s|\Z)|\n[ \t]*\n")
+_WORD_BEFORE_RE = re.compile(r"[\w.]+\Z")
+
+# Lowercase words that end with '.' without ending the sentence
+ABBREVIATIONS = frozenset({
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "mt", "vs", "etc", "approx",
+    "inc", "ltd", "co", "corp", "dept", "est", "fig", "no", "vol", "p", "pp", "ch",
+    "jan", "feb", "mar", "apr", "jun", "jul", "aug", "sep", "sept", "oct", "nov", "dec",
+})
+
+
+def _is_abbreviation(text, dot):
+    """True when the '.' at position dot belongs to an abbreviation or initial"""
+    word = _WORD_BEFORE_RE.search(text, max(0, dot - 32), dot)
+    if word is None:
+        return False
+    word = word.group().lower()
+    # "e.g." / "U.S." contain inner dots; single letters are initials ("J. Smith")
+    return word in ABBREVIATIONS or "." in word or (len(word) == 1 and word.isalpha())
+
+
+def sentence_offsets(text, pos=0, final=True):
+    """
+    Yield (start, end) of each sentence in text[pos:], whitespace trimmed
+
+    One pass of a precompiled regex over the text - no replaced or split
+    copies. With final=False a boundary at the very end of text is not
+    trusted (more text may follow) and the trailing sentence is not
+    yielded; streaming callers resume from the last end.
+    """
+    start = pos
+    for match in _BOUNDARY_RE.finditer(text, pos):
+        if match.group()[0] == "\n":
+            end = match.start()
+        else:
+            if match.end() == len(text) and not final:
+                break
+            if match.group() == "." and _is_abbreviation(text, match.start()):
+                continue
+            end = match.end()
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if end > start:
+            yield start, end
+        start = match.end()
+    if final:
+        end = len(text)
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if end > start:
+            yield start, end
+
+
+def stream_characters(source, chunk_size=500, overlap=50, window_size=DEFAULT_WINDOW_SIZE):
+    """
+    Character chunks with overlap, same output as chunk_by_characters
+
+    Args:
+        source: Path, open text file or iterable of text pieces
+        chunk_size: Maximum characters per chunk
+        overlap: Characters shared by consecutive chunks (< chunk_size)
+    """
+    step = check_chunk_size(chunk_size, overlap)
+    buffer = ""
+    for window in iter_windows(source, window_size):
+        buffer += window
+        start = 0
+        while len(buffer) - start >= chunk_size:
+            yield buffer[start:start + chunk_size]
+            start += step
+        # Slice once per window, not once per chunk
+        buffer = buffer[start:]
+    start = 0
+    while start < len(buffer):
+        yield buffer[start:start + chunk_size]
+        start += step
+
+
+def stream_sentences(source, sentences_per_chunk=3, window_size=DEFAULT_WINDOW_SIZE):
+    """
+    Chunks of sentences_per_chunk sentences, same output as chunk_by_sentences
+
+    Text after the last certain boundary of a window is carried into the
+    next one - a '.' at the very end of a window may still turn out to be
+    a decimal point.
+    """
+    if sentences_per_chunk <= 0:
+        raise ValueError("sentences_per_chunk must be positive")
+    buffer = ""
+    scanned = 0
+    pending = []
+    for window in iter_windows(source, window_size):
+        buffer += window
+        for start, end in sentence_offsets(buffer, scanned, final=False):
+            pending.append((start, end))
+            scanned = end
+            if len(pending) == sentences_per_chunk:
+                yield buffer[pending[0][0]:end]
+                pending = []
+        # Keep only what is still needed: pending sentences + unscanned tail
+        cut = pending[0][0] if pending else scanned
+        buffer = buffer[cut:]
+        scanned -= cut
+        pending = [(start - cut, end - cut) for start, end in pending]
+    pending.extend(sentence_offsets(buffer, scanned))
+    for i in range(0, len(pending), sentences_per_chunk):
+        group = pending[i:i + sentences_per_chunk]
+        yield buffer[group[0][0]:group[-1][1]]
+
+
+def stream_paragraphs(source, window_size=DEFAULT_WINDOW_SIZE):
+    """
+    Blank-line separated paragraphs, same output as chunk_by_paragraphs
+
+    The last paragraph of a window may continue in the next one, so it is
+    carried over raw (a '\\n\\n' split across two windows still matches).
+    """
+    carry = ""
+    for window in iter_windows(source, window_size):
+        paragraphs = (carry + window).split('\n\n')
+        carry = paragraphs.pop()
+        for paragraph in paragraphs:
+            if paragraph.strip():
+                yield paragraph.strip()
+    if carry.strip():
+        yield carry.strip()
+
+
+class Span:
+    """One chunk as offsets into its source text (materialized on demand)"""
+
+    __slots__ = ("table", "source", "start", "end", "page", "row", "tokens")
+
+    def __init__(self, table, source, start, end, page=-1, row=-1, tokens=-1):
+        self.table = table
+        self.source = source
+        self.start = start
+        self.end = end
+        self.page = page
+        self.row = row
+        self.tokens = tokens
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __repr__(self):
+        return f"Span({self.table.names[self.source]!r}, {self.start}, {self.end})"
+
+    @property
+    def text(self):
+        return self.table.sources[self.source][self.start:self.end]
+
+    def metadata(self):
+        """Citation metadata: source name, offsets, and page/row/tokens when known"""
+        metadata = {"source": self.table.names[self.source], "start": self.start, "end": self.end}
+        if self.page >= 0:
+            metadata["page"] = self.page
+        if self.row >= 0:
+            metadata["row"] = self.row
+        if self.tokens >= 0:
+            metadata["tokens"] = self.tokens
+        return metadata
+
+
+class ChunkSpans:
+    """
+    Column store of chunk spans over a set of source texts
+
+    Each source text is referenced once; chunks are rows in typed arrays
+    (source code, start, end, page, row, token count - -1 when unknown).
+    Indexing returns a Span built on the fly.
+    """
+
+    __slots__ = ("sources", "names", "_source", "_start", "_end", "_page", "_row", "_tokens")
+
+    def __init__(self):
+        self.sources = []
+        self.names = []
+        self._source = array("i")
+        self._start = array("q")
+        self._end = array("q")
+        self._page = array("i")
+        self._row = array("i")
+        self._tokens = array("i")
+
+    def add_source(self, text, name=None):
+        """Register a source text (not copied) and return its code"""
+        self.sources.append(text)
+        self.names.append(name if name is not None else len(self.names))
+        return len(self.sources) - 1
+
+    def append(self, source, start, end, page=-1, row=-1, tokens=-1):
+        self._source.append(source)
+        self._start.append(start)
+        self._end.append(end)
+        self._page.append(page)
+        self._row.append(row)
+        self._tokens.append(tokens)
+
+    def extend(self, source, starts, ends, page=-1, row=-1, tokens=None):
+        """Append many spans of one source (starts / ends / tokens: int arrays)"""
+        count = len(starts)
+        self._source.frombytes(np.full(count, source, dtype=np.int32).tobytes())
+        self._start.frombytes(np.asarray(starts, dtype=np.int64).tobytes())
+        self._end.frombytes(np.asarray(ends, dtype=np.int64).tobytes())
+        self._page.frombytes(np.full(count, page, dtype=np.int32).tobytes())
+        self._row.frombytes(np.full(count, row, dtype=np.int32).tobytes())
+        tokens = np.full(count, -1) if tokens is None else tokens
+        self._tokens.frombytes(np.asarray(tokens, dtype=np.int32).tobytes())
+
+    def __len__(self):
+        return len(self._start)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        return Span(self, self._source[i], self._start[i], self._end[i], self._page[i], self._row[i],
+                    self._tokens[i])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def starts(self):
+        return np.frombuffer(self._start, dtype=np.int64)
+
+    @property
+    def ends(self):
+        return np.frombuffer(self._end, dtype=np.int64)
+
+    @property
+    def nbytes(self):
+        """Bytes held by the span columns (source texts not included)"""
+        return sum(column.itemsize * len(column)
+                   for column in (self._source, self._start, self._end, self._page, self._row, self._tokens))
+
+    def text(self, i):
+        return self.sources[self._source[i]][self._start[i]:self._end[i]]
+
+    def texts(self):
+        """Materialize chunk texts lazily, in order"""
+        for i in range(len(self)):
+            yield self.text(i)
+
+    def metadata(self, i):
+        return self[i].metadata()
+
+    def token_count(self, i, tokenizer=None):
+        """Tokens in chunk i - counted on first use, then read from the column"""
+        if self._tokens[i] < 0:
+            tokenizer = tokenizer if tokenizer is not None else RegexTokenizer()
+            self._tokens[i] = tokenizer.count(self.text(i))
+        return self._tokens[i]
+
+    def token_counts(self, tokenizer=None):
+        """Token count of every chunk (missing ones are filled in)"""
+        missing = [i for i, tokens in enumerate(self._tokens) if tokens < 0]
+        if missing:
+            tokenizer = tokenizer if tokenizer is not None else RegexTokenizer()
+            for i in missing:
+                self._tokens[i] = tokenizer.count(self.text(i))
+        return np.frombuffer(self._tokens, dtype=np.int32)
+
+
+def character_spans(text, chunk_size=500, overlap=50, name=None, spans=None, page=-1, row=-1):
+    """
+    Character chunks with overlap as spans (chunk_by_characters boundaries)
+
+    Args:
+        text: Source text (referenced, not copied)
+        name: Source name for citations
+        spans: Optional ChunkSpans to add to (default: a new one)
+        page / row: Optional page or row number for every chunk
+
+    Returns:
+        The ChunkSpans table
+    """
+    step = check_chunk_size(chunk_size, overlap)
+    spans = spans if spans is not None else ChunkSpans()
+    source = spans.add_source(text, name)
+    starts = np.arange(0, len(text), step, dtype=np.int64)
+    spans.extend(source, starts, np.minimum(starts + chunk_size, len(text)), page, row)
+    return spans
+
+
+def paragraph_spans(text, name=None, spans=None, page=-1, row=-1):
+    """Blank-line separated paragraphs as spans (chunk_by_paragraphs boundaries)"""
+    spans = spans if spans is not None else ChunkSpans()
+    source = spans.add_source(text, name)
+    position = 0
+    while position <= len(text):
+        end = text.find('\n\n', position)
+        if end < 0:
+            end = len(text)
+        start, next_position = position, end + 2
+        # Trim whitespace by moving the offsets, not by copying
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if end > start:
+            spans.append(source, start, end, page, row)
+        position = next_position
+    return spans
+
+
+def sentence_spans(text, sentences_per_chunk=3, name=None, spans=None, page=-1, row=-1):
+    """
+    Groups of sentences_per_chunk sentences as spans
+
+    A chunk runs from its first sentence's start to its last sentence's
+    end, so the original punctuation and spacing are kept.
+    """
+    if sentences_per_chunk <= 0:
+        raise ValueError("sentences_per_chunk must be positive")
+    spans = spans if spans is not None else ChunkSpans()
+    source = spans.add_source(text, name)
+    bounds = np.array(list(sentence_offsets(text)), dtype=np.int64).reshape(-1, 2)
+    firsts = bounds[::sentences_per_chunk, 0]
+    lasts = bounds[np.minimum(np.arange(len(firsts)) * sentences_per_chunk + sentences_per_chunk - 1,
+                              len(bounds) - 1), 1]
+    spans.extend(source, firsts, lasts, page, row)
+    return spans
+
+
+# RecursiveCharacterTextSplitter's default priority: paragraphs, lines, words, characters
+DEFAULT_SEPARATORS = ("\n\n", "\n", " ", "")
+
+
+def _append_stripped(text, start, end, out):
+    """Append (start, end) narrowed like str.strip(), unless nothing is left"""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    if end > start:
+        out.append((start, end))
+
+
+def _merge_pieces(text, bounds, sizes, lo, hi, chunk_size, overlap, out):
+    """
+    Merge the contiguous pieces bounds[lo]..bounds[hi] (each shorter than
+    chunk_size) into chunks of at most chunk_size, carrying up to overlap
+    of trailing pieces into the next chunk
+
+    Same chunks as LangChain's _merge_splits, but sizes holds the running
+    length at every boundary (characters or tokens), so each chunk's last
+    piece and the next chunk's first piece are found by bisection instead
+    of piece by piece.
+    """
+    head = lo
+    while True:
+        # Last piece boundary that keeps the chunk within chunk_size
+        stop = bisect_right(sizes, sizes[head] + chunk_size, head + 1, hi + 1) - 1
+        _append_stripped(text, bounds[head], bounds[stop], out)
+        if stop == hi:
+            return
+        # Drop leading pieces until <= overlap is left and the next piece fits
+        head = bisect_left(sizes, max(sizes[stop] - overlap, sizes[stop + 1] - chunk_size), head, stop + 1)
+
+
+def _split_range(text, start, end, patterns, chunk_size, overlap, out, token_starts=None):
+    """Split text[start:end] on the first separator present, recursing into oversized pieces"""
+    cuts, rest = [], ()
+    for i, pattern in enumerate(patterns):
+        if pattern is None:  # "" separator: single characters
+            cuts = range(start + 1, end)
+            break
+        cuts = [match.start() for match in pattern.finditer(text, start, end)]
+        if cuts:
+            rest = patterns[i + 1:]
+            break
+
+    # The separator starts the piece after it; a cut at start gives no piece
+    bounds = [start, *cuts, end] if not cuts or cuts[0] != start else [*cuts, end]
+    # Lengths are differences of sizes: character offsets, or the number of
+    # tokens starting before each boundary
+    sizes = bounds if token_starts is None else [bisect_left(token_starts, bound) for bound in bounds]
+    lo = 0
+    for k in range(len(bounds) - 1):
+        if sizes[k + 1] - sizes[k] < chunk_size:
+            continue
+        if k > lo:
+            _merge_pieces(text, bounds, sizes, lo, k, chunk_size, overlap, out)
+        if rest:
+            _split_range(text, bounds[k], bounds[k + 1], rest, chunk_size, overlap, out, token_starts)
+        else:
+            out.append((bounds[k], bounds[k + 1]))  # no separator left: kept oversized, as-is
+        lo = k + 1
+    if len(bounds) - 1 > lo:
+        _merge_pieces(text, bounds, sizes, lo, len(bounds) - 1, chunk_size, overlap, out)
+
+
+def recursive_spans(text, chunk_size=500, overlap=50, separators=DEFAULT_SEPARATORS,
+                    name=None, spans=None, page=-1, row=-1, tokenizer=None):
+    """
+    Recursive separator chunks as spans (RecursiveCharacterTextSplitter boundaries)
+
+    Splits on the first separator that occurs, merges the pieces up to
+    chunk_size, and re-splits any piece that is still too long with the
+    remaining separators.
+
+    Args:
+        text: Source text (referenced, not copied)
+        separators: Literal separators, highest priority first ("" = characters)
+        name: Source name for citations
+        spans: Optional ChunkSpans to add to (default: a new one)
+        page / row: Optional page or row number for every chunk
+        tokenizer: If set, chunk_size and overlap count tokens instead of
+                   characters, and every chunk's token count is stored
+
+    Returns:
+        The ChunkSpans table
+    """
+    check_chunk_size(chunk_size, overlap)
+    patterns = []
+    for separator in separators:
+        patterns.append(re.compile(re.escape(separator)) if separator else None)
+        if not separator:
+            break
+    spans = spans if spans is not None else ChunkSpans()
+    source = spans.add_source(text, name)
+    token_starts = tokenizer.token_starts(text) if tokenizer is not None else None
+    bounds = []
+    _split_range(text, 0, len(text), tuple(patterns), chunk_size, overlap, bounds,
+                 token_starts.tolist() if token_starts is not None else None)
+    bounds = np.array(bounds, dtype=np.int64).reshape(-1, 2)
+    tokens = None
+    if tokenizer is not None:
+        # Recounted on the chunk text: tokenization depends on context, so
+        # the source's tokens cut at a chunk edge are off by one
+        tokens = tokenizer.count_many(text[start:end] for start, end in bounds)
+    spans.extend(source, bounds[:, 0], bounds[:, 1], page, row, tokens)
+    return spans
+
+
+def token_spans(text, max_tokens=256, overlap_tokens=32, tokenizer=None, name=None, spans=None,
+                page=-1, row=-1):
+    """
+    Fixed windows of max_tokens tokens, overlap_tokens shared with the next
+
+    Boundaries fall on token starts of the whole text. A chunk on its
+    own can tokenize differently at its edges (e.g. a whitespace run cut
+    in two), so the stored count is tokenizer.count() of the chunk text,
+    and a window that comes out over max_tokens loses its last token.
+
+    Args:
+        text: Source text (referenced, not copied)
+        tokenizer: Tokenizer (default: offline RegexTokenizer)
+        name: Source name for citations
+        spans: Optional ChunkSpans to add to (default: a new one)
+        page / row: Optional page or row number for every chunk
+
+    Returns:
+        The ChunkSpans table
+    """
+    step = check_chunk_size(max_tokens, overlap_tokens)
+    tokenizer = tokenizer if tokenizer is not None else RegexTokenizer()
+    spans = spans if spans is not None else ChunkSpans()
+    source = spans.add_source(text, name)
+    token_starts = tokenizer.token_starts(text)
+    n_tokens = len(token_starts)
+    # Window starts, in tokens; no window lies wholly inside the previous one
+    first = np.arange(0, max(n_tokens - overlap_tokens, 1 if n_tokens else 0), step)
+    last = np.minimum(first + max_tokens, n_tokens)
+    boundaries = np.append(token_starts, len(text))
+    tokens = tokenizer.count_many(text[boundaries[i]:boundaries[j]] for i, j in zip(first, last))
+    for k in np.flatnonzero(tokens > max_tokens):
+        while tokens[k] > max_tokens and last[k] - first[k] > 1:
+            last[k] -= 1
+            tokens[k] = tokenizer.count(text[boundaries[first[k]]:boundaries[last[k]]])
+    spans.extend(source, boundaries[first], boundaries[last], page, row, tokens)
+    return spans
+
+
+def to_documents(spans, metadatas=None, add_start_index=False):
+    """
+    LangChain Documents for every chunk in spans
+
+    Args:
+        spans: ChunkSpans table
+        metadatas: Optional metadata dict per source (copied into each chunk)
+        add_start_index: Add the chunk's character offset as "start_index"
+    """
+    # Only the LangChain chains need Documents - keep langchain optional here
+    from langchain_core.documents import Document
+
+    documents = []
+    # Straight off the columns - no Span per chunk; copy only metadata
+    # that has something in it
+    for source, start, end in zip(spans._source, spans._start, spans._end):
+        metadata = metadatas[source] if metadatas else None
+        metadata = copy.deepcopy(metadata) if metadata else {}
+        if add_start_index:
+            metadata["start_index"] = start
+        documents.append(Document(page_content=spans.sources[source][start:end], metadata=metadata))
+    return documents
+
+
+def split_documents(documents, chunk_size=500, overlap=50, separators=DEFAULT_SEPARATORS,
+                    add_start_index=False):
+    """Drop-in for RecursiveCharacterTextSplitter(...).split_documents(documents)"""
+    documents = list(documents)
+    spans = ChunkSpans()
+    for document in documents:
+        recursive_spans(document.page_content, chunk_size, overlap, separators,
+                        name=document.metadata.get("source"), spans=spans)
+    return to_documents(spans, [document.metadata for document in documents], add_start_index)
+
+
+CHUNKERS = {
+    "characters": character_spans,
+    "recursive": recursive_spans,
+    "tokens": token_spans,
+    "sentences": sentence_spans,
+    "paragraphs": paragraph_spans,
+}
+
+
+def _chunk_file(job):
+    """Process-pool task: read one file and chunk it into spans"""
+    path, chunker, options = job
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    return CHUNKERS[chunker](text, name=os.fspath(path), **options)
+
+
+def _map_files(jobs, processes):
+    with ProcessPoolExecutor(processes) as pool:
+        # Several small files per task keeps the pickling overhead down
+        chunksize = max(1, len(jobs) // (4 * processes))
+        yield from pool.map(_chunk_file, jobs, chunksize=chunksize)
+
+
+def chunk_corpus(paths, chunker="sentences", processes=None, **options):
+    """
+    Chunk many files on a process pool, one ChunkSpans per file
+
+    Results are yielded in the order of paths, however the workers finish,
+    so re-index runs are reproducible. Arguments are checked on the call,
+    before any worker starts.
+
+    Args:
+        paths: Text file paths
+        chunker: "characters", "recursive", "tokens", "sentences" or
+            "paragraphs"
+        processes: Worker processes (default: CPU count)
+        options: Chunker arguments, e.g. chunk_size=500, overlap=50
+            (max_tokens and overlap_tokens for "tokens")
+
+    Returns:
+        Iterator of ChunkSpans
+    """
+    if chunker not in CHUNKERS:
+        raise ValueError(f"chunker must be one of {sorted(CHUNKERS)}, got {chunker!r}")
+    if chunker in ("characters", "recursive"):
+        check_chunk_size(options.get("chunk_size", 500), options.get("overlap", 50))
+    elif chunker == "tokens":
+        check_chunk_size(options.get("max_tokens", 256), options.get("overlap_tokens", 32))
+    jobs = [(path, chunker, options) for path in paths]
+    return _map_files(jobs, processes or os.cpu_count() or 1)
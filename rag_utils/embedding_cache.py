@@ -0,0 +1,175 @@
+"""
+Persistent Embedding Cache
+
+Content-addressed on-disk cache that sits in front of the embeddings API.
+Entries are keyed by (model, dimensions, sha256 of the normalized text), so
+the same text embedded by a different model never collides.
+
+Storage is a single SQLite file in WAL mode: any number of processes can
+read while one writes. The cache holds at most max_entries vectors and
+evicts the least recently used ones beyond that. A hit only rewrites its
+last_access when the stored one is older than touch_interval seconds, so
+lookups of warm entries stay read-only and readers do not queue for the
+write lock.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+DEFAULT_MAX_ENTRIES = 100_000
+
+# Recency resolution of the LRU: hits touched more recently are not rewritten
+DEFAULT_TOUCH_INTERVAL = 300.0
+
+# SQLite limits the number of "?" parameters per statement
+_LOOKUP_CHUNK = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    model TEXT NOT NULL,
+    dimensions INTEGER NOT NULL,
+    text_hash BLOB NOT NULL,
+    vector BLOB NOT NULL,
+    last_access REAL NOT NULL,
+    UNIQUE (model, dimensions, text_hash)
+);
+CREATE INDEX IF NOT EXISTS embeddings_last_access ON embeddings (last_access);
+"""
+
+
+def text_hash(text):
+    """Hash of an already normalized text"""
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """
+    LRU-bounded embedding cache stored in a SQLite file
+
+    Args:
+        path: Database file (created if missing)
+        max_entries: Maximum number of cached vectors
+        touch_interval: Seconds a hit's last_access may lag before it is
+                        rewritten (0 = on every hit)
+    """
+
+    def __init__(self, path, max_entries=DEFAULT_MAX_ENTRIES, touch_interval=DEFAULT_TOUCH_INTERVAL):
+        if max_entries < 1:
+            raise ValueError("max_entries must be positive")
+        if touch_interval < 0:
+            raise ValueError("touch_interval must not be negative")
+        self.path = path
+        self.max_entries = max_entries
+        self.touch_interval = touch_interval
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._connect().executescript(_SCHEMA)
+
+    def _connect(self):
+        """One connection per thread - sqlite3 connections are not shareable"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, model, dimensions, texts):
+        """
+        Look up normalized texts
+
+        Returns:
+            Dict mapping position in texts -> float32 vector, hits only
+        """
+        dims = dimensions or 0
+        hashes = [text_hash(text) for text in texts]
+        positions = {}
+        for position, digest in enumerate(hashes):
+            positions.setdefault(digest, []).append(position)
+
+        conn = self._connect()
+        found = {}
+        stale = []
+        now = time.time()
+        unique = list(positions)
+        for start in range(0, len(unique), _LOOKUP_CHUNK):
+            chunk = unique[start:start + _LOOKUP_CHUNK]
+            rows = conn.execute(
+                "SELECT text_hash, vector, last_access FROM embeddings "
+                f"WHERE model = ? AND dimensions = ? AND text_hash IN ({','.join('?' * len(chunk))})",
+                [model, dims, *chunk]
+            ).fetchall()
+            for digest, blob, last_access in rows:
+                vector = np.frombuffer(blob, dtype=np.float32)
+                for position in positions[digest]:
+                    found[position] = vector
+                if now - last_access >= self.touch_interval:
+                    stale.append(digest)
+
+        if stale:
+            # Touch hits so eviction sees them as recently used - only the
+            # ones not touched within touch_interval, so most lookups of a
+            # warm cache never take the write lock
+            with conn:
+                conn.executemany(
+                    "UPDATE embeddings SET last_access = ? "
+                    "WHERE model = ? AND dimensions = ? AND text_hash = ?",
+                    [(now, model, dims, digest) for digest in stale]
+                )
+
+        with self._stats_lock:
+            self.hits += len(found)
+            self.misses += len(texts) - len(found)
+        return found
+
+    def put_many(self, model, dimensions, texts, vectors):
+        """Store normalized texts with their vectors, then evict past the bound"""
+        dims = dimensions or 0
+        now = time.time()
+        rows = [
+            (model, dims, text_hash(text), np.asarray(vector, dtype=np.float32).tobytes(), now)
+            for text, vector in zip(texts, vectors)
+        ]
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings "
+                "(model, dimensions, text_hash, vector, last_access) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            overflow = len(self) - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM embeddings WHERE rowid IN "
+                    "(SELECT rowid FROM embeddings ORDER BY last_access LIMIT ?)",
+                    (overflow,)
+                )
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def stats(self):
+        """Hit/miss counters for this process"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self),
+        }
+
+    def clear(self):
+        """Drop every cached vector and reset the counters"""
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM embeddings")
+        with self._stats_lock:
+            self.hits = 0
+            self.misses = 0
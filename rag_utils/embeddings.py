@@ -0,0 +1,142 @@
+"""
+Batched Embedding Client
+
+Sending one text per embeddings.create call means N documents cost N HTTP
+round trips. These helpers pack many texts into each request instead and
+return the vectors as one float32 matrix.
+
+Requests go through an EmbeddingProvider (see providers.py); passing a
+plain OpenAI client uses the embeddings API.
+"""
+
+import numpy as np
+
+from .providers import DEFAULT_MODEL, as_provider
+
+# OpenAI accepts up to 2048 inputs per request. The token cap is kept well
+# under the provider's per-request limit because estimate_tokens is rough.
+MAX_BATCH_ITEMS = 2048
+MAX_BATCH_TOKENS = 100_000
+
+
+def normalize_text(text):
+    """Clean text the same way every get_embedding helper does"""
+    return text.replace("\n", " ").strip()
+
+
+def estimate_tokens(text):
+    """Rough token estimate (1 token ≈ 4 characters)"""
+    return len(text) // 4 + 1
+
+
+def iter_batches(texts, max_items=MAX_BATCH_ITEMS, max_tokens=MAX_BATCH_TOKENS):
+    """
+    Group texts into request-sized batches
+
+    Args:
+        texts: Sequence of (already normalized) strings
+        max_items: Maximum texts per request
+        max_tokens: Maximum estimated tokens per request
+
+    Yields:
+        Lists of positions into texts. A single text larger than max_tokens
+        still gets its own batch - the API decides whether it is too long.
+    """
+    if max_items < 1 or max_tokens < 1:
+        raise ValueError("max_items and max_tokens must be positive")
+
+    batch = []
+    batch_tokens = 0
+    for position, text in enumerate(texts):
+        tokens = estimate_tokens(text)
+        if batch and (len(batch) >= max_items or batch_tokens + tokens > max_tokens):
+            yield batch
+            batch = []
+            batch_tokens = 0
+        batch.append(position)
+        batch_tokens += tokens
+    if batch:
+        yield batch
+
+
+def embed_texts(texts, client, model=DEFAULT_MODEL, dimensions=None,
+                max_items=MAX_BATCH_ITEMS, max_tokens=MAX_BATCH_TOKENS, cache=None):
+    """
+    Embed many texts with as few API calls as possible
+
+    Args:
+        texts: Iterable of input strings
+        client: OpenAI client or EmbeddingProvider
+        model: Embedding model to use (ignored for providers)
+        dimensions: Optional output size (text-embedding-3-* models only).
+                    None keeps the model's full dimension.
+        max_items: Maximum texts per request
+        max_tokens: Maximum estimated tokens per request
+        cache: Optional EmbeddingCache - only misses are sent to the provider
+
+    Returns:
+        C-contiguous float32 matrix of shape (len(texts), dim).
+        Row i is the embedding of the i-th input text.
+    """
+    provider = as_provider(client, model)
+    texts = [normalize_text(text) for text in texts]
+    cached = cache.get_many(provider.name, dimensions, texts) if cache is not None else {}
+    # Cached vectors of another width (written before the provider's
+    # dimension changed) are misses, not rows to copy
+    width = dimensions or getattr(provider, "dim", None)
+    if width is not None:
+        cached = {position: vector for position, vector in cached.items() if len(vector) == width}
+    missing = [position for position in range(len(texts)) if position not in cached]
+
+    blocks = []  # (positions, vectors) per provider call
+
+    def embed_positions(positions):
+        position_texts = [texts[position] for position in positions]
+        for batch in iter_batches(position_texts, max_items, max_tokens):
+            vectors = provider.embed_batch([position_texts[i] for i in batch], dimensions)
+            blocks.append(([positions[i] for i in batch], vectors))
+
+    embed_positions(missing)
+    if width is None and (blocks or cached):
+        width = blocks[0][1].shape[1] if blocks else len(next(iter(cached.values())))
+        stale = [position for position, vector in cached.items() if len(vector) != width]
+        if stale:
+            for position in stale:
+                del cached[position]
+            embed_positions(stale)
+            missing = sorted(missing + stale)
+
+    if width is None or not texts:
+        return np.empty((0, 0), dtype=np.float32)
+    matrix = np.empty((len(texts), width), dtype=np.float32)
+    for position, vector in cached.items():
+        matrix[position] = vector
+    for positions, vectors in blocks:
+        matrix[positions] = vectors
+
+    if cache is not None and missing:
+        cache.put_many(provider.name, dimensions, [texts[position] for position in missing], matrix[missing])
+    return matrix
+
+
+def embed_text(text, client, model=DEFAULT_MODEL, dimensions=None, cache=None):
+    """Embed a single text (a one-item batch)"""
+    return embed_texts([text], client, model=model, dimensions=dimensions, cache=cache)[0]
+
+
+def truncate_embeddings(vectors, dimensions):
+    """
+    Shorten embeddings client-side
+
+    text-embedding-3-* vectors put the most important information first,
+    so keeping the leading dimensions and re-normalizing matches what the
+    API returns for the same dimensions parameter.
+    """
+    vectors = np.array(vectors, dtype=np.float32, ndmin=2)
+    if dimensions > vectors.shape[1]:
+        raise ValueError(f"cannot truncate {vectors.shape[1]}-d vectors to {dimensions}")
+    truncated = np.ascontiguousarray(vectors[:, :dimensions])
+    norms = np.linalg.norm(truncated, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    truncated /= norms
+    return truncated
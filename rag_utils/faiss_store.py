@@ -0,0 +1,473 @@
+"""
+FAISS Vector Store
+
+In-process vector store on faiss-cpu with the same add / semantic_search /
+filtered_search shape the lec5 scripts use with Chroma, and query results
+in Chroma's format ({"ids": [[...]], "documents": [[...]], ...}).
+
+Index types - pick per workload:
+- "flat": exact brute force. Best recall, fine up to ~1M vectors.
+- "ivf":  inverted file. Vectors are bucketed by k-means; a query scans
+          nprobe of nlist buckets. Needs training, cheap to build.
+- "hnsw": graph index. Fastest queries (sub-ms at millions), more memory,
+          slower to build. ef_search trades recall for latency.
+
+Updates and deletes never touch the FAISS index in place: a deleted or
+replaced row gets a bit in the tombstone bitmap, which is masked out at
+query time. Once tombstones pass compaction_threshold of the rows, a
+background thread rebuilds the index from the live rows and swaps it in
+under a short lock - queries keep being served while it builds.
+"""
+
+import json
+import os
+import threading
+
+import faiss
+import numpy as np
+
+from .embeddings import embed_text, embed_texts
+from .metadata_index import DEFAULT_BRUTE_FORCE_SELECTIVITY, MetadataIndex
+from .vector_index import normalize_rows, top_k_indices
+
+INDEX_TYPES = ("flat", "ivf", "hnsw")
+METRICS = ("cosine", "l2")
+
+# FAISS wants ~39 training points per IVF list
+_POINTS_PER_LIST = 39
+
+# Rebuild once this fraction of rows are tombstones
+DEFAULT_COMPACTION_THRESHOLD = 0.2
+
+
+def set_num_threads(n_threads):
+    """Cap the OpenMP threads FAISS uses (process-wide setting)"""
+    faiss.omp_set_num_threads(n_threads)
+
+
+class FaissVectorStore:
+    """
+    Vector store backed by a FAISS index
+
+    Args:
+        dim: Embedding dimension
+        embedder: Optional OpenAI client / EmbeddingProvider, needed to add
+                  documents without embeddings and for semantic_search
+        index_type: "flat", "ivf" or "hnsw"
+        metric: "cosine" (normalized inner product) or "l2"
+        nlist: IVF lists (clipped to the training set size)
+        nprobe: IVF lists scanned per query
+        hnsw_m: HNSW neighbours per node
+        ef_construction: HNSW build-time candidate list size
+        ef_search: HNSW query-time candidate list size
+        n_threads: Optional OpenMP thread cap (see set_num_threads)
+        cache: Optional EmbeddingCache used when embedding
+        brute_force_selectivity: Filters matching at most this fraction of
+                                 rows skip the ANN index (exact subset scan)
+        compaction_threshold: Tombstone ratio that starts a background
+                              rebuild (None = only compact() by hand)
+    """
+
+    def __init__(self, dim, embedder=None, index_type="flat", metric="cosine",
+                 nlist=1024, nprobe=16, hnsw_m=32, ef_construction=200, ef_search=64,
+                 n_threads=None, cache=None,
+                 brute_force_selectivity=DEFAULT_BRUTE_FORCE_SELECTIVITY,
+                 compaction_threshold=DEFAULT_COMPACTION_THRESHOLD):
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"index_type must be one of {INDEX_TYPES}, got {index_type!r}")
+        if metric not in METRICS:
+            raise ValueError(f"metric must be one of {METRICS}, got {metric!r}")
+        self.dim = dim
+        self.embedder = embedder
+        self.cache = cache
+        self.brute_force_selectivity = brute_force_selectivity
+        self.compaction_threshold = compaction_threshold
+        self.config = {
+            "dim": dim, "index_type": index_type, "metric": metric,
+            "nlist": nlist, "nprobe": nprobe, "hnsw_m": hnsw_m,
+            "ef_construction": ef_construction, "ef_search": ef_search,
+        }
+        if n_threads is not None:
+            set_num_threads(n_threads)
+
+        self.ids = []
+        self.documents = []
+        self.metadatas = []
+        self._positions = {}        # live id -> row
+        self._next_id = 0           # default ids count up, never reused
+        self.tombstones = np.zeros(0, dtype=bool)
+        self.metadata_index = MetadataIndex()
+        self.index = None if index_type == "ivf" else self._build_index()
+        # Set by load(mmap=True): the mapped index cannot take new rows
+        self.read_only = False
+        # Guards every read and write of the fields above; compaction
+        # only holds it to snapshot the live rows and to swap
+        self._lock = threading.RLock()
+        self._compaction = None
+
+    @property
+    def index_type(self):
+        return self.config["index_type"]
+
+    @property
+    def _faiss_metric(self):
+        return faiss.METRIC_INNER_PRODUCT if self.config["metric"] == "cosine" else faiss.METRIC_L2
+
+    def _build_index(self, nlist=None, quantizer=None):
+        if self.index_type == "flat":
+            return faiss.IndexFlat(self.dim, self._faiss_metric)
+        if self.index_type == "hnsw":
+            index = faiss.IndexHNSWFlat(self.dim, self.config["hnsw_m"], self._faiss_metric)
+            index.hnsw.efConstruction = self.config["ef_construction"]
+            index.hnsw.efSearch = self.config["ef_search"]
+            return index
+        # A trained quantizer (copied from the old index) skips retraining
+        if quantizer is None:
+            quantizer = faiss.IndexFlat(self.dim, self._faiss_metric)
+        index = faiss.IndexIVFFlat(quantizer, self.dim, nlist, self._faiss_metric)
+        index.is_trained = quantizer.ntotal == nlist
+        index.nprobe = min(self.config["nprobe"], nlist)
+        # Lets reconstruct_batch fetch vectors for exact filtered search
+        index.make_direct_map()
+        return index
+
+    def _prepare(self, vectors):
+        vectors = np.array(vectors, dtype=np.float32, ndmin=2, order="C")
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"expected {self.dim}-d vectors, got {vectors.shape[1]}")
+        return normalize_rows(vectors) if self.config["metric"] == "cosine" else vectors
+
+    def train(self, sample_embeddings):
+        """
+        Train the IVF coarse quantizer on a representative sample
+
+        Called automatically with the first add() batch if you don't.
+        nlist is clipped so every list gets enough training points.
+        """
+        if self.index_type != "ivf":
+            return
+        if self.index is not None and self.index.is_trained:
+            raise ValueError("index is already trained")
+        sample = self._prepare(sample_embeddings)
+        nlist = max(1, min(self.config["nlist"], len(sample) // _POINTS_PER_LIST))
+        self.index = self._build_index(nlist)
+        self.index.train(sample)
+
+    def _check_writable(self):
+        if self.read_only:
+            raise ValueError("store was loaded with mmap=True and is read-only; "
+                             "load it with mmap=False to add, upsert, delete or compact")
+
+    def _records(self, documents, metadatas, ids, embeddings):
+        """Validate add/upsert arguments, embedding documents if needed"""
+        if embeddings is None:
+            if documents is None or self.embedder is None:
+                raise ValueError("pass embeddings, or documents with an embedder")
+            embeddings = embed_texts(documents, self.embedder, dimensions=self.dim, cache=self.cache)
+        vectors = self._prepare(embeddings)
+        count = len(vectors)
+        ids = list(ids) if ids is not None else self._default_ids(count)
+        documents = list(documents) if documents is not None else [None] * count
+        metadatas = list(metadatas) if metadatas is not None else [None] * count
+        if not len(ids) == len(documents) == len(metadatas) == count:
+            raise ValueError("ids, documents, metadatas and embeddings must have the same length")
+        if len(set(ids)) != count:
+            raise ValueError("ids repeat within the batch")
+        return ids, documents, metadatas, vectors
+
+    def _default_ids(self, count):
+        """
+        Ids "0", "1", ... from a counter that survives compaction and
+        save/load, skipping ids the caller has stored explicitly
+        """
+        ids = []
+        with self._lock:
+            while len(ids) < count:
+                record_id = str(self._next_id)
+                self._next_id += 1
+                if record_id not in self._positions:
+                    ids.append(record_id)
+        return ids
+
+    def _append(self, ids, documents, metadatas, vectors):
+        if self.index is None:
+            self.train(vectors)
+        # FAISS labels are row positions in ids/documents/metadatas
+        self.index.add(vectors)
+        for i, record_id in enumerate(ids, start=len(self.ids)):
+            self._positions[record_id] = i
+        self.ids.extend(ids)
+        self.documents.extend(documents)
+        self.metadatas.extend(metadatas)
+        self.metadata_index.add(metadatas)
+        self.tombstones = np.concatenate([self.tombstones, np.zeros(len(ids), dtype=bool)])
+
+    def add(self, documents=None, metadatas=None, ids=None, embeddings=None):
+        """
+        Add documents (Chroma-style keyword arguments)
+
+        Embeddings are computed with the store's embedder when not given.
+        Ids must be new - use upsert() to replace existing ones.
+        """
+        self._check_writable()
+        records = self._records(documents, metadatas, ids, embeddings)
+        with self._lock:
+            duplicates = [i for i in records[0] if i in self._positions]
+            if duplicates:
+                raise ValueError(f"ids already exist: {duplicates[:5]}")
+            self._append(*records)
+
+    def upsert(self, documents=None, metadatas=None, ids=None, embeddings=None):
+        """
+        Add documents, replacing any stored under the same ids
+
+        The new versions are appended first and the old rows tombstoned
+        after, so a failed append leaves the stored records untouched.
+        """
+        self._check_writable()
+        records = self._records(documents, metadatas, ids, embeddings)
+        with self._lock:
+            old_rows = [self._positions[record_id] for record_id in records[0] if record_id in self._positions]
+            self._append(*records)
+            self.tombstones[old_rows] = True
+        self._maybe_compact()
+
+    def delete(self, ids=None, where=None):
+        """
+        Delete documents by id and/or metadata filter (Chroma-style)
+
+        Returns:
+            Number of documents deleted
+        """
+        if ids is None and where is None:
+            raise ValueError("pass ids and/or where")
+        self._check_writable()
+        with self._lock:
+            if where is not None:
+                mask = self.metadata_index.compile(where) & ~self.tombstones
+                matching = [self.ids[row] for row in np.flatnonzero(mask)]
+                if ids is not None:
+                    wanted = set(ids)
+                    matching = [record_id for record_id in matching if record_id in wanted]
+                ids = matching
+            deleted = self._tombstone(ids)
+        self._maybe_compact()
+        return deleted
+
+    def _tombstone(self, ids):
+        rows = [self._positions.pop(record_id) for record_id in ids if record_id in self._positions]
+        self.tombstones[rows] = True
+        return len(rows)
+
+    def count(self):
+        """Number of live documents"""
+        return len(self._positions)
+
+    def tombstone_ratio(self):
+        """Fraction of FAISS rows that are deleted or replaced"""
+        return float(self.tombstones.mean()) if len(self.tombstones) else 0.0
+
+    def _maybe_compact(self):
+        """Start a background compaction once enough rows are tombstones"""
+        if self.compaction_threshold is None or self.tombstone_ratio() <= self.compaction_threshold:
+            return
+        with self._lock:
+            if self._compaction is not None and self._compaction.is_alive():
+                return
+            self._compaction = threading.Thread(target=self.compact, daemon=True)
+            self._compaction.start()
+
+    def wait_for_compaction(self):
+        """Block until a running background compaction has swapped in"""
+        compaction = self._compaction
+        if compaction is not None:
+            compaction.join()
+
+    def compact(self):
+        """
+        Rebuild the index from live rows and swap it in
+
+        Writes made while the new index builds are carried over at the
+        swap: rows appended since the snapshot are copied in, rows deleted
+        since then are tombstoned in the new index.
+        """
+        self._check_writable()
+        with self._lock:
+            if self.index is None:
+                return
+            snapshot_rows = len(self.ids)
+            rows = np.flatnonzero(~self.tombstones)
+            vectors = self.index.reconstruct_batch(rows) if len(rows) else np.empty((0, self.dim), np.float32)
+            ids = [self.ids[row] for row in rows]
+            documents = [self.documents[row] for row in rows]
+            metadatas = [self.metadatas[row] for row in rows]
+            quantizer = faiss.clone_index(self.index.quantizer) if self.index_type == "ivf" else None
+            nlist = self.index.nlist if self.index_type == "ivf" else None
+
+        # The expensive part runs without the lock - queries are served
+        # from the old index meanwhile
+        index = self._build_index(nlist, quantizer)
+        index.add(vectors)
+        if self.index_type == "ivf":
+            index.make_direct_map()
+        metadata_index = MetadataIndex(metadatas)
+
+        with self._lock:
+            tombstones = self.tombstones[rows].copy()
+            appended = np.arange(snapshot_rows, len(self.ids))
+            appended = appended[~self.tombstones[appended]]
+            if len(appended):
+                index.add(self.index.reconstruct_batch(appended))
+                ids.extend(self.ids[row] for row in appended)
+                documents.extend(self.documents[row] for row in appended)
+                metadatas.extend(self.metadatas[row] for row in appended)
+                metadata_index.add([self.metadatas[row] for row in appended])
+                tombstones = np.concatenate([tombstones, np.zeros(len(appended), dtype=bool)])
+            self.index = index
+            self.ids, self.documents, self.metadatas = ids, documents, metadatas
+            self.metadata_index = metadata_index
+            self.tombstones = tombstones
+            self._positions = {record_id: row for row, record_id in enumerate(ids) if not tombstones[row]}
+
+    def _ann_params(self, mask):
+        """FAISS search parameters restricting results to rows in mask"""
+        bitmap = np.packbits(mask, bitorder="little")
+        selector = faiss.IDSelectorBitmap(len(mask), faiss.swig_ptr(bitmap))
+        if self.index_type == "hnsw":
+            params = faiss.SearchParametersHNSW(sel=selector, efSearch=self.config["ef_search"])
+        elif self.index_type == "ivf":
+            params = faiss.SearchParametersIVF(sel=selector, nprobe=self.index.nprobe)
+        else:
+            params = faiss.SearchParameters(sel=selector)
+        # The selector and its bitmap must outlive the search call
+        params.keep_alive = (selector, bitmap)
+        return params
+
+    def _exact_subset(self, queries, rows, k):
+        """Brute force over a few rows - exact, and never returns short"""
+        vectors = self.index.reconstruct_batch(rows)
+        scores = queries @ vectors.T
+        if self.config["metric"] != "cosine":
+            # Negated squared L2 (higher is better, like cosine) from the same
+            # matmul: -|q - v|^2 = 2 q.v - |q|^2 - |v|^2
+            scores *= 2
+            scores -= (queries ** 2).sum(axis=1)[:, None]
+            scores -= (vectors ** 2).sum(axis=1)[None, :]
+        best = top_k_indices(scores, k)
+        found = np.take_along_axis(scores, best, axis=-1)
+        # Rounding can leave a tiny negative distance for an exact match
+        return (found if self.config["metric"] == "cosine" else np.maximum(-found, 0)), rows[best]
+
+    def query(self, query_embeddings, n_results=3, where=None):
+        """
+        Search one or many query embeddings in a single FAISS call
+
+        where filters are compiled to a row mask first (see MetadataIndex)
+        and combined with the tombstone bitmap. Selective masks are
+        answered by brute force over the matching rows; broad ones by the
+        ANN index restricted to the mask.
+
+        Returns:
+            Chroma-shaped dict of per-query lists. distances are cosine
+            distance (1 - similarity) or squared L2, lower is closer.
+        """
+        queries = self._prepare(query_embeddings)
+        results = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        with self._lock:
+            k = min(n_results, self.count())
+            mask = None
+            if where and k:
+                mask = self.metadata_index.compile(where) & ~self.tombstones
+            elif k and self.tombstones.any():
+                mask = ~self.tombstones
+            if mask is not None:
+                rows = np.flatnonzero(mask)
+                k = min(k, len(rows))
+
+            if k == 0:
+                for key in results:
+                    results[key] = [[] for _ in range(len(queries))]
+                return results
+            if mask is None:
+                scores, labels = self.index.search(queries, k)
+            elif len(rows) <= self.brute_force_selectivity * len(mask):
+                scores, labels = self._exact_subset(queries, rows, k)
+            else:
+                scores, labels = self.index.search(queries, k, params=self._ann_params(mask))
+            ids, documents, metadatas = self.ids, self.documents, self.metadatas
+
+        for row_scores, row_labels in zip(scores, labels):
+            keep = row_labels >= 0
+            row_labels, row_scores = row_labels[keep], row_scores[keep]
+            if self.config["metric"] == "cosine":
+                row_scores = 1.0 - row_scores
+            results["ids"].append([ids[i] for i in row_labels])
+            results["documents"].append([documents[i] for i in row_labels])
+            results["metadatas"].append([metadatas[i] for i in row_labels])
+            results["distances"].append(np.asarray(row_scores).tolist())
+        return results
+
+    def _embed_query(self, query):
+        if self.embedder is None:
+            raise ValueError("semantic_search needs a store created with an embedder")
+        return embed_text(query, self.embedder, dimensions=self.dim, cache=self.cache)
+
+    def semantic_search(self, query, n_results=3):
+        """Search for documents similar to the query text."""
+        return self.query([self._embed_query(query)], n_results=n_results)
+
+    def filtered_search(self, query, category=None, n_results=3, where=None):
+        """
+        Search with metadata filtering.
+        category is a shortcut for where={"category": category}; where takes
+        compound filters ($and / $or / $in / ranges, see MetadataIndex).
+        """
+        if category:
+            where = {"$and": [{"category": category}, where]} if where else {"category": category}
+        return self.query([self._embed_query(query)], n_results=n_results, where=where)
+
+    def save(self, path):
+        """Write the index and records (tombstones included) to directory path"""
+        os.makedirs(path, exist_ok=True)
+        with self._lock:
+            if self.index is not None:
+                faiss.write_index(self.index, os.path.join(path, "index.faiss"))
+            with open(os.path.join(path, "store.json"), "w", encoding="utf-8") as f:
+                json.dump({
+                    "config": self.config,
+                    "ids": self.ids,
+                    "documents": self.documents,
+                    "metadatas": self.metadatas,
+                    "tombstones": np.flatnonzero(self.tombstones).tolist(),
+                    "next_id": self._next_id,
+                }, f)
+
+    @classmethod
+    def load(cls, path, embedder=None, n_threads=None, cache=None, mmap=False):
+        """
+        Read a store written by save()
+
+        mmap=True maps the index file instead of reading it (flat/IVF),
+        so several processes can share one copy via the page cache. The
+        mapped store is read-only: writes raise ValueError.
+        """
+        with open(os.path.join(path, "store.json"), encoding="utf-8") as f:
+            state = json.load(f)
+        store = cls(embedder=embedder, n_threads=n_threads, cache=cache, **state["config"])
+        index_path = os.path.join(path, "index.faiss")
+        if os.path.exists(index_path):
+            flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY if mmap else 0
+            store.index = faiss.read_index(index_path, flags)
+            if store.index_type == "ivf":
+                store.index.make_direct_map()
+        store.ids = state["ids"]
+        store.documents = state["documents"]
+        store.metadatas = state["metadatas"]
+        store.tombstones = np.zeros(len(store.ids), dtype=bool)
+        store.tombstones[state.get("tombstones", [])] = True
+        store._positions = {record_id: i for i, record_id in enumerate(store.ids) if not store.tombstones[i]}
+        store.metadata_index = MetadataIndex(store.metadatas)
+        # Stores saved before the counter existed numbered from len(ids)
+        store._next_id = state.get("next_id", len(store.ids))
+        store.read_only = bool(mmap)
+        return store
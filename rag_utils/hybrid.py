@@ -0,0 +1,263 @@
+"""
+Hybrid Retrieval: BM25 Keyword Index + Rank Fusion
+
+Embeddings are good at paraphrases but weak at exact tokens - error codes
+("E-1042"), product names, version strings. A small in-process BM25 index
+next to the vector collection catches those, and fusing the two rankings
+is far cheaper than raising n_results on the vector search.
+
+BM25Index
+- keyed by the same ids as the vector collection; upsert / delete keep it
+  in step incrementally (PersistentCollection.sync does this for you)
+- postings are compact typed arrays (uint32 slot, uint16 term frequency)
+  scored straight from their buffers with numpy, no per-posting Python
+- IDF and per-document length norms are precomputed once per batch of
+  changes, not per query
+- deletes are tombstones; slots are compacted once dead ones outnumber live ones
+
+Fusion
+- reciprocal_rank_fusion: score = sum(weight / (k + rank)), uses ranks only
+- weighted_fusion: min-max normalized scores, weighted sum
+"""
+
+import re
+from array import array
+
+import numpy as np
+
+# BM25 defaults (Robertson / Lucene)
+DEFAULT_K1 = 1.2
+DEFAULT_B = 0.75
+
+# Standard RRF constant from Cormack et al.
+DEFAULT_RRF_K = 60
+
+# Words, with "-", "." or "_" joined parts kept together: e-1042, v2.3, gpt-4o
+_TOKEN_RE = re.compile(r"\w+(?:[-._]\w+)*")
+_PART_RE = re.compile(r"[-._]")
+
+_MAX_TF = 0xFFFF
+
+
+def _typed(typecode, values):
+    """array.array from a numpy array, without a Python-level loop"""
+    packed = array(typecode)
+    packed.frombytes(values.tobytes())
+    return packed
+
+
+def tokenize(text):
+    """
+    Lowercased terms of text
+
+    Joined tokens are emitted whole and as their parts, so "E-1042"
+    matches queries for "e-1042" as well as "1042".
+    """
+    terms = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        terms.append(token)
+        if _PART_RE.search(token):
+            terms.extend(part for part in _PART_RE.split(token) if part)
+    return terms
+
+
+class BM25Index:
+    """
+    Incremental BM25 inverted index keyed by document id
+
+    Args:
+        k1: Term frequency saturation
+        b: Length normalization strength (0 = none, 1 = full)
+        tokenizer: Callable text -> list of terms
+    """
+
+    def __init__(self, k1=DEFAULT_K1, b=DEFAULT_B, tokenizer=tokenize):
+        self.k1 = k1
+        self.b = b
+        self.tokenizer = tokenizer
+        self._terms = {}                 # term -> term id
+        self._postings_slots = []        # term id -> array("I") of slots
+        self._postings_tfs = []          # term id -> array("H") of term frequencies
+        self._df = array("I")            # term id -> live document frequency
+        self._slot_ids = []              # slot -> id (None once deleted)
+        self._slot_terms = []            # slot -> array("I") of distinct term ids
+        self._lengths = array("I")       # slot -> document length in terms
+        self._slots = {}                 # id -> slot
+        self._total_length = 0
+        self._idf = None
+        self._norms = None
+        self._alive = None
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._slots
+
+    def ids(self):
+        """Ids of all indexed documents"""
+        return list(self._slots)
+
+    def upsert(self, ids, documents):
+        """Add documents, replacing any already indexed under the same id"""
+        ids = list(ids)
+        documents = list(documents)
+        if len(ids) != len(documents):
+            raise ValueError("ids and documents must have the same length")
+        if len(set(ids)) != len(ids):
+            raise ValueError("ids repeat within the batch")
+        self.delete([doc_id for doc_id in ids if doc_id in self._slots])
+        for doc_id, document in zip(ids, documents):
+            self._add(doc_id, self.tokenizer(document))
+        self._idf = None
+
+    def _add(self, doc_id, terms):
+        counts = {}
+        for term in terms:
+            counts[term] = counts.get(term, 0) + 1
+        slot = len(self._slot_ids)
+        term_ids = array("I")
+        for term, count in counts.items():
+            term_id = self._terms.get(term)
+            if term_id is None:
+                term_id = self._terms[term] = len(self._df)
+                self._postings_slots.append(array("I"))
+                self._postings_tfs.append(array("H"))
+                self._df.append(0)
+            self._postings_slots[term_id].append(slot)
+            self._postings_tfs[term_id].append(min(count, _MAX_TF))
+            self._df[term_id] += 1
+            term_ids.append(term_id)
+        self._slots[doc_id] = slot
+        self._slot_ids.append(doc_id)
+        self._slot_terms.append(term_ids)
+        self._lengths.append(len(terms))
+        self._total_length += len(terms)
+
+    def delete(self, ids):
+        """Remove documents by id (unknown ids are ignored)"""
+        for doc_id in ids:
+            slot = self._slots.pop(doc_id, None)
+            if slot is None:
+                continue
+            for term_id in self._slot_terms[slot]:
+                self._df[term_id] -= 1
+            self._total_length -= self._lengths[slot]
+            self._slot_ids[slot] = None
+            self._slot_terms[slot] = array("I")
+        self._idf = None
+        if len(self._slot_ids) > 2 * len(self._slots) + 1024:
+            self.compact()
+
+    def compact(self):
+        """Drop deleted slots from every posting list and renumber"""
+        alive = np.array([doc_id is not None for doc_id in self._slot_ids], dtype=bool)
+        remap = np.cumsum(alive, dtype=np.int64) - 1
+        for term_id, slots in enumerate(self._postings_slots):
+            if not slots:
+                continue
+            slot_array = np.frombuffer(slots, dtype=np.uint32)
+            keep = alive[slot_array]
+            tfs = np.frombuffer(self._postings_tfs[term_id], dtype=np.uint16)
+            self._postings_slots[term_id] = _typed("I", remap[slot_array[keep]].astype(np.uint32))
+            self._postings_tfs[term_id] = _typed("H", tfs[keep])
+        self._slot_ids = [doc_id for doc_id in self._slot_ids if doc_id is not None]
+        self._slot_terms = [terms for terms, live in zip(self._slot_terms, alive) if live]
+        self._lengths = _typed("I", np.frombuffer(self._lengths, dtype=np.uint32)[alive])
+        self._slots = {doc_id: slot for slot, doc_id in enumerate(self._slot_ids)}
+        self._idf = None
+
+    def _refresh(self):
+        """Precompute IDF per term, the length norm and liveness per slot"""
+        self._alive = np.array([doc_id is not None for doc_id in self._slot_ids], dtype=bool)
+        n_docs = len(self._slots)
+        df = np.frombuffer(self._df, dtype=np.uint32).astype(np.float64)
+        # Lucene's variant: always positive, even for very common terms
+        self._idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+        average_length = self._total_length / n_docs if n_docs else 0.0
+        lengths = np.frombuffer(self._lengths, dtype=np.uint32).astype(np.float64)
+        if average_length:
+            self._norms = self.k1 * (1 - self.b + self.b * lengths / average_length)
+        else:
+            self._norms = np.full(len(lengths), self.k1)
+
+    def scores(self, query):
+        """BM25 score of every slot for query (deleted slots score 0)"""
+        if self._idf is None:
+            self._refresh()
+        scores = np.zeros(len(self._slot_ids), dtype=np.float64)
+        for term in set(self.tokenizer(query)):
+            term_id = self._terms.get(term)
+            if term_id is None or not self._df[term_id]:
+                continue
+            slots = np.frombuffer(self._postings_slots[term_id], dtype=np.uint32)
+            tfs = np.frombuffer(self._postings_tfs[term_id], dtype=np.uint16).astype(np.float64)
+            scores[slots] += self._idf[term_id] * tfs * (self.k1 + 1) / (tfs + self._norms[slots])
+        scores[~self._alive] = 0.0
+        return scores
+
+    def search(self, query, top_k=10):
+        """
+        Top documents for a keyword query
+
+        Returns:
+            (ids, scores) - ids list and float array, best first; only
+            documents sharing at least one term with the query
+        """
+        if top_k <= 0:
+            return [], np.zeros(0, dtype=np.float64)
+        scores = self.scores(query)
+        hits = np.flatnonzero(scores > 0)
+        if len(hits) > top_k:
+            hits = hits[np.argpartition(-scores[hits], top_k - 1)[:top_k]]
+        hits = hits[np.argsort(-scores[hits], kind="stable")]
+        return [self._slot_ids[slot] for slot in hits], scores[hits]
+
+
+def reciprocal_rank_fusion(rankings, k=DEFAULT_RRF_K, weights=None, top_k=None):
+    """
+    Fuse ranked id lists by reciprocal rank
+
+    Args:
+        rankings: List of id lists, each best first (e.g. vector hits, BM25 hits)
+        k: Damping constant - larger values flatten the rank curve
+        weights: Optional weight per ranking (default 1 each)
+        top_k: Optional number of results to keep
+
+    Returns:
+        List of (id, fused score), best first
+    """
+    weights = weights or [1.0] * len(rankings)
+    fused = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, doc_id in enumerate(ranking, 1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + weight / (k + rank)
+    ranked = sorted(fused.items(), key=lambda item: item[1], reverse=True)
+    return ranked[:top_k] if top_k else ranked
+
+
+def weighted_fusion(results, weights=None, top_k=None):
+    """
+    Fuse scored results by a weighted sum of min-max normalized scores
+
+    Args:
+        results: List of (ids, scores) pairs, higher score = better.
+                 Pass negated distances for Chroma results.
+        weights: Optional weight per result list (default 1 each)
+        top_k: Optional number of results to keep
+
+    Returns:
+        List of (id, fused score), best first
+    """
+    weights = weights or [1.0] * len(results)
+    fused = {}
+    for (ids, scores), weight in zip(results, weights):
+        scores = np.asarray(scores, dtype=np.float64)
+        if not len(scores):
+            continue
+        spread = scores.max() - scores.min()
+        normalized = (scores - scores.min()) / spread if spread > 0 else np.ones_like(scores)
+        for doc_id, score in zip(ids, normalized):
+            fused[doc_id] = fused.get(doc_id, 0.0) + weight * float(score)
+    ranked = sorted(fused.items(), key=lambda item: item[1], reverse=True)
+    return ranked[:top_k] if top_k else ranked
@@ -0,0 +1,124 @@
+"""
+Streaming Ingestion
+
+Pulls (id, document, metadata) records from any iterator, embeds them a
+batch at a time and upserts each batch into the collection as soon as it
+is embedded. Only one batch of texts and vectors is alive at once, so
+peak memory stays flat however large the corpus is, and no single call
+exceeds the collection's maximum batch size.
+
+With a checkpoint file an interrupted run resumes after the last batch
+that was written. Upserts are idempotent, so a batch that was in flight
+when the run died is simply written again. A run that completes removes
+the checkpoint, so the next run ingests from the start.
+"""
+
+import json
+import os
+from itertools import islice
+
+from .embeddings import embed_texts
+
+DEFAULT_BATCH_SIZE = 256
+
+
+def load_checkpoint(path):
+    """Progress recorded by a previous run ({} if none)"""
+    if path is None or not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_checkpoint(path, state):
+    """Write progress atomically so a crash never leaves half a file"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def ingest_stream(collection, records, embedder, batch_size=DEFAULT_BATCH_SIZE,
+                  checkpoint_path=None, dimensions=None, cache=None, on_batch=None):
+    """
+    Embed and upsert records in bounded batches
+
+    Args:
+        collection: Chroma collection (anything with upsert(ids=..., ...))
+        records: Iterable of (id, document, metadata) - metadata may be None.
+                 Records with and without metadata in one batch are
+                 upserted in two calls (Chroma rejects both None and {}
+                 in some versions).
+                 Must yield records in the same order on every run when
+                 resuming from a checkpoint.
+        embedder: OpenAI client or EmbeddingProvider
+        batch_size: Records per embed + upsert round. Keep it at or below
+                    chroma_client.get_max_batch_size().
+        checkpoint_path: Optional JSON file recording progress, deleted
+                         once every record is written. Only useful with a
+                         persistent collection - an in-memory one starts
+                         empty on every run.
+        dimensions: Optional shortened embedding size
+        cache: Optional EmbeddingCache
+        on_batch: Optional callback(stats) after every written batch
+
+    Returns:
+        Dict with counts of ingested and skipped records and batches
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be positive")
+
+    checkpoint = load_checkpoint(checkpoint_path)
+    already_done = checkpoint.get("done", 0)
+    stats = {"ingested": 0, "skipped": 0, "batches": 0}
+    records = iter(records)
+
+    # Skip what a previous run already wrote, checking the source still
+    # lines up with the checkpoint
+    last_id = None
+    for record_id, _, _ in islice(records, already_done):
+        last_id = record_id
+        stats["skipped"] += 1
+    if already_done and last_id != checkpoint.get("last_id"):
+        raise ValueError(
+            f"Checkpoint {checkpoint_path} expected record {already_done} to be "
+            f"{checkpoint.get('last_id')!r}, found {last_id!r} - did the source change?"
+        )
+
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            break
+        ids = [record_id for record_id, _, _ in batch]
+        documents = [document for _, document, _ in batch]
+        embeddings = embed_texts(documents, embedder, dimensions=dimensions, cache=cache)
+
+        with_metadata = [i for i, (_, _, metadata) in enumerate(batch) if metadata]
+        without_metadata = [i for i, (_, _, metadata) in enumerate(batch) if not metadata]
+        for rows in (with_metadata, without_metadata):
+            if not rows:
+                continue
+            upsert_kwargs = {}
+            if rows is with_metadata:
+                upsert_kwargs["metadatas"] = [batch[i][2] for i in rows]
+            collection.upsert(
+                ids=[ids[i] for i in rows],
+                documents=[documents[i] for i in rows],
+                embeddings=embeddings[rows],
+                **upsert_kwargs
+            )
+
+        stats["ingested"] += len(batch)
+        stats["batches"] += 1
+        if checkpoint_path is not None:
+            save_checkpoint(checkpoint_path, {
+                "done": already_done + stats["ingested"],
+                "last_id": ids[-1],
+            })
+        if on_batch is not None:
+            on_batch(stats)
+
+    # Finished: a later run over the same source starts from the beginning
+    if checkpoint_path is not None and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return stats
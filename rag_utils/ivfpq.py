@@ -0,0 +1,201 @@
+"""
+IVF-PQ Compressed Index Tier
+
+At tens of millions of 1536-d vectors even float16 (3 KB per vector) no
+longer fits in RAM. IVF-PQ (faiss IndexIVFPQ) stores each vector as m
+one-byte codes - 64 bytes instead of 6 KB, ~100x smaller:
+
+- IVF: k-means buckets the corpus into nlist lists; a query scans only
+  the nprobe closest lists
+- PQ: each vector's residual to its list centroid is split into m
+  sub-vectors, each replaced by the id of its nearest of 2^nbits
+  sub-centroids
+- ADC (asymmetric distance computation): the query stays in float32;
+  per list, a small table of query / sub-centroid products turns scoring
+  a code into m table lookups
+
+Both codebooks are trained on a random sample, not the whole corpus.
+PQ scores are approximate, so the top `rescore` candidates are re-ranked
+against full-precision vectors - typically a snapshot's np.memmap, where
+only the candidate rows are ever read from disk.
+"""
+
+import time
+
+import faiss
+import numpy as np
+
+from .quantization import recall_at_k, rescore_candidates
+from .vector_index import VectorIndex, normalize_rows, prepare_queries
+
+# Training sample drawn from the corpus by build()
+DEFAULT_TRAIN_SAMPLE = 100_000
+
+# Rows normalized and added at a time (bounds memory when reading a memmap)
+ADD_BLOCK_ROWS = 65536
+
+# FAISS wants ~39 training points per centroid
+_POINTS_PER_CENTROID = 39
+
+
+class IVFPQIndex:
+    """
+    Cosine search over IVF-PQ codes with optional full-precision rerank
+
+    Args:
+        dim: Vector dimension
+        nlist: IVF lists (clipped to what the training sample supports)
+        m: PQ sub-quantizers = code bytes per vector at nbits=8; must divide dim
+        nbits: Bits per sub-quantizer code
+        nprobe: Lists scanned per query
+        full_vectors: Optional (n, dim) full-precision vectors, row i =
+                      i-th vector added (array or np.memmap), for rescore
+    """
+
+    def __init__(self, dim, nlist=4096, m=64, nbits=8, nprobe=32, full_vectors=None):
+        if dim % m:
+            raise ValueError(f"m={m} must divide dim={dim}")
+        self.dim = dim
+        self.nlist = nlist
+        self.m = m
+        self.nbits = nbits
+        self.nprobe = nprobe
+        self.full_vectors = full_vectors
+        self.index = None
+
+    @classmethod
+    def build(cls, vectors, sample_size=DEFAULT_TRAIN_SAMPLE, seed=42, **kwargs):
+        """
+        Train on a random sample of vectors, then add all of them
+
+        vectors may be an np.memmap (e.g. Snapshot.vectors); it is read in
+        blocks and also becomes full_vectors unless one is passed.
+        """
+        kwargs.setdefault("full_vectors", vectors)
+        index = cls(vectors.shape[1], **kwargs)
+        rng = np.random.default_rng(seed)
+        sample_rows = np.sort(rng.choice(len(vectors), min(sample_size, len(vectors)), replace=False))
+        index.train(vectors[sample_rows])
+        for start in range(0, len(vectors), ADD_BLOCK_ROWS):
+            index.add(vectors[start:start + ADD_BLOCK_ROWS])
+        return index
+
+    def train(self, sample):
+        """Learn IVF centroids and PQ codebooks from a sample"""
+        sample = normalize_rows(sample)
+        nlist = max(1, min(self.nlist, len(sample) // _POINTS_PER_CENTROID))
+        if len(sample) < _POINTS_PER_CENTROID * 2 ** self.nbits:
+            raise ValueError(f"need at least {_POINTS_PER_CENTROID * 2 ** self.nbits} training vectors "
+                             f"for {self.nbits}-bit codes, got {len(sample)}")
+        quantizer = faiss.IndexFlatIP(self.dim)
+        self.index = faiss.IndexIVFPQ(quantizer, self.dim, nlist, self.m, self.nbits,
+                                      faiss.METRIC_INNER_PRODUCT)
+        self.index.train(sample)
+
+    def add(self, vectors):
+        """Encode and append vectors (labels continue from len(self))"""
+        if self.index is None:
+            raise ValueError("train() the index before adding vectors")
+        self.index.add(normalize_rows(vectors))
+
+    def __len__(self):
+        return self.index.ntotal if self.index is not None else 0
+
+    @property
+    def nbytes(self):
+        """Bytes held in RAM: codes, list ids, coarse centroids and PQ codebooks"""
+        if self.index is None:
+            return 0
+        codes = self.index.ntotal * (self.index.code_size + 8)  # + int64 label per entry
+        centroids = self.index.nlist * self.dim * 4
+        codebooks = faiss.vector_to_array(self.index.pq.centroids).nbytes
+        return codes + centroids + codebooks
+
+    @property
+    def compression_ratio(self):
+        """float32 corpus size / index size"""
+        return len(self) * self.dim * 4 / self.nbytes if len(self) else 0.0
+
+    def search(self, query_vector, top_k=5, rescore=0):
+        """Same as search_many for a single query, returns 1-D arrays"""
+        indices, scores = self.search_many(np.asarray(query_vector)[None, :], top_k, rescore)
+        return indices[0], scores[0]
+
+    def search_many(self, query_vectors, top_k=5, rescore=0):
+        """
+        ADC search, optionally re-ranked in float32
+
+        Args:
+            query_vectors: (n_queries, dim) float vectors
+            top_k: Results per query
+            rescore: If > 0, take this many PQ candidates and re-rank them
+                     against full_vectors
+
+        Returns:
+            (indices, scores) - shape (n_queries, top_k), padded with
+            -1 / -inf when the probed lists hold fewer vectors
+        """
+        queries = prepare_queries(query_vectors, self.dim)
+        self.index.nprobe = min(self.nprobe, self.index.nlist)
+        if not rescore:
+            scores, indices = self.index.search(queries, top_k)
+            scores[indices < 0] = -np.inf
+            return indices.astype(np.intp), scores
+        if self.full_vectors is None:
+            raise ValueError("rescore needs full_vectors")
+        _, candidates = self.index.search(queries, max(rescore, top_k))
+        return rescore_candidates(self.full_vectors, queries, candidates, top_k)
+
+    def save(self, path):
+        """Write the trained index (codes included) to path"""
+        faiss.write_index(self.index, path)
+
+    @classmethod
+    def load(cls, path, full_vectors=None, nprobe=32):
+        """Read an index written by save()"""
+        faiss_index = faiss.read_index(path)
+        index = cls(faiss_index.d, nlist=faiss_index.nlist, m=faiss_index.pq.M,
+                    nbits=faiss_index.pq.nbits, nprobe=nprobe, full_vectors=full_vectors)
+        index.index = faiss_index
+        return index
+
+
+def ivfpq_recall_report(vectors, query_vectors, top_k=10, rescore_depths=(0, 100),
+                        nprobes=(8, 32), full_vectors=None, **kwargs):
+    """
+    Compare IVF-PQ search against the exact float32 baseline
+
+    Args:
+        vectors: Corpus (array or np.memmap)
+        full_vectors: Rerank source (default: vectors)
+        kwargs: IVFPQIndex / build() arguments (nlist, m, nbits, sample_size)
+
+    Returns:
+        List of dicts (one per nprobe / rescore depth) with memory,
+        compression ratio, recall@k and mean latency per query
+    """
+    baseline = VectorIndex(vectors)
+    start = time.perf_counter()
+    truth, _ = baseline.search_many(query_vectors, top_k)
+    baseline_ms = (time.perf_counter() - start) * 1000 / len(query_vectors)
+
+    rows = [{
+        "index": "float32", "nprobe": 0, "rescore": 0, "bytes": baseline.vectors.nbytes,
+        "compression": 1.0, f"recall@{top_k}": 1.0, "ms_per_query": baseline_ms,
+    }]
+    start = time.perf_counter()
+    index = IVFPQIndex.build(vectors, full_vectors=full_vectors if full_vectors is not None else vectors,
+                             **kwargs)
+    build_s = time.perf_counter() - start
+    for nprobe in nprobes:
+        index.nprobe = nprobe
+        for rescore in rescore_depths:
+            start = time.perf_counter()
+            found, _ = index.search_many(query_vectors, top_k, rescore=rescore)
+            elapsed_ms = (time.perf_counter() - start) * 1000 / len(query_vectors)
+            rows.append({
+                "index": "ivfpq", "nprobe": nprobe, "rescore": rescore, "bytes": index.nbytes,
+                "compression": index.compression_ratio, f"recall@{top_k}": recall_at_k(found, truth),
+                "ms_per_query": elapsed_ms, "build_s": build_s,
+            })
+    return rows
@@ -0,0 +1,218 @@
+"""
+Metadata Pre-Filter Index
+
+Post-filtering an ANN result (search first, drop non-matching hits) returns
+fewer than n_results hits for selective filters, or forces a large
+over-fetch. Pre-filtering instead compiles the filter to a boolean mask
+over all rows *before* the vector search.
+
+MetadataIndex keeps every metadata key as a typed column:
+- strings / bools: int32 category codes, with a packed per-value bitmap
+  built on first use and cached
+- numbers: float64 array (NaN = missing) for range predicates
+- keys mixing numbers with strings / bools are categorical; a numeric
+  column that later gets a string is converted, and range filters on
+  it raise ValueError
+
+Filters use Chroma's where syntax:
+    {"category": "security"}
+    {"category": {"$in": ["security", "account"]}}
+    {"$and": [{"category": "account"}, {"year": {"$gte": 2023}}]}
+    {"$or": [...]}     operators: $eq $ne $in $nin $gt $gte $lt $lte
+
+masked_search then picks a strategy by selectivity: brute force over the
+matching subset when few rows match, a masked full scan / ANN otherwise.
+"""
+
+import numpy as np
+
+from .vector_index import prepare_queries, top_k_indices
+
+# Below this fraction of matching rows, scoring just the subset wins
+DEFAULT_BRUTE_FORCE_SELECTIVITY = 0.05
+
+_RANGE_OPS = {
+    "$gt": np.greater,
+    "$gte": np.greater_equal,
+    "$lt": np.less,
+    "$lte": np.less_equal,
+}
+
+
+class MetadataIndex:
+    """
+    Inverted index over metadata dicts, compiling filters to row masks
+
+    Args:
+        metadatas: Optional initial list of dicts (None entries allowed)
+    """
+
+    def __init__(self, metadatas=None):
+        self.count = 0
+        self._codes = {}        # key -> int32 codes (-1 missing)
+        self._categories = {}   # key -> {value: code}
+        self._numbers = {}      # key -> float64 values (NaN missing)
+        self._bitmaps = {}      # (key, code) -> packed bitmap
+        if metadatas is not None:
+            self.add(metadatas)
+
+    def __len__(self):
+        return self.count
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """Index the metadata columns of a Snapshot (arrays are not copied)"""
+        index = cls()
+        index.count = snapshot.count
+        for name, descriptor in snapshot.columns.items():
+            column = snapshot.column(name)
+            if descriptor["kind"] == "number":
+                index._numbers[name] = column
+            elif descriptor["kind"] == "bool":
+                index._codes[name] = column.astype(np.int32)
+                index._categories[name] = {False: 0, True: 1}
+            else:
+                index._codes[name] = column
+                index._categories[name] = {value: code for code, value in enumerate(descriptor["categories"])}
+        return index
+
+    def add(self, metadatas):
+        """Append rows (row numbers continue from the current count)"""
+        metadatas = [metadata or {} for metadata in metadatas]
+        new = len(metadatas)
+        keys = {key for metadata in metadatas for key in metadata} | set(self._codes) | set(self._numbers)
+        for key in keys:
+            values = [metadata.get(key) for metadata in metadatas]
+            present = [value for value in values if value is not None]
+            numeric = present and all(
+                isinstance(value, (int, float)) and not isinstance(value, bool) for value in present
+            )
+            if key in self._numbers and present and not numeric:
+                self._to_categorical(key)
+            if key in self._numbers or (numeric and key not in self._codes):
+                column = np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+                self._numbers[key] = self._append(self._numbers.get(key), column, np.nan)
+            else:
+                lookup = self._categories.setdefault(key, {})
+                codes = np.array([-1 if value is None else lookup.setdefault(value, len(lookup))
+                                  for value in values], dtype=np.int32)
+                self._codes[key] = self._append(self._codes.get(key), codes, -1)
+        self.count += new
+        self._bitmaps.clear()
+
+    def _to_categorical(self, key):
+        """Re-encode a numeric column as category codes (equal ints and floats share a code)"""
+        numbers = self._numbers.pop(key)
+        lookup = self._categories.setdefault(key, {})
+        self._codes[key] = np.array([-1 if np.isnan(value) else lookup.setdefault(value.item(), len(lookup))
+                                     for value in numbers], dtype=np.int32)
+
+    def _append(self, existing, column, missing):
+        """Concatenate, padding keys that earlier rows never had"""
+        if existing is None:
+            existing = np.full(self.count, missing, dtype=column.dtype)
+        return np.concatenate([existing, column])
+
+    def bitmap(self, key, value):
+        """Packed bitmap (bit i = row i) of rows where key == value"""
+        code = self._categories.get(key, {}).get(value)
+        if code is None:
+            return np.packbits(np.zeros(self.count, dtype=bool), bitorder="little")
+        if (key, code) not in self._bitmaps:
+            self._bitmaps[(key, code)] = np.packbits(self._codes[key] == code, bitorder="little")
+        return self._bitmaps[(key, code)]
+
+    def _unpack(self, bitmap):
+        return np.unpackbits(bitmap, count=self.count, bitorder="little").astype(bool)
+
+    def _field(self, key, condition):
+        """Mask for one {key: condition} clause"""
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        mask = np.ones(self.count, dtype=bool)
+        for op, operand in condition.items():
+            if key in self._numbers and op in _RANGE_OPS:
+                # NaN compares False, so missing values never match
+                mask &= _RANGE_OPS[op](self._numbers[key], operand)
+            elif key in self._numbers and op in ("$eq", "$ne", "$in", "$nin"):
+                values = self._numbers[key]
+                hits = np.isin(values, operand if op in ("$in", "$nin") else [operand])
+                mask &= ~hits & ~np.isnan(values) if op in ("$ne", "$nin") else hits
+            elif op in ("$eq", "$in"):
+                operands = operand if op == "$in" else [operand]
+                packed = np.zeros((self.count + 7) // 8, dtype=np.uint8)
+                for value in operands:
+                    packed |= self.bitmap(key, value)
+                mask &= self._unpack(packed)
+            elif op in ("$ne", "$nin"):
+                operands = operand if op == "$nin" else [operand]
+                packed = np.zeros((self.count + 7) // 8, dtype=np.uint8)
+                for value in operands:
+                    packed |= self.bitmap(key, value)
+                present = self._codes[key] >= 0 if key in self._codes else np.zeros(self.count, dtype=bool)
+                mask &= present & ~self._unpack(packed)
+            elif op in _RANGE_OPS:
+                raise ValueError(f"{op} needs a numeric field, {key!r} is not one")
+            else:
+                raise ValueError(f"Unsupported operator {op!r}")
+        return mask
+
+    def compile(self, where):
+        """
+        Evaluate a where filter to a boolean mask over all rows
+
+        Returns:
+            bool array of length len(self); all True for an empty filter
+        """
+        if not where:
+            return np.ones(self.count, dtype=bool)
+        mask = np.ones(self.count, dtype=bool)
+        for key, condition in where.items():
+            if key == "$and":
+                for clause in condition:
+                    mask &= self.compile(clause)
+            elif key == "$or":
+                either = np.zeros(self.count, dtype=bool)
+                for clause in condition:
+                    either |= self.compile(clause)
+                mask &= either
+            else:
+                mask &= self._field(key, condition)
+        return mask
+
+    def selectivity(self, where):
+        """Fraction of rows a filter keeps"""
+        return float(self.compile(where).mean()) if self.count else 0.0
+
+
+def masked_search(vectors, query_vectors, mask, top_k=5,
+                  brute_force_selectivity=DEFAULT_BRUTE_FORCE_SELECTIVITY):
+    """
+    Exact cosine top-k restricted to rows where mask is True
+
+    Args:
+        vectors: (n, dim) L2-normalized vectors (VectorIndex.vectors, a
+                 Snapshot's vectors, ...)
+        query_vectors: (n_queries, dim) float vectors
+        mask: bool array of length n, e.g. MetadataIndex.compile(where)
+        brute_force_selectivity: Below this fraction of matching rows only
+                                 the subset is scored; above it every row
+                                 is scored and non-matching ones are masked
+
+    Returns:
+        (indices, scores) - arrays of shape (n_queries, k), k <= top_k
+    """
+    queries = prepare_queries(query_vectors, vectors.shape[1])
+    rows = np.flatnonzero(mask)
+    if len(rows) == 0:
+        return np.empty((len(queries), 0), dtype=np.intp), np.empty((len(queries), 0), dtype=np.float32)
+
+    if len(rows) <= brute_force_selectivity * len(mask):
+        scores = queries @ np.asarray(vectors[rows], dtype=np.float32).T
+        best = top_k_indices(scores, top_k)
+        return rows[best], np.take_along_axis(scores, best, axis=-1)
+
+    scores = queries @ np.asarray(vectors, dtype=np.float32).T
+    scores[:, ~mask] = -np.inf
+    best = top_k_indices(scores, min(top_k, len(rows)))
+    return best, np.take_along_axis(scores, best, axis=-1)
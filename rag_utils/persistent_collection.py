@@ -0,0 +1,212 @@
+"""
+Persistent Chroma Collections with Incremental Sync
+
+chromadb.Client() is in-memory, so every process start re-embeds and
+re-inserts the whole corpus. PersistentCollection keeps the collection on
+disk and stores a content hash in each record's metadata; sync() then
+only embeds new or changed documents and deletes the ones that are gone.
+A restart with an unchanged corpus makes no embedding calls at all.
+
+An optional BM25Index (see hybrid.py) is kept in step by the same sync, so
+keyword and vector results share ids.
+
+The HNSW index is configured explicitly: distance space (Chroma defaults
+to "l2", which makes "1 - distance" meaningless), graph degree M and
+ef_construction (fixed once built) and ef_search (adjustable any time).
+See benchmarks/hnsw-tuning.py for picking them.
+"""
+
+import hashlib
+import json
+from itertools import islice
+
+import chromadb
+
+from .ingest import DEFAULT_BATCH_SIZE, ingest_stream
+from .providers import as_provider
+
+# Metadata key holding the content hash (shows up in query results too)
+HASH_KEY = "_content_hash"
+
+# Page size when listing existing records
+_LIST_PAGE = 5000
+
+HNSW_SPACES = ("cosine", "l2", "ip")
+DEFAULT_SPACE = "cosine"
+
+
+def hnsw_configuration(space=DEFAULT_SPACE, m=None, ef_construction=None, ef_search=None):
+    """
+    Chroma collection configuration for the HNSW index
+
+    Args:
+        space: "cosine", "l2" (squared L2) or "ip" (1 - inner product)
+        m: Graph neighbours per node - more = better recall, more memory
+        ef_construction: Candidate list size while building
+        ef_search: Candidate list size while querying - recall vs latency
+        (None keeps Chroma's default)
+    """
+    if space not in HNSW_SPACES:
+        raise ValueError(f"space must be one of {HNSW_SPACES}, got {space!r}")
+    hnsw = {"space": space}
+    for key, value in (("max_neighbors", m), ("ef_construction", ef_construction), ("ef_search", ef_search)):
+        if value is not None:
+            hnsw[key] = value
+    return {"hnsw": hnsw}
+
+
+def similarity_from_distance(distance, space=DEFAULT_SPACE):
+    """
+    Cosine similarity from a Chroma distance (embeddings L2-normalized)
+
+    cosine / ip distances are 1 - similarity; squared L2 between unit
+    vectors is 2 - 2 * similarity.
+    """
+    return 1 - distance / 2 if space == "l2" else 1 - distance
+
+
+class PersistentCollection:
+    """
+    Get-or-create Chroma collection kept in sync with a document set
+
+    Args:
+        path: Directory for chromadb.PersistentClient
+        name: Collection name
+        embedder: OpenAI client or EmbeddingProvider
+        metadata: Collection metadata (only applied when it is created)
+        dimensions: Optional shortened embedding size
+        cache: Optional EmbeddingCache
+        batch_size: Records per embed + upsert round
+        keyword_index: Optional BM25Index updated alongside the collection
+        space / hnsw_m / ef_construction / ef_search: HNSW settings (see
+            hnsw_configuration). An existing collection built with another
+            space, M or ef_construction is dropped and rebuilt by the next
+            sync() - from the embedding cache when one is given.
+    """
+
+    def __init__(self, path, name, embedder, metadata=None, dimensions=None,
+                 cache=None, batch_size=DEFAULT_BATCH_SIZE, keyword_index=None,
+                 space=DEFAULT_SPACE, hnsw_m=None, ef_construction=None, ef_search=None):
+        self.client = chromadb.PersistentClient(path=path)
+        self.space = space
+        configuration = hnsw_configuration(space, hnsw_m, ef_construction, ef_search)
+        self.collection = self.client.get_or_create_collection(
+            name=name, metadata=metadata, configuration=configuration
+        )
+        # get_or_create ignores the configuration of an existing collection
+        existing = self.collection.configuration["hnsw"]
+        fixed = {key: value for key, value in configuration["hnsw"].items() if key != "ef_search"}
+        if any(existing.get(key) != value for key, value in fixed.items()):
+            self.client.delete_collection(name)
+            self.collection = self.client.create_collection(
+                name=name, metadata=metadata, configuration=configuration
+            )
+        elif ef_search is not None and existing.get("ef_search") != ef_search:
+            # Takes effect when the index is loaded, i.e. before the first query
+            self.collection.modify(configuration={"hnsw": {"ef_search": ef_search}})
+        self.embedder = embedder
+        self.dimensions = dimensions
+        self.cache = cache
+        self.keyword_index = keyword_index
+        self.batch_size = min(batch_size, self.client.get_max_batch_size())
+
+    def similarity(self, distance):
+        """Cosine similarity for a distance returned by this collection"""
+        return similarity_from_distance(distance, self.space)
+
+    def content_hash(self, document, metadata):
+        """
+        Hash of everything that ends up in a record
+
+        The embedding model and size are included, so switching providers
+        re-embeds the corpus instead of mixing vector spaces.
+        """
+        payload = json.dumps({
+            "document": document,
+            "metadata": metadata or {},
+            "embedder": as_provider(self.embedder).name,
+            "dimensions": self.dimensions,
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def stored_hashes(self):
+        """{id: content hash} for every record already in the collection"""
+        hashes = {}
+        offset = 0
+        while True:
+            page = self.collection.get(include=["metadatas"], limit=_LIST_PAGE, offset=offset)
+            for record_id, metadata in zip(page["ids"], page["metadatas"]):
+                hashes[record_id] = (metadata or {}).get(HASH_KEY)
+            if len(page["ids"]) < _LIST_PAGE:
+                return hashes
+            offset += _LIST_PAGE
+
+    def sync(self, documents, ids, metadatas=None):
+        """
+        Make the collection match exactly these documents
+
+        Returns:
+            Dict with counts of added, updated, deleted and unchanged records
+        """
+        documents = list(documents)
+        ids = list(ids)
+        metadatas = list(metadatas) if metadatas is not None else [None] * len(documents)
+        if not len(documents) == len(ids) == len(metadatas):
+            raise ValueError("documents, ids and metadatas must have the same length")
+        if len(set(ids)) != len(ids):
+            raise ValueError("ids must be unique")
+
+        stored = self.stored_hashes()
+        changes = {"added": 0, "updated": 0, "deleted": 0, "unchanged": 0}
+        pending = []
+        keyword_pending = []
+        for record_id, document, metadata in zip(ids, documents, metadatas):
+            digest = self.content_hash(document, metadata)
+            if stored.get(record_id) == digest:
+                changes["unchanged"] += 1
+                # The keyword index lives in memory: fill it after a restart
+                if self.keyword_index is not None and record_id not in self.keyword_index:
+                    keyword_pending.append((record_id, document))
+                continue
+            changes["updated" if record_id in stored else "added"] += 1
+            pending.append((record_id, document, {**(metadata or {}), HASH_KEY: digest}))
+            keyword_pending.append((record_id, document))
+
+        if pending:
+            ingest_stream(self.collection, pending, self.embedder, batch_size=self.batch_size,
+                          dimensions=self.dimensions, cache=self.cache)
+        if self.keyword_index is not None:
+            if keyword_pending:
+                self.keyword_index.upsert(*zip(*keyword_pending))
+            wanted = set(ids)
+            self.keyword_index.delete([record_id for record_id in self.keyword_index.ids()
+                                       if record_id not in wanted])
+
+        removed = iter(set(stored) - set(ids))
+        while True:
+            batch = list(islice(removed, self.batch_size))
+            if not batch:
+                break
+            self.collection.delete(ids=batch)
+            changes["deleted"] += len(batch)
+
+        return changes
+
+    def query_many(self, query_embeddings, n_results=3, where=None):
+        """
+        Search many query embeddings with as few collection.query calls as
+        the client's batch limit allows
+
+        Returns:
+            Chroma-shaped dict of per-query lists, in query order
+        """
+        results = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        for start in range(0, len(query_embeddings), self.batch_size):
+            batch = self.collection.query(
+                query_embeddings=query_embeddings[start:start + self.batch_size],
+                n_results=n_results,
+                where=where
+            )
+            for key in results:
+                results[key].extend(batch[key])
+        return results
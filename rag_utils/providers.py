@@ -0,0 +1,184 @@
+"""
+Embedding Providers
+
+Everything that turns text into vectors goes through an EmbeddingProvider,
+so the same indexing and retrieval code can run against the OpenAI API or
+fully offline:
+
+- OpenAIEmbeddingProvider: the embeddings API (what get_embedding used)
+- HashingEmbeddingProvider: hashed character n-grams with optional IDF
+  weighting, computed with NumPy a whole batch at a time. No network, no
+  model download - good for air-gapped ingestion and for benchmarks that
+  must not be dominated by provider latency. It captures lexical overlap,
+  not meaning, so do not compare its scores with OpenAI ones.
+
+Set EMBEDDING_PROVIDER=local to make provider_from_env pick the offline one.
+"""
+
+import os
+import zlib
+
+import numpy as np
+
+DEFAULT_MODEL = "text-embedding-3-small"
+
+_FNV_OFFSET = np.uint64(0xCBF29CE484222325)
+_FNV_PRIME = np.uint64(0x100000001B3)
+
+
+def dimensions_kwargs(dimensions):
+    """Only send dimensions when set - older models reject the parameter"""
+    return {"dimensions": dimensions} if dimensions is not None else {}
+
+
+class EmbeddingProvider:
+    """
+    Base class for embedding backends
+
+    Subclasses set name (used in cache keys, so it must change whenever
+    the vectors would) and implement embed_batch.
+    """
+
+    name = "provider"
+
+    def embed_batch(self, texts, dimensions=None):
+        """
+        Embed one batch of already normalized texts
+
+        Returns:
+            float32 matrix of shape (len(texts), dim), rows in input order
+        """
+        raise NotImplementedError
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    """
+    Embeddings API backend
+
+    Args:
+        client: OpenAI client
+        model: Embedding model to use
+    """
+
+    def __init__(self, client, model=DEFAULT_MODEL):
+        self.client = client
+        self.model = model
+        self.name = model
+
+    def embed_batch(self, texts, dimensions=None):
+        response = self.client.embeddings.create(
+            input=list(texts),
+            model=self.model,
+            **dimensions_kwargs(dimensions)
+        )
+        matrix = None
+        for item in response.data:
+            if matrix is None:
+                matrix = np.empty((len(texts), len(item.embedding)), dtype=np.float32)
+            # item.index is the position inside this request
+            matrix[item.index] = item.embedding
+        return matrix
+
+
+class HashingEmbeddingProvider(EmbeddingProvider):
+    """
+    Offline embeddings from hashed character n-grams
+
+    Every n-gram of the lower-cased text is hashed (FNV-1a, vectorized over
+    the whole batch) into one of dim buckets with a +/-1 sign. Counts are
+    log-scaled, optionally IDF-weighted (see fit) and L2-normalized.
+
+    Args:
+        dim: Output dimensions
+        ngram_range: (min_n, max_n) character n-gram sizes
+    """
+
+    def __init__(self, dim=1536, ngram_range=(3, 5)):
+        if dim < 1 or ngram_range[0] < 1 or ngram_range[0] > ngram_range[1]:
+            raise ValueError("dim must be positive and ngram_range a valid (min_n, max_n)")
+        self.dim = dim
+        self.ngram_range = ngram_range
+        self.idf = None
+        # dim is part of the name: cache keys and content hashes tell vectors apart by it
+        self.name = f"local-hashing-{dim}-{ngram_range[0]}-{ngram_range[1]}"
+
+    def _counts(self, texts, dim):
+        """Signed n-gram bucket counts, shape (len(texts), dim)"""
+        encoded = [f" {text.lower()} ".encode("utf-8") for text in texts]
+        lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint64)
+        doc_of = np.repeat(np.arange(len(texts)), lengths)
+        # Offset of the end of each byte's document, to reject n-grams
+        # that would run into the next text
+        doc_end = np.repeat(np.cumsum(lengths), lengths)
+
+        flat = np.zeros(len(texts) * dim, dtype=np.float64)
+        positions = np.arange(len(data))
+        for n in range(self.ngram_range[0], self.ngram_range[1] + 1):
+            m = len(data) - n + 1
+            if m <= 0:
+                continue
+            h = np.full(m, _FNV_OFFSET ^ np.uint64(n), dtype=np.uint64)
+            for j in range(n):
+                h ^= data[j:j + m]
+                h *= _FNV_PRIME
+            h ^= h >> np.uint64(29)
+            valid = positions[:m] + n <= doc_end[:m]
+            h = h[valid]
+            buckets = (h % np.uint64(dim)).astype(np.int64)
+            signs = np.where(h >> np.uint64(63), -1.0, 1.0)
+            flat += np.bincount(doc_of[:m][valid] * dim + buckets, weights=signs, minlength=len(flat))
+        return flat.reshape(len(texts), dim)
+
+    def fit(self, texts, batch_size=1024):
+        """
+        Learn IDF weights from a corpus so common n-grams count less
+
+        Changes the vectors, so the provider name changes too (old cache
+        entries are not reused).
+        """
+        texts = list(texts)
+        df = np.zeros(self.dim, dtype=np.float64)
+        for start in range(0, len(texts), batch_size):
+            df += (self._counts(texts[start:start + batch_size], self.dim) != 0).sum(axis=0)
+        self.idf = (np.log((1 + len(texts)) / (1 + df)) + 1).astype(np.float32)
+        fingerprint = zlib.crc32(self.idf.tobytes())
+        self.name = f"local-hashing-{self.dim}-{self.ngram_range[0]}-{self.ngram_range[1]}-idf{fingerprint:08x}"
+        return self
+
+    def embed_batch(self, texts, dimensions=None):
+        dim = dimensions or self.dim
+        if self.idf is not None and dim != self.dim:
+            raise ValueError(f"IDF was fitted for {self.dim} dimensions, not {dim}")
+        counts = self._counts(texts, dim)
+        matrix = (np.sign(counts) * np.log1p(np.abs(counts))).astype(np.float32)
+        if self.idf is not None:
+            matrix *= self.idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix /= norms
+        return matrix
+
+
+def as_provider(client, model=DEFAULT_MODEL):
+    """Wrap a raw OpenAI client; providers are returned unchanged"""
+    if isinstance(client, EmbeddingProvider):
+        return client
+    return OpenAIEmbeddingProvider(client, model)
+
+
+def provider_from_env(client=None, model=DEFAULT_MODEL):
+    """
+    Provider selected by the EMBEDDING_PROVIDER environment variable
+
+    "openai" (default) uses client; "local" uses HashingEmbeddingProvider
+    with EMBEDDING_DIMENSIONS dimensions (default 1536).
+    """
+    choice = os.getenv("EMBEDDING_PROVIDER", "openai").lower()
+    if choice == "local":
+        return HashingEmbeddingProvider(dim=int(os.getenv("EMBEDDING_DIMENSIONS", "1536")))
+    if choice != "openai":
+        raise ValueError(f"Unknown EMBEDDING_PROVIDER {choice!r} (expected 'openai' or 'local')")
+    if client is None:
+        raise ValueError("EMBEDDING_PROVIDER=openai needs an OpenAI client")
+    return OpenAIEmbeddingProvider(client, model)
@@ -0,0 +1,197 @@
+"""
+Quantized Vector Storage
+
+Stores normalized embeddings as float16 (2x smaller than float32) or as
+int8 with one scale per dimension (4x smaller) and scores queries directly
+against the compact form:
+
+- float16: blocks are widened to float32 just before the matrix product
+- int8:    score = codes @ (scale * query), so the per-dimension scale is
+           folded into the query once instead of dequantizing the corpus
+
+Optionally the best candidates are rescored with full-precision vectors,
+which may live in an np.memmap so only the candidate rows are read.
+"""
+
+import time
+
+import numpy as np
+
+from .embeddings import truncate_embeddings
+from .vector_index import VectorIndex, normalize_rows, prepare_queries, top_k_indices
+
+# Rows widened to float32 at a time while scoring
+SCORE_BLOCK_ROWS = 8192
+
+
+class QuantizedIndex:
+    """
+    Brute-force cosine index over quantized vectors
+
+    Args:
+        vectors: (n, dim) embeddings, any float dtype
+        documents: Optional texts, documents[i] belongs to vectors[i]
+        dtype: "float16" or "int8"
+        full_vectors: Optional full-precision vectors (array or np.memmap)
+                      used by search(..., rescore=N)
+        dimensions: Optional target size - longer vectors are truncated
+                    and re-normalized (text-embedding-3-* only)
+    """
+
+    def __init__(self, vectors, documents=None, dtype="int8", full_vectors=None, dimensions=None):
+        if dtype not in ("float16", "int8"):
+            raise ValueError(f"dtype must be 'float16' or 'int8', got {dtype!r}")
+        if dimensions is not None:
+            vectors = truncate_embeddings(vectors, dimensions)
+        normalized = normalize_rows(vectors)
+        self.dtype = dtype
+        self.documents = list(documents) if documents is not None else None
+        self.full_vectors = full_vectors
+
+        if dtype == "float16":
+            self.codes = normalized.astype(np.float16)
+            self.scale = None
+        else:
+            # Symmetric per-dimension scale: the largest |value| maps to 127
+            self.scale = np.abs(normalized).max(axis=0) / 127.0
+            self.scale[self.scale == 0] = 1.0
+            self.codes = np.clip(np.rint(normalized / self.scale), -127, 127).astype(np.int8)
+
+    @classmethod
+    def from_codes(cls, codes, scale=None, documents=None, full_vectors=None):
+        """
+        Wrap existing codes without copying them, e.g. an np.memmap from a
+        snapshot. float16 codes need no scale, int8 codes do.
+        """
+        index = cls.__new__(cls)
+        index.dtype = "int8" if scale is not None else "float16"
+        index.codes = codes
+        index.scale = scale
+        index.documents = documents
+        index.full_vectors = full_vectors
+        return index
+
+    def __len__(self):
+        return len(self.codes)
+
+    @property
+    def dim(self):
+        return self.codes.shape[1]
+
+    @property
+    def nbytes(self):
+        """Bytes held by the quantized vectors (plus scales)"""
+        return self.codes.nbytes + (self.scale.nbytes if self.scale is not None else 0)
+
+    def dequantize(self, rows=slice(None)):
+        """Approximate float32 vectors for the given rows"""
+        block = self.codes[rows].astype(np.float32)
+        if self.scale is not None:
+            block *= self.scale
+        return block
+
+    def scores(self, query_vectors):
+        """Approximate cosine scores, shape (n_queries, n)"""
+        queries = prepare_queries(query_vectors, self.dim)
+        if self.scale is not None:
+            queries = queries * self.scale
+        out = np.empty((len(queries), len(self.codes)), dtype=np.float32)
+        for start in range(0, len(self.codes), SCORE_BLOCK_ROWS):
+            block = self.codes[start:start + SCORE_BLOCK_ROWS].astype(np.float32)
+            out[:, start:start + len(block)] = queries @ block.T
+        return out
+
+    def search(self, query_vector, top_k=5, rescore=0):
+        """Same as search_many for a single query, returns 1-D arrays"""
+        indices, scores = self.search_many(np.asarray(query_vector)[None, :], top_k, rescore)
+        return indices[0], scores[0]
+
+    def search_many(self, query_vectors, top_k=5, rescore=0):
+        """
+        Search a batch of queries against the quantized vectors
+
+        Args:
+            query_vectors: (n_queries, dim) float vectors
+            top_k: Results per query
+            rescore: If > 0, take this many quantized candidates and
+                     re-rank them against full_vectors in float32
+
+        Returns:
+            (indices, scores) - arrays of shape (n_queries, top_k)
+        """
+        scores = self.scores(query_vectors)
+        if not rescore:
+            indices = top_k_indices(scores, top_k)
+            return indices, np.take_along_axis(scores, indices, axis=-1)
+
+        if self.full_vectors is None:
+            raise ValueError("rescore needs full_vectors")
+        queries = prepare_queries(query_vectors, self.dim)
+        candidates = top_k_indices(scores, max(rescore, top_k))
+        return rescore_candidates(self.full_vectors, queries, candidates, top_k)
+
+
+def rescore_candidates(full_vectors, queries, candidates, top_k):
+    """
+    Re-rank approximate candidates with exact float32 cosine scores
+
+    Args:
+        full_vectors: (n, dim) full-precision vectors (array or np.memmap)
+        queries: (n_queries, d) normalized queries, d <= dim
+        candidates: (n_queries, c) candidate rows; -1 entries are skipped
+        top_k: Results per query
+
+    Returns:
+        (indices, scores) - shape (n_queries, top_k), padded with -1 / -inf
+        when a query has fewer candidates
+    """
+    dim = queries.shape[1]
+    indices = np.full((len(queries), min(top_k, candidates.shape[1])), -1, dtype=np.intp)
+    exact = np.full(indices.shape, -np.inf, dtype=np.float32)
+    for q, rows in enumerate(candidates):
+        # Sorted row order keeps memmap reads sequential
+        rows = np.sort(rows[rows >= 0])
+        full = np.asarray(full_vectors[rows], dtype=np.float32)
+        full = truncate_embeddings(full, dim) if full.shape[1] != dim else normalize_rows(full)
+        candidate_scores = full @ queries[q]
+        best = top_k_indices(candidate_scores, top_k)
+        indices[q, :len(best)] = rows[best]
+        exact[q, :len(best)] = candidate_scores[best]
+    return indices, exact
+
+
+def recall_at_k(found, truth):
+    """Mean fraction of the true top-k that was found, per query"""
+    hits = [len(np.intersect1d(f[f >= 0], t)) / len(t) for f, t in zip(np.asarray(found), truth)]
+    return float(np.mean(hits)) if hits else 0.0
+
+
+def recall_report(vectors, query_vectors, top_k=10, rescore_depths=(0, 100)):
+    """
+    Compare quantized search against the exact float32 baseline
+
+    Returns:
+        List of dicts (one per dtype / rescore depth) with memory,
+        compression ratio, recall@k and mean latency per query
+    """
+    baseline = VectorIndex(vectors)
+    start = time.perf_counter()
+    truth, _ = baseline.search_many(query_vectors, top_k)
+    baseline_ms = (time.perf_counter() - start) * 1000 / len(query_vectors)
+
+    rows = [{
+        "dtype": "float32", "rescore": 0, "bytes": baseline.vectors.nbytes,
+        "compression": 1.0, f"recall@{top_k}": 1.0, "ms_per_query": baseline_ms,
+    }]
+    for dtype in ("float16", "int8"):
+        index = QuantizedIndex(vectors, dtype=dtype, full_vectors=vectors)
+        for rescore in rescore_depths:
+            start = time.perf_counter()
+            found, _ = index.search_many(query_vectors, top_k, rescore=rescore)
+            elapsed_ms = (time.perf_counter() - start) * 1000 / len(query_vectors)
+            rows.append({
+                "dtype": dtype, "rescore": rescore, "bytes": index.nbytes,
+                "compression": baseline.vectors.nbytes / index.nbytes,
+                f"recall@{top_k}": recall_at_k(found, truth), "ms_per_query": elapsed_ms,
+            })
+    return rows
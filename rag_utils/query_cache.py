@@ -0,0 +1,302 @@
+"""
+Query Embedding Memoization
+
+Support traffic is heavy-tailed: the same few hundred questions arrive all
+day. Caching their embeddings in memory skips the embedding round trip
+entirely on a hit.
+
+- QueryEmbeddingCache: per-process LRU with optional TTL
+- SharedQueryEmbeddingCache: fixed-size table in shared memory, so every
+  worker process on a host reads (and fills) the same cache
+"""
+
+import hashlib
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from .embeddings import normalize_text
+
+
+_ATTACH_LOCK = threading.Lock()
+
+
+def attach_shared_memory(name):
+    """
+    Open an existing shared memory block without taking ownership of it
+
+    Before Python 3.13 attaching registers the block with this process's
+    resource tracker, which unlinks it - for every process - when this
+    one exits. Unregistering afterwards is no fix: spawned or forked
+    children share their parent's tracker, so that would drop the
+    creator's registration instead. The block is never registered here;
+    only its creator's unlink() frees it.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    with _ATTACH_LOCK:
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+def _get_or_embed_many(cache, queries, embed_many, dimensions):
+    """Shared by both caches: look up every query, embed the misses once"""
+    queries = list(queries)
+    vectors = [cache.get(query, dimensions) for query in queries]
+    # Repeated queries in one batch are embedded once
+    missing = {}
+    for i, vector in enumerate(vectors):
+        if vector is None:
+            missing.setdefault(normalize_text(queries[i]), []).append(i)
+    if missing:
+        texts = [queries[positions[0]] for positions in missing.values()]
+        embedded = np.asarray(embed_many(texts), dtype=np.float32)
+        for text, vector, positions in zip(texts, embedded, missing.values()):
+            cache.put(text, vector, dimensions)
+            for i in positions:
+                vectors[i] = vector
+    if not vectors:
+        return np.empty((0, 0), dtype=np.float32)
+    return np.stack(vectors)
+
+
+class QueryEmbeddingCache:
+    """
+    Bounded, thread-safe LRU of query embeddings
+
+    Args:
+        maxsize: Maximum number of cached queries
+        ttl: Optional lifetime in seconds (None = never expires)
+    """
+
+    def __init__(self, maxsize=1024, ttl=None):
+        if maxsize < 1:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, query, dimensions=None):
+        """Cached vector for query, or None"""
+        key = (normalize_text(query), dimensions)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is not None and entry[1] < time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, query, vector, dimensions=None):
+        key = (normalize_text(query), dimensions)
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        vector = np.asarray(vector, dtype=np.float32)
+        with self._lock:
+            self._entries[key] = (vector, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_embed(self, query, embed, dimensions=None):
+        """
+        Return the cached vector, or call embed(query) and cache it
+
+        Args:
+            query: Query text
+            embed: Function text -> vector (e.g. get_embedding)
+            dimensions: Part of the key when embed produces shortened vectors
+        """
+        vector = self.get(query, dimensions)
+        if vector is None:
+            vector = np.asarray(embed(query), dtype=np.float32)
+            self.put(query, vector, dimensions)
+        return vector
+
+    def get_or_embed_many(self, queries, embed_many, dimensions=None):
+        """
+        Vectors for many queries, embedding all misses in one call
+
+        Args:
+            queries: Query texts
+            embed_many: Function list of texts -> (n, dim) matrix
+                        (e.g. get_embeddings)
+            dimensions: Part of the key when embed_many produces shortened vectors
+
+        Returns:
+            float32 array of shape (len(queries), dim), in query order
+        """
+        return _get_or_embed_many(self, queries, embed_many, dimensions)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self),
+        }
+
+
+_MAGIC = 0x51454331  # "QEC1"
+_HEADER = np.dtype([("magic", "<u4"), ("ways", "<u4"), ("slots", "<u8"), ("dim", "<u8"), ("ttl", "<f8")])
+
+
+class SharedQueryEmbeddingCache:
+    """
+    Query embedding cache in a named shared-memory block
+
+    The table is set-associative: a query hashes to a set of `ways`
+    slots and replaces the least recently used slot of that set. There
+    are no cross-process locks - every slot carries a CRC of its key and
+    vector, and readers ignore slots that fail it (a write in progress).
+
+    Create it once (e.g. in the parent before forking workers) with
+    create(), and attach() from the other processes by name.
+    """
+
+    def __init__(self, shm, owner):
+        self._shm = shm
+        self._owner = owner
+        header = np.ndarray((), dtype=_HEADER, buffer=shm.buf)
+        if header["magic"] != _MAGIC:
+            raise ValueError(f"{shm.name} is not a query embedding cache")
+        self.ways = int(header["ways"])
+        self.slots = int(header["slots"])
+        self.dim = int(header["dim"])
+        ttl = float(header["ttl"])
+        self.ttl = ttl if ttl > 0 else None
+        self.hits = 0
+        self.misses = 0
+
+        offset = _HEADER.itemsize
+        self._keys = np.ndarray((self.slots,), dtype="<u8", buffer=shm.buf, offset=offset)
+        offset += self._keys.nbytes
+        self._written = np.ndarray((self.slots,), dtype="<f8", buffer=shm.buf, offset=offset)
+        offset += self._written.nbytes
+        self._used = np.ndarray((self.slots,), dtype="<f8", buffer=shm.buf, offset=offset)
+        offset += self._used.nbytes
+        self._crcs = np.ndarray((self.slots,), dtype="<u4", buffer=shm.buf, offset=offset)
+        offset += self._crcs.nbytes
+        offset += -offset % 8
+        self._vectors = np.ndarray((self.slots, self.dim), dtype="<f4", buffer=shm.buf, offset=offset)
+
+    @staticmethod
+    def _size(slots, dim):
+        size = _HEADER.itemsize + slots * (8 + 8 + 8 + 4)
+        return size + (-size % 8) + slots * dim * 4
+
+    @classmethod
+    def create(cls, name, dim, slots=4096, ways=4, ttl=None):
+        """
+        Allocate a new shared cache
+
+        Args:
+            name: Shared memory name other processes attach to
+            dim: Embedding dimension
+            slots: Total capacity (rounded up to a multiple of ways)
+            ways: Slots per set - more ways means closer to true LRU
+            ttl: Optional lifetime in seconds
+        """
+        slots = -(-slots // ways) * ways
+        size = cls._size(slots, dim)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        np.ndarray((size,), dtype=np.uint8, buffer=shm.buf)[:] = 0
+        header = np.ndarray((), dtype=_HEADER, buffer=shm.buf)
+        header["magic"], header["ways"], header["slots"] = _MAGIC, ways, slots
+        header["dim"], header["ttl"] = dim, ttl or 0.0
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        """Open a cache created by another process"""
+        return cls(attach_shared_memory(name), owner=False)
+
+    @staticmethod
+    def _key(query, dimensions):
+        digest = hashlib.blake2b(f"{dimensions}|{normalize_text(query)}".encode("utf-8"), digest_size=8)
+        # 0 marks an empty slot, so never use it as a key
+        return int.from_bytes(digest.digest(), "little") or 1
+
+    def _crc(self, key, vector):
+        return zlib.crc32(vector.tobytes(), zlib.crc32(key.to_bytes(8, "little")))
+
+    def _set(self, key):
+        start = (key % (self.slots // self.ways)) * self.ways
+        return range(start, start + self.ways)
+
+    def get(self, query, dimensions=None):
+        """Cached vector for query, or None"""
+        key = self._key(query, dimensions)
+        now = time.time()
+        for slot in self._set(key):
+            if int(self._keys[slot]) != key:
+                continue
+            vector = self._vectors[slot].copy()
+            # Re-check after copying: a concurrent writer changes key or CRC
+            if int(self._keys[slot]) != key or self._crc(key, vector) != int(self._crcs[slot]):
+                break
+            if self.ttl is not None and self._written[slot] + self.ttl < now:
+                break
+            self._used[slot] = now
+            self.hits += 1
+            return vector
+        self.misses += 1
+        return None
+
+    def put(self, query, vector, dimensions=None):
+        vector = np.asarray(vector, dtype=np.float32)
+        if vector.shape != (self.dim,):
+            raise ValueError(f"expected a {self.dim}-d vector, got shape {vector.shape}")
+        key = self._key(query, dimensions)
+        slots = self._set(key)
+        existing = [slot for slot in slots if int(self._keys[slot]) == key]
+        slot = existing[0] if existing else min(slots, key=lambda s: self._used[s])
+        now = time.time()
+        # Invalidate first so readers never pair the old key with the new vector
+        self._keys[slot] = 0
+        self._vectors[slot] = vector
+        self._crcs[slot] = self._crc(key, vector)
+        self._written[slot] = now
+        self._used[slot] = now
+        self._keys[slot] = key
+
+    def get_or_embed(self, query, embed, dimensions=None):
+        """Return the cached vector, or call embed(query) and cache it"""
+        vector = self.get(query, dimensions)
+        if vector is None:
+            vector = np.asarray(embed(query), dtype=np.float32)
+            self.put(query, vector, dimensions)
+        return vector
+
+    def get_or_embed_many(self, queries, embed_many, dimensions=None):
+        """Vectors for many queries, embedding all misses in one call"""
+        return _get_or_embed_many(self, queries, embed_many, dimensions)
+
+    def close(self):
+        """Detach this process (the owner should also call unlink)"""
+        # Views into the buffer must go before the mapping can close
+        self._keys = self._written = self._used = self._crcs = self._vectors = None
+        self._shm.close()
+
+    def unlink(self):
+        """Free the shared memory block for every process"""
+        self._shm.unlink()
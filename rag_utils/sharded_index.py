@@ -0,0 +1,292 @@
+"""
+Sharded Vector Index with Process-Pool Scatter/Gather
+
+One Python process runs one BLAS matmul at a time over one memory
+bandwidth budget. ShardedVectorIndex splits the corpus across N worker
+processes instead:
+
+- each shard's vectors live in a shared memory block the worker maps
+  once; the parent writes adds/deletes straight into it, so nothing is
+  pickled except the queries and the per-shard top-k
+- a query batch is broadcast to every worker, each computes its own
+  top-k in parallel, and the parent merges the sorted lists with a heap
+- ids are routed to shards by jump consistent hashing of crc32(id), so
+  an id always lands on the same shard and rebalance(n_shards) moves
+  only the ~1/n of vectors whose shard actually changes
+
+Workers are started with "spawn": scripts using this must create the
+index under if __name__ == "__main__":.
+"""
+
+import heapq
+import multiprocessing
+import os
+import threading
+import zlib
+from itertools import islice
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .query_cache import attach_shared_memory
+from .vector_index import normalize_rows, prepare_queries, top_k_indices
+
+# Rows allocated per shard before the first resize (doubles when full)
+INITIAL_SHARD_CAPACITY = 1024
+
+# Workers must not each start a full BLAS thread pool
+_SINGLE_THREAD_ENV = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+
+
+def jump_hash(key, n_buckets):
+    """
+    Jump consistent hash (Lamping & Veach): bucket in [0, n_buckets)
+
+    Growing from n to n + 1 buckets moves only ~1/(n + 1) of the keys.
+    """
+    bucket, jump = -1, 0
+    while jump < n_buckets:
+        bucket = jump
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        jump = int((bucket + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return bucket
+
+
+def shard_of(record_id, n_shards):
+    """Stable shard number for an id (the same in every process and run)"""
+    return jump_hash(zlib.crc32(str(record_id).encode("utf-8")), n_shards)
+
+
+def _shard_top_k(shm, capacity, dim, count, queries, k):
+    """Top-k rows of one shard (the view into shm dies on return)"""
+    vectors = np.ndarray((capacity, dim), dtype=np.float32, buffer=shm.buf)[:count]
+    scores = queries @ vectors.T
+    rows = top_k_indices(scores, k)
+    return rows, np.take_along_axis(scores, rows, axis=-1)
+
+
+def _shard_worker(conn):
+    """Worker loop: map the shard named in each request and return its top-k"""
+    attached = None  # (name, SharedMemory)
+    while True:
+        request = conn.recv()
+        if request is None:
+            break
+        name, capacity, dim, count, queries, k = request
+        try:
+            if attached is None or attached[0] != name:
+                if attached is not None:
+                    attached[1].close()
+                # Untracked: only the parent's unlink() may free the block
+                attached = (name, attach_shared_memory(name))
+            conn.send(_shard_top_k(attached[1], capacity, dim, count, queries, k))
+        except Exception as error:
+            conn.send(error)
+    if attached is not None:
+        attached[1].close()
+    conn.close()
+
+
+class _Shard:
+    """Parent-side state of one shard: its shared block, ids and worker"""
+
+    def __init__(self, dim, context):
+        self.dim = dim
+        self.capacity = 0
+        self.count = 0
+        self.shm = None
+        self.vectors = None
+        self.ids = []
+        self.positions = {}
+        self._resize(INITIAL_SHARD_CAPACITY)
+        self.conn, child = context.Pipe()
+        saved = {key: os.environ.get(key) for key in _SINGLE_THREAD_ENV}
+        os.environ.update({key: "1" for key in _SINGLE_THREAD_ENV})
+        try:
+            self.process = context.Process(target=_shard_worker, args=(child,), daemon=True)
+            self.process.start()
+        finally:
+            for key, value in saved.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+        child.close()
+
+    def _resize(self, capacity):
+        """Move the rows into a new shared block (the worker re-maps on its next request)"""
+        shm = shared_memory.SharedMemory(create=True, size=max(capacity * self.dim * 4, 1))
+        vectors = np.ndarray((capacity, self.dim), dtype=np.float32, buffer=shm.buf)
+        if self.shm is not None:
+            vectors[:self.count] = self.vectors[:self.count]
+            self.vectors = None
+            self.shm.close()
+            self.shm.unlink()
+        self.shm, self.vectors, self.capacity = shm, vectors, capacity
+
+    def upsert(self, ids, vectors):
+        for record_id, vector in zip(ids, vectors):
+            row = self.positions.get(record_id)
+            if row is None:
+                if self.count == self.capacity:
+                    self._resize(self.capacity * 2)
+                row = self.positions[record_id] = self.count
+                self.ids.append(record_id)
+                self.count += 1
+            self.vectors[row] = vector
+
+    def delete(self, record_id):
+        """Swap-remove: the last row fills the hole, so rows stay dense"""
+        row = self.positions.pop(record_id)
+        last = self.count - 1
+        if row != last:
+            moved = self.ids[last]
+            self.vectors[row] = self.vectors[last]
+            self.ids[row] = moved
+            self.positions[moved] = row
+        self.ids.pop()
+        self.count -= 1
+
+    def send_search(self, queries, k):
+        self.conn.send((self.shm.name, self.capacity, self.dim, self.count, queries, k))
+
+    def receive(self):
+        reply = self.conn.recv()
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    def close(self):
+        if self.process.is_alive():
+            self.conn.send(None)
+            self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.conn.close()
+        self.vectors = None
+        self.shm.close()
+        self.shm.unlink()
+
+
+class ShardedVectorIndex:
+    """
+    Cosine-similarity index partitioned across worker processes
+
+    Args:
+        dim: Vector dimension
+        n_shards: Number of shards / worker processes (default: CPU count)
+    """
+
+    def __init__(self, dim, n_shards=None):
+        self.dim = dim
+        self._context = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self.documents = {}
+        self.shards = [_Shard(dim, self._context) for _ in range(n_shards or os.cpu_count() or 1)]
+
+    @property
+    def n_shards(self):
+        return len(self.shards)
+
+    def __len__(self):
+        return sum(shard.count for shard in self.shards)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def add(self, ids, vectors, documents=None):
+        """Insert or replace vectors by id (each id is routed to its shard)"""
+        ids = list(ids)
+        vectors = normalize_rows(vectors)
+        if len(ids) != len(vectors) or vectors.shape[1] != self.dim:
+            raise ValueError(f"expected {len(ids)} vectors of dimension {self.dim}, got {vectors.shape}")
+        routed = {}
+        for i, record_id in enumerate(ids):
+            routed.setdefault(shard_of(record_id, self.n_shards), []).append(i)
+        with self._lock:
+            for shard, rows in routed.items():
+                self.shards[shard].upsert([ids[i] for i in rows], vectors[rows])
+            if documents is not None:
+                self.documents.update(zip(ids, documents))
+
+    def delete(self, ids):
+        """Remove vectors by id (unknown ids are ignored)"""
+        with self._lock:
+            for record_id in ids:
+                shard = self.shards[shard_of(record_id, self.n_shards)]
+                if record_id in shard.positions:
+                    shard.delete(record_id)
+                self.documents.pop(record_id, None)
+
+    def search_many(self, query_vectors, top_k=5):
+        """
+        Scatter a query batch to every shard and merge the top-k lists
+
+        Returns:
+            (ids, scores) - ids is a list of per-query id lists, scores an
+            array of shape (n_queries, k), best first
+        """
+        queries = prepare_queries(query_vectors, self.dim)
+        with self._lock:
+            active = [shard for shard in self.shards if shard.count]
+            for shard in active:
+                shard.send_search(queries, top_k)
+            replies = [(shard, *shard.receive()) for shard in active]
+
+        k = min(top_k, sum(shard.count for shard in active))
+        all_ids, all_scores = [], np.empty((len(queries), k), dtype=np.float32)
+        for q in range(len(queries)):
+            # Each shard's list is sorted, so a k-way heap merge finds the top k
+            streams = [
+                [(-float(score), shard.ids[row]) for row, score in zip(rows[q], scores[q])]
+                for shard, rows, scores in replies
+            ]
+            best = list(islice(heapq.merge(*streams), k))
+            all_ids.append([record_id for _, record_id in best])
+            all_scores[q] = [-score for score, _ in best]
+        return all_ids, all_scores
+
+    def search(self, query_vector, top_k=5):
+        """Top-k (ids, scores) for one query"""
+        ids, scores = self.search_many([query_vector], top_k)
+        return ids[0], scores[0]
+
+    def rebalance(self, n_shards=None):
+        """
+        Re-route ids to n_shards shards (default: the current count)
+
+        Only ids whose jump hash changes are moved. Growing starts new
+        workers; shrinking empties and stops the trailing ones.
+
+        Returns:
+            Number of vectors moved
+        """
+        n_shards = n_shards or self.n_shards
+        with self._lock:
+            while len(self.shards) < n_shards:
+                self.shards.append(_Shard(self.dim, self._context))
+            moving = {}
+            for number, shard in enumerate(self.shards):
+                leaving = [record_id for record_id in shard.ids if shard_of(record_id, n_shards) != number]
+                for record_id in leaving:
+                    target = shard_of(record_id, n_shards)
+                    moving.setdefault(target, ([], []))
+                    moving[target][0].append(record_id)
+                    moving[target][1].append(shard.vectors[shard.positions[record_id]].copy())
+                    shard.delete(record_id)
+            for target, (ids, vectors) in moving.items():
+                self.shards[target].upsert(ids, vectors)
+            for shard in self.shards[n_shards:]:
+                shard.close()
+            del self.shards[n_shards:]
+        return sum(len(ids) for ids, _ in moving.values())
+
+    def close(self):
+        """Stop the workers and free the shared memory"""
+        with self._lock:
+            for shard in self.shards:
+                shard.close()
+            self.shards = []
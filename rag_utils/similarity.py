@@ -0,0 +1,131 @@
+"""
+Blocked Pairwise Similarity
+
+All-pairs cosine similarity for dedup and clustering. Norms are computed
+once; the matrix product is then done tile by tile (block_size rows x
+block_size columns), so peak memory is one tile per worker no matter how
+many vectors there are. Inputs can be np.memmap arrays and the full matrix
+can be written straight into a memmap via out=.
+
+NumPy releases the GIL inside matrix products, so row blocks can run on a
+thread pool. BLAS may already use several cores per product - set
+n_threads > 1 mainly when it is limited to one (e.g. OPENBLAS_NUM_THREADS=1).
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .vector_index import top_k_indices
+
+DEFAULT_BLOCK_SIZE = 2048
+
+
+def inverse_norms(vectors):
+    """1 / ||row|| for every row (0 for all-zero rows)"""
+    norms = np.linalg.norm(np.asarray(vectors, dtype=np.float32), axis=1)
+    inv = np.zeros_like(norms)
+    np.divide(1.0, norms, out=inv, where=norms > 0)
+    return inv
+
+
+def _blocks(n, block_size):
+    return [(start, min(start + block_size, n)) for start in range(0, n, block_size)]
+
+
+def _tile(a, inv_a, b, inv_b, rows, cols):
+    """Cosine similarities between a[rows] and b[cols]"""
+    tile = np.asarray(a[rows[0]:rows[1]], dtype=np.float32) @ np.asarray(b[cols[0]:cols[1]], dtype=np.float32).T
+    tile *= inv_a[rows[0]:rows[1], None]
+    tile *= inv_b[None, cols[0]:cols[1]]
+    return tile
+
+
+def _run(fn, items, n_threads):
+    if n_threads > 1:
+        with ThreadPoolExecutor(max_workers=n_threads) as pool:
+            return list(pool.map(fn, items))
+    return [fn(item) for item in items]
+
+
+def similarity_matrix(a, b=None, block_size=DEFAULT_BLOCK_SIZE, out=None, n_threads=1):
+    """
+    Full cosine similarity matrix between the rows of a and b
+
+    Args:
+        a: (n, dim) vectors
+        b: (m, dim) vectors, defaults to a (all pairs within one set)
+        block_size: Rows/columns per tile - bounds peak working memory
+        out: Optional (n, m) float32 array to fill, e.g. an np.memmap
+             when the result itself does not fit in RAM
+        n_threads: Row blocks computed in parallel
+
+    Returns:
+        (n, m) float32 matrix (out, if given)
+    """
+    b = a if b is None else b
+    inv_a = inverse_norms(a)
+    inv_b = inv_a if b is a else inverse_norms(b)
+    if out is None:
+        out = np.empty((len(a), len(b)), dtype=np.float32)
+    elif out.shape != (len(a), len(b)):
+        raise ValueError(f"out has shape {out.shape}, expected {(len(a), len(b))}")
+
+    col_blocks = _blocks(len(b), block_size)
+
+    def fill(rows):
+        for cols in col_blocks:
+            out[rows[0]:rows[1], cols[0]:cols[1]] = _tile(a, inv_a, b, inv_b, rows, cols)
+
+    _run(fill, _blocks(len(a), block_size), n_threads)
+    return out
+
+
+def top_k_similarity(a, b=None, k=10, block_size=DEFAULT_BLOCK_SIZE, n_threads=1,
+                     exclude_self=True):
+    """
+    The k most similar rows of b for every row of a, without the full matrix
+
+    Each row block keeps a running top-k that is merged with the top-k of
+    every new tile, so memory is O(n * k + block_size ** 2).
+
+    Args:
+        a: (n, dim) vectors
+        b: (m, dim) vectors, defaults to a
+        k: Neighbours per row
+        block_size: Rows/columns per tile
+        n_threads: Row blocks computed in parallel
+        exclude_self: When b is a, skip each row's match with itself
+
+    Returns:
+        (indices, scores) - arrays of shape (n, k), best first. Rows with
+        fewer than k candidates are padded with index -1 and score -inf.
+    """
+    same = b is None or b is a
+    b = a if b is None else b
+    inv_a = inverse_norms(a)
+    inv_b = inv_a if same else inverse_norms(b)
+    indices = np.full((len(a), k), -1, dtype=np.int64)
+    scores = np.full((len(a), k), -np.inf, dtype=np.float32)
+    col_blocks = _blocks(len(b), block_size)
+
+    def search(rows):
+        best_idx = indices[rows[0]:rows[1]]
+        best_scores = scores[rows[0]:rows[1]]
+        for cols in col_blocks:
+            tile = _tile(a, inv_a, b, inv_b, rows, cols)
+            if same and exclude_self:
+                # Global row r meets global column r inside this tile
+                overlap = np.arange(max(rows[0], cols[0]), min(rows[1], cols[1]))
+                tile[overlap - rows[0], overlap - cols[0]] = -np.inf
+            tile_top = top_k_indices(tile, k)
+            merged_scores = np.concatenate([best_scores, np.take_along_axis(tile, tile_top, axis=1)], axis=1)
+            merged_idx = np.concatenate([best_idx, tile_top + cols[0]], axis=1)
+            keep = top_k_indices(merged_scores, k)
+            best_scores[:] = np.take_along_axis(merged_scores, keep, axis=1)[:, :k]
+            best_idx[:] = np.take_along_axis(merged_idx, keep, axis=1)[:, :k]
+        # Padding slots still carry -inf, make sure they point nowhere
+        best_idx[np.isneginf(best_scores)] = -1
+
+    _run(search, _blocks(len(a), block_size), n_threads)
+    return indices, scores
@@ -0,0 +1,230 @@
+"""
+Memory-Mapped Vector Snapshots
+
+A compact single-file format that opens in milliseconds with np.memmap
+instead of being parsed into Python objects. Pages are read lazily and
+shared through the OS page cache, so forked web workers that open the
+same snapshot share one copy in RAM.
+
+Layout (little-endian, sections 64-byte aligned):
+
+    header      magic, version, dtype, flags, count, dim, section offsets
+    ids         (count + 1) uint64 offsets + UTF-8 blob
+    documents   same layout as ids (optional)
+    vectors     count x dim float32 or float16, L2-normalized
+    metadata    uint64 length + JSON column descriptor, then one array per
+                metadata key (offsets relative to the aligned array area):
+                strings -> int32 category codes (-1 = missing)
+                numbers -> float64 (NaN = missing)
+                bools   -> int8 (0/1, -1 = missing)
+"""
+
+import json
+import struct
+
+import numpy as np
+
+from .quantization import QuantizedIndex
+from .vector_index import VectorIndex, normalize_rows
+
+MAGIC = b"RAGSNAP1"
+VERSION = 1
+_HEADER = struct.Struct("<8sIIIQQQQQQ")
+_ALIGN = 64
+_DTYPES = {"float32": (0, "<f4"), "float16": (1, "<f2")}
+_FLAG_DOCUMENTS = 1
+
+# Rows normalized and written at a time
+_WRITE_BLOCK_ROWS = 65536
+
+
+def _aligned(offset):
+    return offset + (-offset % _ALIGN)
+
+
+def _pad(f):
+    f.write(b"\0" * (-f.tell() % _ALIGN))
+    return f.tell()
+
+
+def _write_texts(f, texts):
+    """Offsets + blob section, returns its start offset"""
+    start = _pad(f)
+    encoded = [text.encode("utf-8") for text in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype="<u8")
+    np.cumsum([len(blob) for blob in encoded], out=offsets[1:])
+    f.write(offsets.tobytes())
+    for blob in encoded:
+        f.write(blob)
+    return start
+
+
+def _metadata_columns(metadatas):
+    """Turn a list of dicts into (descriptor, array) column pairs"""
+    keys = sorted({key for metadata in metadatas if metadata for key in metadata})
+    columns = []
+    for key in keys:
+        values = [metadata.get(key) if metadata else None for metadata in metadatas]
+        present = [value for value in values if value is not None]
+        if all(isinstance(value, bool) for value in present):
+            array = np.array([-1 if value is None else int(value) for value in values], dtype="<i1")
+            columns.append(({"name": key, "kind": "bool"}, array))
+        elif all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in present):
+            array = np.array([np.nan if value is None else value for value in values], dtype="<f8")
+            integer = all(isinstance(value, int) for value in present)
+            columns.append(({"name": key, "kind": "number", "integer": integer}, array))
+        else:
+            categories = sorted({str(value) for value in present})
+            lookup = {category: code for code, category in enumerate(categories)}
+            array = np.array([-1 if value is None else lookup[str(value)] for value in values], dtype="<i4")
+            columns.append(({"name": key, "kind": "category", "categories": categories}, array))
+    return columns
+
+
+def write_snapshot(path, vectors, ids, metadatas=None, documents=None, dtype="float32"):
+    """
+    Write vectors (normalized on the way) and their records to path
+
+    Args:
+        path: Output file
+        vectors: (n, dim) embeddings - an np.memmap works, it is read in blocks
+        ids: n unique string ids
+        metadatas: Optional n dicts of str / number / bool values
+        documents: Optional n texts
+        dtype: "float32" or "float16" for the vector block
+    """
+    if dtype not in _DTYPES:
+        raise ValueError(f"dtype must be one of {tuple(_DTYPES)}, got {dtype!r}")
+    count, dim = np.shape(vectors)
+    ids = [str(record_id) for record_id in ids]
+    if len(ids) != count or len(set(ids)) != count:
+        raise ValueError("need one unique id per vector")
+    metadatas = list(metadatas) if metadatas is not None else [None] * count
+    if len(metadatas) != count or (documents is not None and len(documents) != count):
+        raise ValueError("metadatas and documents must have one entry per vector")
+    dtype_code, vector_dtype = _DTYPES[dtype]
+
+    with open(path, "wb") as f:
+        f.write(b"\0" * _HEADER.size)
+        ids_offset = _write_texts(f, ids)
+        documents_offset = _write_texts(f, documents) if documents is not None else 0
+
+        vectors_offset = _pad(f)
+        for start in range(0, count, _WRITE_BLOCK_ROWS):
+            f.write(normalize_rows(vectors[start:start + _WRITE_BLOCK_ROWS]).astype(vector_dtype).tobytes())
+
+        metadata_offset = _pad(f)
+        columns = _metadata_columns(metadatas)
+        descriptors = []
+        relative = 0
+        for descriptor, array in columns:
+            descriptors.append({**descriptor, "offset": relative, "dtype": array.dtype.str})
+            relative = _aligned(relative + array.nbytes)
+        encoded = json.dumps({"columns": descriptors}).encode("utf-8")
+        f.write(struct.pack("<Q", len(encoded)))
+        f.write(encoded)
+        arrays_offset = _pad(f)
+        for descriptor, (_, array) in zip(descriptors, columns):
+            f.write(b"\0" * (arrays_offset + descriptor["offset"] - f.tell()))
+            f.write(array.tobytes())
+
+        flags = _FLAG_DOCUMENTS if documents is not None else 0
+        f.seek(0)
+        f.write(_HEADER.pack(MAGIC, VERSION, dtype_code, flags, count, dim,
+                             ids_offset, documents_offset, vectors_offset, metadata_offset))
+
+
+class TextTable:
+    """Read-only sequence of strings decoded lazily from a memmapped section"""
+
+    def __init__(self, buffer, offset, count):
+        self._offsets = np.ndarray((count + 1,), dtype="<u8", buffer=buffer, offset=offset)
+        self._blob = offset + self._offsets.nbytes
+        self._buffer = buffer
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        start, end = self._offsets[i], self._offsets[i + 1]
+        return bytes(self._buffer[self._blob + start:self._blob + end]).decode("utf-8")
+
+
+class Snapshot:
+    """
+    An opened snapshot - nothing is read until it is used
+
+    Attributes:
+        vectors: (count, dim) memmapped, L2-normalized vectors
+        ids: Lazy sequence of ids
+        documents: Lazy sequence of texts, or None
+        columns: {key: descriptor} of metadata columns
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._mmap = np.memmap(path, dtype=np.uint8, mode="r")
+        (magic, version, dtype_code, flags, self.count, self.dim, ids_offset,
+         documents_offset, vectors_offset, metadata_offset) = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a vector snapshot")
+        if version != VERSION:
+            raise ValueError(f"{path} has snapshot version {version}, expected {VERSION}")
+        self.dtype = next(name for name, (code, _) in _DTYPES.items() if code == dtype_code)
+
+        self.ids = TextTable(self._mmap, ids_offset, self.count)
+        self.documents = TextTable(self._mmap, documents_offset, self.count) if flags & _FLAG_DOCUMENTS else None
+        self.vectors = np.ndarray((self.count, self.dim), dtype=_DTYPES[self.dtype][1],
+                                  buffer=self._mmap, offset=vectors_offset)
+
+        (length,) = struct.unpack_from("<Q", self._mmap, metadata_offset)
+        start = metadata_offset + 8
+        descriptor = json.loads(bytes(self._mmap[start:start + length]).decode("utf-8"))
+        self._arrays_offset = _aligned(start + length)
+        self.columns = {column["name"]: column for column in descriptor["columns"]}
+        self._positions = None
+
+    def __len__(self):
+        return self.count
+
+    def column(self, name):
+        """Memmapped array of one metadata column (see module docstring)"""
+        descriptor = self.columns[name]
+        return np.ndarray((self.count,), dtype=descriptor["dtype"], buffer=self._mmap,
+                          offset=self._arrays_offset + descriptor["offset"])
+
+    def metadata(self, i):
+        """Rebuild the metadata dict of row i"""
+        row = {}
+        for name, descriptor in self.columns.items():
+            value = self.column(name)[i]
+            if descriptor["kind"] == "category" and value >= 0:
+                row[name] = descriptor["categories"][value]
+            elif descriptor["kind"] == "bool" and value >= 0:
+                row[name] = bool(value)
+            elif descriptor["kind"] == "number" and not np.isnan(value):
+                row[name] = int(value) if descriptor["integer"] else float(value)
+        return row
+
+    def position(self, record_id):
+        """Row of an id (builds the id -> row dict on first use)"""
+        if self._positions is None:
+            self._positions = {record_id: i for i, record_id in enumerate(self.ids)}
+        return self._positions[record_id]
+
+    def index(self):
+        """Search index over the memmapped vectors - no copy is made"""
+        if self.dtype == "float16":
+            return QuantizedIndex.from_codes(self.vectors, documents=self.documents)
+        return VectorIndex.from_normalized(self.vectors, documents=self.documents)
+
+
+def open_snapshot(path):
+    """Open a snapshot written by write_snapshot"""
+    return Snapshot(path)
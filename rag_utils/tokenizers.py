@@ -0,0 +1,199 @@
+"""
+Tokenizers for Token Budgets
+
+Chunk sizes and context budgets are limits on model tokens, not
+characters. "1 token = 4 characters" holds for plain English prose only;
+code, numbers and non-English text run 20-40% over it. Everything that
+counts tokens goes through a Tokenizer, so the exact tokenizer can be
+swapped in where it is installed:
+
+- RegexTokenizer: offline approximation of GPT-style BPE, modeled on
+  cl100k pre-tokenization (contractions, a leading space or
+  punctuation mark glued to a word, digits in groups of three, runs of
+  punctuation and whitespace), lowercase words of up to 10 letters as
+  one token, camelCase humps and capital runs split apart, and one
+  token per CJK character. No vocabulary file, no network.
+- TiktokenTokenizer: exact counts with tiktoken (pip install tiktoken;
+  the encoding file is downloaded on first use)
+
+RegexTokenizer against cl100k_base, on text it was not tuned on
+(docstrings of the stdlib subpackages, numpy/lib and asyncio sources):
+
+    corpus      total     per 1,000-char chunk (median / p95)
+    prose       -0.1%     2.6% / 12.3%
+    code        +0.5%     2.5% /  9.0%   (numpy/lib)
+    code        +3.4%     3.6% / 12.4%   (asyncio)
+
+len(text) // 4 is off by +3.6%, -11.1% and +19.9% on the same sets.
+Single sentences can be off by more (a sentence of long compound
+words undercounts), so budgets keep a margin when tiktoken is absent.
+
+Counts are memoized per text in a bounded LRU - retrieved chunks repeat
+from query to query, and each is tokenized once.
+
+tokenizer_from_env uses tiktoken whenever it is installed and its
+encoding loads, RegexTokenizer otherwise.
+"""
+
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+DEFAULT_ENCODING = "cl100k_base"
+
+# Kana, CJK ideographs, Hangul
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"
+
+# Alternatives are tried in order at each position; "_" counts as punctuation
+_TOKEN_RE = re.compile(
+    r"'(?:[sdmtSDMT]|ll|ve|re|LL|VE|RE)(?![A-Za-z])"  # contractions
+    rf"|[{_CJK}]"                                     # ~1 token per CJK character
+    r"|[^\r\n\w]?(?:[A-Z]?[a-z]{1,10}|[A-Z]{1,3}(?![a-z]))"  # words, humps, capital runs
+    rf"|[^\r\n\w]?(?:(?![{_CJK}])[^\W\d_A-Za-z]){{1,3}}"  # other scripts: ~3 letters per token
+    r"|\d{1,3}"                                       # numbers, 3 digits per token
+    r"| ?(?:[^\s\w]|_){1,3}[\r\n]*"                   # punctuation runs
+    r"|\s*[\r\n]+|\s+(?!\S)|\s+"                      # whitespace
+)
+
+
+class Tokenizer:
+    """
+    Base class for token counters
+
+    Subclasses set name and implement _token_starts (character offset of
+    every token); _count may be overridden when counting is cheaper than
+    locating.
+
+    Args:
+        cache_size: Texts whose count is memoized (LRU)
+    """
+
+    name = "tokenizer"
+
+    def __init__(self, cache_size=4096):
+        if cache_size < 1:
+            raise ValueError("cache_size must be positive")
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._counts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Picklable for process pools: the cache and lock stay behind
+        state = self.__dict__.copy()
+        del state["_counts"], state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._counts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _token_starts(self, text):
+        raise NotImplementedError
+
+    def _count(self, text):
+        return len(self._token_starts(text))
+
+    def token_starts(self, text):
+        """Sorted int64 array with the character offset where each token starts"""
+        return np.asarray(self._token_starts(text), dtype=np.int64)
+
+    def count(self, text):
+        """Number of tokens in text (memoized)"""
+        with self._lock:
+            count = self._counts.get(text)
+            if count is not None:
+                self._counts.move_to_end(text)
+                self.hits += 1
+                return count
+            self.misses += 1
+        count = self._count(text)
+        with self._lock:
+            self._counts[text] = count
+            if len(self._counts) > self.cache_size:
+                self._counts.popitem(last=False)
+        return count
+
+    def count_many(self, texts):
+        """Token counts of several texts as an int array"""
+        return np.fromiter((self.count(text) for text in texts), dtype=np.int64)
+
+
+class RegexTokenizer(Tokenizer):
+    """Offline BPE approximation: one precompiled regex, no vocabulary"""
+
+    name = "regex-bpe-approx"
+
+    def _token_starts(self, text):
+        return [match.start() for match in _TOKEN_RE.finditer(text)]
+
+    def _count(self, text):
+        return len(_TOKEN_RE.findall(text))
+
+
+class TiktokenTokenizer(Tokenizer):
+    """
+    Exact counts for OpenAI models with tiktoken
+
+    Args:
+        encoding: tiktoken encoding name (cl100k_base, o200k_base, ...)
+        model: Model name instead of an encoding (e.g. "gpt-4o-mini")
+    """
+
+    def __init__(self, encoding=DEFAULT_ENCODING, model=None, cache_size=4096):
+        super().__init__(cache_size)
+        # Optional dependency - only needed when exact counts are asked for
+        import tiktoken
+
+        self._encoding = (tiktoken.encoding_for_model(model) if model
+                          else tiktoken.get_encoding(encoding))
+        self.name = f"tiktoken-{self._encoding.name}"
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state["_encoding"] = self._encoding.name
+        return state
+
+    def __setstate__(self, state):
+        import tiktoken
+
+        super().__setstate__(state)
+        self._encoding = tiktoken.get_encoding(self._encoding)
+
+    def _token_starts(self, text):
+        tokens = self._encoding.encode(text, disallowed_special=())
+        _, offsets = self._encoding.decode_with_offsets(tokens)
+        return offsets
+
+    def _count(self, text):
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+
+def tokenizer_from_env():
+    """
+    Tokenizer selected by the TOKENIZER environment variable
+
+    "auto" (default) uses TiktokenTokenizer when tiktoken is installed
+    and the encoding can be loaded, RegexTokenizer otherwise; "local"
+    forces RegexTokenizer and "tiktoken" requires TiktokenTokenizer.
+    TOKENIZER_ENCODING picks the encoding (default cl100k_base).
+    """
+    choice = os.getenv("TOKENIZER", "auto").lower()
+    encoding = os.getenv("TOKENIZER_ENCODING", DEFAULT_ENCODING)
+    if choice == "local":
+        return RegexTokenizer()
+    if choice == "tiktoken":
+        return TiktokenTokenizer(encoding)
+    if choice != "auto":
+        raise ValueError(f"Unknown TOKENIZER {choice!r} (expected 'auto', 'local' or 'tiktoken')")
+    try:
+        return TiktokenTokenizer(encoding)
+    except Exception:
+        # Not installed, or the encoding file cannot be downloaded
+        return RegexTokenizer()
+
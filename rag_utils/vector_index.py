@@ -0,0 +1,156 @@
+"""
+In-Memory Vector Index
+
+Embeds a document set once and keeps the L2-normalized vectors in one
+contiguous float32 matrix. Cosine similarity then becomes a dot product, so
+a query is a single matrix-vector product (BLAS) plus an argpartition top-k,
+and a batch of queries is a single matrix-matrix product.
+
+Cascade search (coarse_dim=...) first scans a truncated, re-normalized copy
+of the corpus for a few hundred candidates and only rescores those with the
+full vectors - scanning 256 of 1536 dimensions reads ~6x less memory.
+"""
+
+import numpy as np
+
+from .embeddings import DEFAULT_MODEL, embed_texts, truncate_embeddings
+
+DEFAULT_CASCADE_CANDIDATES = 300
+
+
+def normalize_rows(vectors):
+    """L2-normalize each row into a new C-contiguous float32 matrix"""
+    vectors = np.array(vectors, dtype=np.float32, ndmin=2, order="C")
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0  # Leave all-zero rows as zeros instead of NaN
+    vectors /= norms
+    return vectors
+
+
+def top_k_indices(scores, k):
+    """
+    Indices of the k highest scores along the last axis, best first
+
+    argpartition finds the top k in O(n), then only those k are sorted.
+    """
+    n = scores.shape[-1]
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(scores.shape[:-1] + (0,), dtype=np.intp)
+    if k < n:
+        candidates = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+    else:
+        candidates = np.broadcast_to(np.arange(n), scores.shape).copy()
+    candidate_scores = np.take_along_axis(scores, candidates, axis=-1)
+    order = np.argsort(-candidate_scores, axis=-1, kind="stable")
+    return np.take_along_axis(candidates, order, axis=-1)
+
+
+def prepare_queries(query_vectors, dim):
+    """Normalize queries, truncating them if the index is shorter"""
+    queries = np.array(query_vectors, dtype=np.float32, ndmin=2)
+    if queries.shape[1] < dim:
+        raise ValueError(f"query dimension {queries.shape[1]} < index dimension {dim}")
+    if queries.shape[1] > dim:
+        return truncate_embeddings(queries, dim)
+    return normalize_rows(queries)
+
+
+class VectorIndex:
+    """
+    Brute-force cosine index over a fixed set of documents
+
+    Args:
+        vectors: (n, dim) embeddings, any float dtype
+        documents: Optional texts, documents[i] belongs to vectors[i]
+        dimensions: Optional target size - longer vectors are truncated
+                    and re-normalized (text-embedding-3-* only)
+    """
+
+    def __init__(self, vectors, documents=None, dimensions=None):
+        if dimensions is not None:
+            vectors = truncate_embeddings(vectors, dimensions)
+        self.vectors = normalize_rows(vectors)
+        self._coarse = {}
+        self.documents = list(documents) if documents is not None else None
+        if self.documents is not None and len(self.documents) != len(self.vectors):
+            raise ValueError("documents and vectors must have the same length")
+
+    @classmethod
+    def from_normalized(cls, vectors, documents=None):
+        """
+        Wrap already L2-normalized float32 vectors without copying them,
+        e.g. an np.memmap from a snapshot. documents can be any sequence.
+        """
+        index = cls.__new__(cls)
+        index.vectors = vectors
+        index.documents = documents
+        index._coarse = {}
+        return index
+
+    @classmethod
+    def from_texts(cls, documents, client, model=DEFAULT_MODEL, dimensions=None, cache=None):
+        """Embed documents in batched requests and index them"""
+        documents = list(documents)
+        vectors = embed_texts(documents, client, model=model, dimensions=dimensions, cache=cache)
+        return cls(vectors, documents)
+
+    def __len__(self):
+        return len(self.vectors)
+
+    @property
+    def dim(self):
+        return self.vectors.shape[1]
+
+    def coarse_vectors(self, coarse_dim):
+        """Truncated, re-normalized copy of the corpus (built once per size)"""
+        if coarse_dim not in self._coarse:
+            self._coarse[coarse_dim] = truncate_embeddings(self.vectors, coarse_dim)
+        return self._coarse[coarse_dim]
+
+    def search(self, query_vector, top_k=5, coarse_dim=None,
+               candidates=DEFAULT_CASCADE_CANDIDATES):
+        """
+        Find the top_k most similar documents to one query
+
+        Returns:
+            (indices, scores) - 1-D arrays, best match first
+        """
+        indices, scores = self.search_many(
+            np.asarray(query_vector)[None, :], top_k, coarse_dim, candidates
+        )
+        return indices[0], scores[0]
+
+    def search_many(self, query_vectors, top_k=5, coarse_dim=None,
+                    candidates=DEFAULT_CASCADE_CANDIDATES):
+        """
+        Search a batch of queries with one matrix-matrix product
+
+        Args:
+            query_vectors: (n_queries, dim) float vectors
+            top_k: Results per query
+            coarse_dim: If set, run a cascade - scan the first coarse_dim
+                        dimensions for candidates, then rescore in full
+            candidates: Candidates kept per query by the coarse pass
+
+        Returns:
+            (indices, scores) - arrays of shape (n_queries, top_k)
+        """
+        queries = prepare_queries(query_vectors, self.dim)
+        if coarse_dim is None or coarse_dim >= self.dim or candidates >= len(self):
+            scores = queries @ self.vectors.T
+            indices = top_k_indices(scores, top_k)
+            return indices, np.take_along_axis(scores, indices, axis=-1)
+
+        coarse_scores = truncate_embeddings(queries, coarse_dim) @ self.coarse_vectors(coarse_dim).T
+        shortlist = top_k_indices(coarse_scores, max(candidates, top_k))
+
+        k = min(top_k, shortlist.shape[1])
+        indices = np.empty((len(queries), k), dtype=np.intp)
+        scores = np.empty((len(queries), k), dtype=np.float32)
+        for q, rows in enumerate(shortlist):
+            exact = self.vectors[rows] @ queries[q]
+            best = top_k_indices(exact, k)
+            indices[q] = rows[best]
+            scores[q] = exact[best]
+        return indices, scores